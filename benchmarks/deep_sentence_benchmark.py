@@ -0,0 +1,89 @@
+# Deep and wide sentence benchmark
+#
+# Times the main Sentence algorithms on sentences far deeper than Python's recursion limit (long chains of
+# implications and of nested negations and parentheses) and on very wide ones (long clauses and conjunctions).
+#
+# Usage: python -m benchmarks.deep_sentence_benchmark [--depth 20000] [--width 100000]
+import argparse
+import time
+from copy import deepcopy
+from typing import Callable, Dict, List
+from proplogic.knowledge_base import PLKnowledgeBase
+from proplogic.sentence import Sentence
+from proplogic.symbol import LogicValue, SymbolList
+
+
+def deep_sentences(depth: int) -> Dict[str, str]:
+    """
+    :param depth: How many levels deep each sentence is
+    :return: Sentence text by name
+    """
+    symbols: List[str] = ['D' + str(i) for i in range(depth)]
+    return {
+        'implication chain': " => (".join(symbols) + ")" * (depth - 1),
+        'nested negations': "~(" * depth + "D0" + ")" * depth,
+        'nested clauses': " AND (".join("(" + symbol + " OR ~" + symbol + "X)" for symbol in symbols) +
+                          ")" * (depth - 1),
+    }
+
+
+def wide_sentences(width: int) -> Dict[str, str]:
+    """
+    :param width: How many literals each sentence has
+    :return: Sentence text by name
+    """
+    literals: List[str] = ['W' + str(i) if i % 2 else '~W' + str(i) for i in range(width)]
+    return {'clause': " OR ".join(literals), 'conjunction': " AND ".join(literals)}
+
+
+def _time(operation: Callable[[], object]) -> float:
+    start_time: float = time.perf_counter()
+    operation()
+    return time.perf_counter() - start_time
+
+
+def run(name: str, text: str) -> None:
+    """
+    Parses a sentence and prints how long each algorithm takes on it.
+    :param name: Name to print
+    :param text: The sentence text
+    :return: None
+    """
+    sentence: Sentence = Sentence()
+    seconds: float = _time(lambda: sentence.copy(Sentence(text)))
+    model: SymbolList = sentence.get_symbol_list()
+    kb: PLKnowledgeBase = PLKnowledgeBase()
+    kb.add(sentence)
+    for symbol in model.get_keys():
+        model.set_value(symbol, LogicValue.FALSE)
+    timings: Dict[str, float] = {
+        'parse': seconds,
+        'to_string': _time(lambda: sentence.to_string()),
+        'to_string(True)': _time(lambda: sentence.to_string(True)),
+        'get_symbol_list': _time(sentence.get_symbol_list),
+        'evaluate': _time(lambda: sentence.evaluate(model)),
+        'clone': _time(sentence.clone),
+        'deepcopy': _time(lambda: deepcopy(sentence)),
+        'kb clone': _time(kb.clone),
+        'structural_hash': _time(sentence.structural_hash),
+        'is_valid_cnf': _time(sentence.is_valid_cnf),
+        'convert_to_cnf': _time(sentence.convert_to_cnf),
+    }
+    print(f"{name} ({len(text)} characters)")
+    for operation, seconds in timings.items():
+        print(f"  {operation:<18} {seconds * 1000:10.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time Sentence algorithms on very deep and very wide sentences.")
+    parser.add_argument('--depth', type=int, default=20000)
+    parser.add_argument('--width', type=int, default=100000)
+    args = parser.parse_args()
+    for name, text in deep_sentences(args.depth).items():
+        run(name, text)
+    for name, text in wide_sentences(args.width).items():
+        run(name, text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# Import time benchmark
+#
+# Reports how long a fresh interpreter takes to import a proplogic module, using python -X importtime so that the
+# time spent in each proplogic module is shown separately from the standard library modules it pulls in. The first
+# run warms up the bytecode cache, which is kept in a temporary directory so that the source tree isn't touched.
+#
+# Usage: python -m benchmarks.import_benchmark [--module proplogic.knowledge_base] [--runs 10] [--budget-ms 50]
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+
+def _import_times(module: str, environment: Dict[str, str]) -> Tuple[int, Dict[str, int]]:
+    # Imports module in a new interpreter. Returns the total microseconds and each module's own microseconds.
+    result: subprocess.CompletedProcess = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+                                                         env=environment, capture_output=True, text=True, check=True)
+    total: int = 0
+    self_times: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, cumulative, name = line[len('import time:'):].split('|')
+        self_times[name.strip()] = int(self_time)
+        if name.strip() == module:
+            total = int(cumulative)
+    return total, self_times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time to import a proplogic module in a fresh interpreter.")
+    parser.add_argument('--module', default='proplogic.knowledge_base')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--budget-ms', type=float, default=None,
+                        help="Exit with an error if the median import time is over this many milliseconds")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as cache_directory:
+        environment: Dict[str, str] = dict(os.environ)
+        environment.pop('PYTHONDONTWRITEBYTECODE', None)
+        environment['PYTHONPYCACHEPREFIX'] = cache_directory
+        environment['PYTHONPATH'] = os.pathsep.join(path for path in [os.getcwd(), environment.get('PYTHONPATH')]
+                                                    if path)
+        _import_times(args.module, environment)
+        totals: List[int] = []
+        self_times: Dict[str, List[int]] = {}
+        for _ in range(args.runs):
+            total, run_self_times = _import_times(args.module, environment)
+            totals.append(total)
+            for name, self_time in run_self_times.items():
+                self_times.setdefault(name, []).append(self_time)
+    median_ms: float = statistics.median(totals) / 1000
+    print(f"import {args.module}: median {median_ms:.1f} ms over {args.runs} runs")
+    print(f"{'module':<32} {'self ms':>8}")
+    slowest: List[Tuple[float, str]] = sorted(((statistics.median(times) / 1000, name)
+                                               for name, times in self_times.items()), reverse=True)
+    for self_ms, name in slowest[:15]:
+        print(f"{name:<32} {self_ms:8.2f}")
+    proplogic_ms: float = sum(self_ms for self_ms, name in slowest if name.startswith('proplogic'))
+    print(f"{'(all proplogic modules)':<32} {proplogic_ms:8.2f}")
+    for heavy in ['pyparsing', 'numpy', 'concurrent.futures', 'random']:
+        if heavy in self_times:
+            print("Warning: importing " + args.module + " also imports " + heavy)
+    if args.budget_ms is not None and median_ms > args.budget_ms:
+        sys.exit(f"Over budget: {median_ms:.1f} ms > {args.budget_ms:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+# Memory benchmark
+#
+# Reports the bytes used per clause by a large CNF knowledge base held as Sentence trees, as integer clauses
+# (see proplogic.cnf), and as a memory mapped snapshot (see proplogic.snapshot).
+#
+# Usage: python -m benchmarks.memory_benchmark [--clauses 1000000] [--symbols 50000] [--seed 0]
+import argparse
+import gc
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from typing import List
+from proplogic.knowledge_base import PLKnowledgeBase
+from proplogic.cnf import literals_to_sentence, kb_to_clauses
+from proplogic.snapshot import save_snapshot, load_snapshot
+
+
+def random_clauses(clause_count: int, symbol_count: int, seed: int) -> List[List[int]]:
+    """
+    Makes random 3-literal integer clauses.
+    :param clause_count: Number of clauses
+    :param symbol_count: Number of symbols to pick from
+    :param seed: Random seed so runs can be compared
+    :return: A list of integer clauses
+    """
+    generator: random.Random = random.Random(seed)
+    return [[symbol if generator.random() < 0.5 else -symbol
+             for symbol in generator.sample(range(1, symbol_count + 1), 3)] for _ in range(clause_count)]
+
+
+def _measure(label: str, clause_count: int, build) -> object:
+    # Runs build and prints how much memory the object it returns holds on to
+    gc.collect()
+    tracemalloc.start()
+    start_time: float = time.perf_counter()
+    result = build()
+    seconds: float = time.perf_counter() - start_time
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} {size / clause_count:10.1f} bytes/clause {size / 2 ** 20:10.1f} MiB {seconds:8.2f} s")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bytes per clause of a large CNF knowledge base.")
+    parser.add_argument('--clauses', type=int, default=1000000)
+    parser.add_argument('--symbols', type=int, default=50000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    symbol_names: List[str] = ['S' + str(i) for i in range(1, args.symbols + 1)]
+    clauses: List[List[int]] = random_clauses(args.clauses, args.symbols, args.seed)
+    print(f"{args.clauses} clauses of 3 literals over {args.symbols} symbols")
+
+    def build_kb() -> PLKnowledgeBase:
+        # Filled in directly, as a snapshot load does, since 'add' checks every new sentence against the rest
+        kb = PLKnowledgeBase()
+        kb._sentences = [literals_to_sentence(clause, symbol_names) for clause in clauses]
+        kb._is_cnf = True
+        return kb
+
+    knowledge_base: PLKnowledgeBase = _measure("Sentence knowledge base", args.clauses, build_kb)
+    _measure("Integer clauses", args.clauses, lambda: kb_to_clauses(knowledge_base))
+    with tempfile.TemporaryDirectory() as directory:
+        path: str = os.path.join(directory, 'benchmark.plkb')
+        save_snapshot(knowledge_base, path)
+        del knowledge_base
+        snapshot_kb: PLKnowledgeBase = _measure("Snapshot knowledge base", args.clauses, lambda: load_snapshot(path))
+        print(f"{'Snapshot file':<28} {os.path.getsize(path) / args.clauses:10.1f} bytes/clause (memory mapped)")
+        # Let go of the memory map before the file is deleted
+        del snapshot_kb
+        gc.collect()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+from __future__ import annotations
+from typing import List, Dict, Sequence, Tuple
+import numpy as np
+from proplogic.sentence import Sentence, LogicOperatorTypes
+
+# Batch evaluation
+#
+# Evaluates sentences against many models at once with numpy. A batch of models is an (n_models x n_symbols) int8
+# array of LogicValue codes (1 TRUE, 0 FALSE, -1 UNDEFINED) with one column per symbol. The three-valued operators
+# are vectorized by ranking the values FALSE < UNDEFINED < TRUE as 0, 1, 2. AND is then the minimum of the ranks, OR
+# the maximum, NOT is 2 - rank and a => b is max(2 - a, b), which gives the same results as Sentence.evaluate one
+# model at a time. A <=> B is UNDEFINED if either side is, otherwise TRUE when both ranks are equal.
+
+
+def to_ranks(models: np.ndarray) -> np.ndarray:
+    """
+    :param models: An array of LogicValue codes
+    :return: An int8 array of the same shape with FALSE as 0, UNDEFINED as 1 and TRUE as 2
+    """
+    return np.where(models < 0, 1, models * 2).astype(np.int8)
+
+
+def from_ranks(ranks: np.ndarray) -> np.ndarray:
+    """
+    :param ranks: An array of ranks (see to_ranks)
+    :return: An int8 array of the same shape with the LogicValue code of each rank
+    """
+    return np.where(ranks == 1, -1, ranks >> 1).astype(np.int8)
+
+
+def evaluate_ranks(sentence: Sentence, ranks: np.ndarray, columns: Dict[str, int]) -> np.ndarray:
+    """
+    Evaluates a sentence for every row of ranks at once.
+    :param sentence: The Sentence to evaluate
+    :param ranks: An (n_models x n_symbols) array of ranks (see to_ranks)
+    :param columns: The column in ranks of each symbol name
+    :return: An array of n_models ranks
+    """
+    # Bottom up without recursion, the same as Sentence._traverse_and_evaluate. The operands of a node are
+    # evaluated last to first, so when the node is combined their values are on top of the value stack in order.
+    values: List[np.ndarray] = []
+    stack: List[Tuple[Sentence, bool]] = [(sentence, False)]
+    while len(stack) > 0:
+        sub_sentence, operands_done = stack.pop()
+        evaluate: np.ndarray
+        if sub_sentence.is_atomic:
+            if sub_sentence.symbol is None:
+                # An empty Sentence is UNDEFINED, the same as in evaluate
+                evaluate = np.ones(ranks.shape[0], dtype=np.int8)
+            elif sub_sentence.symbol not in columns:
+                raise KeyError(sub_sentence.symbol)
+            else:
+                evaluate = ranks[:, columns[sub_sentence.symbol]]
+        elif not operands_done:
+            stack.append((sub_sentence, True))
+            stack.extend((operand, False) for operand in sub_sentence.operands)
+            continue
+        else:
+            operand_values: List[np.ndarray] = [values.pop() for _ in sub_sentence.operands]
+            operator: LogicOperatorTypes = sub_sentence.logic_operator
+            evaluate = operand_values[-1]
+            if operator == LogicOperatorTypes.AND or operator == LogicOperatorTypes.OR:
+                combine = np.minimum if operator == LogicOperatorTypes.AND else np.maximum
+                if len(operand_values) > 1:
+                    evaluate = combine(operand_values[-2], evaluate)
+                for operand_value in operand_values[-3::-1]:
+                    combine(operand_value, evaluate, out=evaluate)
+            elif operator == LogicOperatorTypes.IMPLIES:
+                evaluate = np.maximum(2 - operand_values[0], evaluate)
+            elif operator == LogicOperatorTypes.BI_CONDITIONAL:
+                evaluate = np.where((operand_values[0] == 1) | (evaluate == 1), 1,
+                                    np.where(operand_values[0] == evaluate, 2, 0))
+        if sub_sentence.negation:
+            evaluate = 2 - evaluate
+        values.append(evaluate.astype(np.int8, copy=False))
+    return values[0]
+
+
+def evaluate_batch(sentences: Sequence[Sentence], models: np.ndarray, symbols: Sequence[str]) -> np.ndarray:
+    """
+    Evaluates sentences for a batch of models. Like PLKnowledgeBase.evaluate, the result for a model is FALSE if any
+    sentence is FALSE, otherwise UNDEFINED if any is UNDEFINED, otherwise TRUE.
+    :param sentences: The sentences to evaluate
+    :param models: An (n_models x n_symbols) array of LogicValue codes (1, 0 or -1)
+    :param symbols: The symbol name of each column of models
+    :return: An int8 array of n_models LogicValue codes
+    """
+    models = np.asarray(models, dtype=np.int8)
+    if models.ndim != 2 or models.shape[1] != len(symbols):
+        raise ValueError("Expected an array of models with " + str(len(symbols)) + " columns, got shape "
+                         + str(models.shape))
+    ranks: np.ndarray = to_ranks(models)
+    columns: Dict[str, int] = {symbol: column for column, symbol in enumerate(symbols)}
+    result: np.ndarray = np.full(models.shape[0], 2, dtype=np.int8)
+    for sentence in sentences:
+        np.minimum(result, evaluate_ranks(sentence, ranks, columns), out=result)
+    return from_ranks(result)
@@ -0,0 +1,182 @@
+from __future__ import annotations
+from typing import List, Dict, Optional, Tuple
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from proplogic.sentence import Sentence, LogicOperatorTypes
+from proplogic.parser import LogicParser
+
+# Parallel bulk parsing
+#
+# A large rule file is split into chunks on line boundaries and each chunk is parsed by a LogicParser in a worker
+# process. Sending Sentence trees back between processes would mean pickling every node, so each worker sends its
+# sentences back as one flat postfix array of ints plus the chunk's own list of symbol names (symbol ids aren't
+# shared between processes, see proplogic.symbol.symbol_table). The codes are:
+#
+#   n >= 0  push the atomic sentence for symbol names[n]
+#   _NOT    negate the sentence on top of the stack (wrapping it if it is already negated, as the parser does)
+#   _AND, _OR, _IMPLIES, _BICONDITIONAL  pop two sentences and push them joined by the operator
+#   _END    the sentence on top of the stack is finished
+
+_NOT: int = -1
+_AND: int = -2
+_OR: int = -3
+_IMPLIES: int = -4
+_BICONDITIONAL: int = -5
+_END: int = -6
+
+_OPERATOR_CODES: Dict[LogicOperatorTypes, int] = {LogicOperatorTypes.AND: _AND, LogicOperatorTypes.OR: _OR,
+                                                  LogicOperatorTypes.IMPLIES: _IMPLIES,
+                                                  LogicOperatorTypes.BI_CONDITIONAL: _BICONDITIONAL}
+_CODE_OPERATORS: Dict[int, LogicOperatorTypes] = {code: operator for operator, code in _OPERATOR_CODES.items()}
+
+# Words and characters that mean a sentence carries on past the end of a line (or started before it)
+_CONTINUES_AFTER: Tuple[str, ...] = ("AND", "OR", "=>", "~", "(")
+_CONTINUES_BEFORE: Tuple[str, ...] = ("AND", "OR", "=>", "<=>", ")")
+
+
+def encode_postfix(sentence: Sentence, symbol_ids: Dict[str, int], symbol_names: List[str], codes: array) -> None:
+    """
+    Appends a Sentence to a postfix code array (see the codes above), followed by _END.
+    :param sentence: The Sentence to encode
+    :param symbol_ids: Symbol name to index in symbol_names. New symbols are added to both.
+    :param symbol_names: The symbol names the codes refer to
+    :param codes: The array('i') to append to
+    :return: None
+    """
+    stack: List[tuple] = [(sentence, False)]
+    while len(stack) > 0:
+        node, children_done = stack.pop()
+        if node._symbol is not None:
+            symbol_id: Optional[int] = symbol_ids.get(node._symbol)
+            if symbol_id is None:
+                symbol_id = len(symbol_names)
+                symbol_ids[node._symbol] = symbol_id
+                symbol_names.append(node._symbol)
+            codes.append(symbol_id)
+        elif not children_done:
+            stack.append((node, True))
+            stack.extend((operand, False) for operand in reversed(node.operands))
+            continue
+        elif node._logic_operator != LogicOperatorTypes.NO_OPERATOR:
+            # An n-ary node's operands are all on the stack, so join them from the right
+            codes.extend([_OPERATOR_CODES[node._logic_operator]] * (len(node.operands) - 1))
+        if node._negation:
+            codes.append(_NOT)
+    codes.append(_END)
+
+
+def decode_postfix(symbol_names: List[str], codes: array) -> List[Sentence]:
+    """
+    Rebuilds the Sentences in a postfix code array.
+    :param symbol_names: The symbol names the codes refer to
+    :param codes: Codes made by encode_postfix
+    :return: A list of Sentences, one per _END code
+    """
+    sentences: List[Sentence] = []
+    stack: List[Sentence] = []
+    for code in codes:
+        if code >= 0:
+            stack.append(Sentence(symbol_names[code]))
+        elif code == _NOT:
+            top: Sentence = stack[-1]
+            if top.negation:
+                # Double negation, so make this sentence a level above (the same as LogicParser._negate)
+                top = Sentence()
+                top.first_sentence = stack[-1]
+                stack[-1] = top
+            top.negation = True
+        elif code == _END:
+            sentences.append(stack.pop())
+        else:
+            second: Sentence = stack.pop()
+            stack[-1] = Sentence(stack[-1], _CODE_OPERATORS[code], second)
+    return sentences
+
+
+def _parse_chunk(text: str) -> Tuple[List[str], array]:
+    # Parse one chunk in a worker process and send the sentences back as postfix codes
+    symbol_ids: Dict[str, int] = {}
+    symbol_names: List[str] = []
+    codes: array = array('i')
+    for sentence in LogicParser(text).parse_input():
+        encode_postfix(sentence, symbol_ids, symbol_names, codes)
+    return symbol_names, codes
+
+
+def _last_word(text: str, end: int, start: int) -> str:
+    # The text before end back to the previous whitespace, skipping trailing whitespace (but not going before start)
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    begin: int = end
+    while begin > start and not text[begin - 1].isspace():
+        begin -= 1
+    return text[begin:end]
+
+
+def _first_word(text: str, start: int) -> str:
+    while start < len(text) and text[start].isspace():
+        start += 1
+    end: int = start
+    while end < len(text) and not text[end].isspace():
+        end += 1
+    return text[start:end]
+
+
+def split_chunks(text: str, chunk_count: int) -> List[str]:
+    """
+    Splits propositional logic text into about chunk_count pieces of about the same size. Pieces are only split at
+    a line break between two sentences: never inside parentheses, and never next to an operator (a sentence can
+    carry on over a line break, see proplogic.parser).
+    :param text: Upper case propositional logic text
+    :param chunk_count: The number of pieces wanted
+    :return: A list of pieces that parse to the same sentences as text, in order
+    """
+    chunks: List[str] = []
+    target: int = max(1, len(text) // max(1, chunk_count))
+    start: int = 0
+    depth: int = 0
+    counted: int = 0
+    position: int = text.find("\n", target)
+    while position != -1:
+        depth += text.count("(", counted, position) - text.count(")", counted, position)
+        counted = position
+        last_word: str = _last_word(text, position, start)
+        first_word: str = _first_word(text, position + 1)
+        if depth == 0 and len(last_word) > 0 and len(first_word) > 0 \
+                and not last_word.endswith(_CONTINUES_AFTER) and not first_word.startswith(_CONTINUES_BEFORE):
+            chunks.append(text[start:position])
+            start = position + 1
+            position = text.find("\n", start + target)
+        else:
+            position = text.find("\n", position + 1)
+    if len(text[start:].strip()) > 0:
+        chunks.append(text[start:])
+    return chunks
+
+
+def parse_rules(text: str, workers: Optional[int] = None) -> List[Sentence]:
+    """
+    Parses a large amount of propositional logic text (i.e. a rule file) across several processes.
+    :param text: The propositional logic text, one sentence per line
+    :param workers: Number of processes to parse in. None or 1 parses everything in this process.
+    :return: The parsed Sentences in the same order as LogicParser.parse_input would give them
+    """
+    if workers is None or workers <= 1:
+        return LogicParser(text).parse_input()
+    chunks: List[str] = split_chunks(text.upper(), workers * 4)
+    sentences: List[Sentence] = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for symbol_names, codes in executor.map(_parse_chunk, chunks):
+            sentences.extend(decode_postfix(symbol_names, codes))
+    return sentences
+
+
+def parse_rule_file(path: str, workers: Optional[int] = None) -> List[Sentence]:
+    """
+    Reads and parses a rule file. See parse_rules.
+    :param path: The path of the file
+    :param workers: Number of processes to parse in
+    :return: The parsed Sentences
+    """
+    with open(path, "r") as file:
+        return parse_rules(file.read(), workers=workers)
@@ -0,0 +1,142 @@
+from __future__ import annotations
+from typing import List, Dict, Tuple, Iterable
+import proplogic.knowledge_base as kb
+from proplogic.sentence import Sentence, LogicOperatorTypes, SentenceError, Clause
+
+# Integer clause format
+#
+# A CNF clause is stored as a list of non-zero integers (DIMACS style). Each symbol gets a positive integer id
+# starting at 1. A positive literal is stored as the id and a negated literal as the negative of the id.
+# So with the symbol table ['A', 'B', 'C'] the clause "A OR ~B OR C" is stored as [1, -2, 3].
+# An empty list is the empty clause (i.e. a contradiction).
+
+
+def clause_to_literals(clause: Sentence, symbol_ids: Dict[str, int], symbol_names: List[str]) -> List[int]:
+    """
+    Converts a CNF clause (a literal or a disjunction of literals) into a list of integer literals.
+    Any symbol not yet in the symbol table is added to both symbol_ids and symbol_names.
+    :param clause: A Sentence that is a single CNF clause
+    :param symbol_ids: A dictionary of symbol name to symbol id. Updated with any new symbols.
+    :param symbol_names: A list of symbol names where symbol_names[id - 1] is the name of symbol id. Updated with
+    any new symbols.
+    :return: A list of integer literals with duplicates removed.
+    """
+    literals: List[int] = []
+    stack: List[Sentence] = [clause]
+    while len(stack) > 0:
+        node: Sentence = stack.pop()
+        if node.is_atomic:
+            if node.symbol is None:
+                # The empty clause has no literals
+                continue
+            symbol_id: int = symbol_ids.get(node.symbol, 0)
+            if symbol_id == 0:
+                symbol_names.append(node.symbol)
+                symbol_id = len(symbol_names)
+                symbol_ids[node.symbol] = symbol_id
+            literal: int = -symbol_id if node.negation else symbol_id
+            if literal not in literals:
+                literals.append(literal)
+        elif node.logic_operator == LogicOperatorTypes.OR and not node.negation:
+            # Push the last operand first so that literals come out in left to right order
+            stack.extend(reversed(node.operands))
+        else:
+            raise SentenceError("Function clause_to_literals was called with a 'clause' not in CNF form.")
+    return literals
+
+
+def literals_to_sentence(literals: Iterable[int], symbol_names: List[str]) -> Sentence:
+    """
+    Builds a CNF clause Sentence out of a list of integer literals. This is the reverse of clause_to_literals.
+    :param literals: The integer literals of the clause
+    :param symbol_names: The symbol table the literals index into (symbol_names[id - 1] is the name of symbol id)
+    :return: A Sentence marked as being in CNF format
+    """
+    return Clause.from_literals(literals, symbol_names)
+
+
+def kb_to_clauses(knowledge_base: kb.PLKnowledgeBase) -> Tuple[List[str], List[List[int]]]:
+    """
+    Converts a knowledge base into integer clauses. Any sentence that isn't already a CNF clause is converted to
+    CNF first (the knowledge base itself is left unchanged).
+    :param knowledge_base: The PLKnowledgeBase to convert
+    :return: A tuple of the symbol table (a list of symbol names) and the list of integer clauses
+    """
+    symbol_ids: Dict[str, int] = {}
+    symbol_names: List[str] = []
+    sentences: List[Sentence] = knowledge_base.sentences
+    if hasattr(sentences, 'clause_literals'):
+        # Knowledge base loaded from a snapshot -- get the literals without building each Sentence
+        return symbol_names, [sentences.clause_literals(i, symbol_ids, symbol_names) for i in range(len(sentences))]
+    clauses: List[List[int]] = []
+    for sentence in sentences:
+        try:
+            clauses.append(clause_to_literals(sentence, symbol_ids, symbol_names))
+        except SentenceError:
+            for clause in knowledge_base.sentence_cnf(sentence):
+                clauses.append(clause_to_literals(clause, symbol_ids, symbol_names))
+    return symbol_names, clauses
+
+
+def tseitin_encode(sentence: Sentence, symbol_ids: Dict[str, int], symbol_names: List[str],
+                   clauses: List[List[int]]) -> int:
+    """
+    Tseitin encoding: adds clauses that define a literal equivalent to sentence, with one new symbol for each
+    operator. Unlike convert_to_cnf the number of clauses only grows linearly with the size of the sentence.
+    :param sentence: The Sentence to encode
+    :param symbol_ids: A dictionary of symbol name to symbol id. Updated with any new symbols.
+    :param symbol_names: The symbol table (symbol_names[id - 1] is the name of symbol id). Updated with any new symbols
+    and with a made up name (starting with '_') for each new operator symbol.
+    :param clauses: The list of integer clauses to add the definitions to
+    :return: The literal that is True exactly when the sentence is True
+    """
+    literals: Dict[int, int] = {}
+    stack: List[Tuple[Sentence, bool]] = [(sentence, False)]
+    while len(stack) > 0:
+        node, children_done = stack.pop()
+        literal: int
+        if node.is_atomic:
+            if node.symbol is None:
+                raise SentenceError("Can't encode an empty sentence.")
+            literal = symbol_ids.get(node.symbol, 0)
+            if literal == 0:
+                symbol_names.append(node.symbol)
+                literal = len(symbol_names)
+                symbol_ids[node.symbol] = literal
+        elif not children_done:
+            stack.append((node, True))
+            stack.extend((operand, False) for operand in node.operands)
+            continue
+        elif node.is_nary:
+            # An n-ary AND or OR only needs one new symbol for all of its operands
+            operands: List[int] = [literals[id(operand)] for operand in node.operands]
+            symbol_names.append('_T' + str(len(symbol_names) + 1))
+            literal = len(symbol_names)
+            if node.logic_operator == LogicOperatorTypes.AND:
+                clauses.extend([-literal, operand] for operand in operands)
+                clauses.append([literal] + [-operand for operand in operands])
+            else:
+                clauses.extend([literal, -operand] for operand in operands)
+                clauses.append([-literal] + operands)
+        elif node.second_sentence is None:
+            # Lone negation of another sentence
+            literal = literals[id(node.first_sentence)]
+        else:
+            first: int = literals[id(node.first_sentence)]
+            second: int = literals[id(node.second_sentence)]
+            symbol_names.append('_T' + str(len(symbol_names) + 1))
+            literal = len(symbol_names)
+            operator: LogicOperatorTypes = node.logic_operator
+            if operator == LogicOperatorTypes.AND:
+                clauses.extend([[-literal, first], [-literal, second], [literal, -first, -second]])
+            elif operator == LogicOperatorTypes.OR:
+                clauses.extend([[literal, -first], [literal, -second], [-literal, first, second]])
+            elif operator == LogicOperatorTypes.IMPLIES:
+                clauses.extend([[literal, first], [literal, -second], [-literal, -first, second]])
+            elif operator == LogicOperatorTypes.BI_CONDITIONAL:
+                clauses.extend([[-literal, -first, second], [-literal, first, -second],
+                                [literal, first, second], [literal, -first, -second]])
+            else:
+                raise SentenceError("Function tseitin_encode found an unknown operator.")
+        literals[id(node)] = -literal if node.negation else literal
+    return literals[id(sentence)]
@@ -0,0 +1,233 @@
+from __future__ import annotations
+from typing import List, Dict, Optional, Set, Tuple, Union, Iterable
+from concurrent.futures import ProcessPoolExecutor
+import proplogic.knowledge_base as kb
+from proplogic.heuristics import BranchingHeuristic, get_heuristic
+from proplogic.dpll import DPLLSolver
+
+# Component decomposition
+#
+# Think of the integer clauses (see proplogic.cnf) as a graph where each symbol is connected to every clause it
+# appears in. Clauses in different connected components of that graph share no symbols, so each component can be
+# solved on its own: the clauses are satisfiable if every component is, and the number of models is the product
+# of the number of models of each component. Solving many small problems is much cheaper than one big one because
+# the search space of a component only grows with its own symbols.
+
+
+class Component:
+    """
+    A connected component of the symbol-clause graph. Symbol ids and literals are the same as in the clauses
+    the component came from.
+    """
+    def __init__(self) -> None:
+        # Symbol ids, sorted
+        self.symbols: List[int] = []
+        # Index of each clause in the original list of clauses
+        self.clause_indexes: List[int] = []
+        self.clauses: List[List[int]] = []
+
+    def __repr__(self) -> str:
+        return "Component(symbols=" + repr(self.symbols) + ", clauses=" + repr(self.clauses) + ")"
+
+    def local_clauses(self, symbol_names: List[str]) -> Tuple[List[str], List[List[int]]]:
+        """
+        Renumbers the symbols of this component from 1 so that a solver only needs to know about this component's
+        symbols.
+        :param symbol_names: The symbol table of the original clauses (symbol_names[id - 1] is the name of symbol id)
+        :return: A tuple of the local symbol table and the renumbered clauses. Local id i is self.symbols[i - 1].
+        """
+        local_ids: Dict[int, int] = {symbol: i + 1 for i, symbol in enumerate(self.symbols)}
+        local_names: List[str] = [symbol_names[symbol - 1] for symbol in self.symbols]
+        clauses: List[List[int]] = [[local_ids[literal] if literal > 0 else -local_ids[-literal] for literal in clause]
+                                    for clause in self.clauses]
+        return local_names, clauses
+
+
+def find_components(clauses: List[List[int]]) -> List[Component]:
+    """
+    Splits clauses into the connected components of the symbol-clause graph using union-find.
+    :param clauses: Integer clauses
+    :return: A list of Components in order of their first clause. An empty clause is a component on its own.
+    """
+    parents: Dict[int, int] = {}
+
+    def find(symbol: int) -> int:
+        root: int = symbol
+        while parents[root] != root:
+            root = parents[root]
+        # Path compression
+        while parents[symbol] != root:
+            parents[symbol], symbol = root, parents[symbol]
+        return root
+
+    for clause in clauses:
+        first: Optional[int] = None
+        for literal in clause:
+            symbol: int = abs(literal)
+            if symbol not in parents:
+                parents[symbol] = symbol
+            if first is None:
+                first = find(symbol)
+            else:
+                root: int = find(symbol)
+                if root != first:
+                    parents[root] = first
+
+    components: Dict[int, Component] = {}
+    ordered: List[Component] = []
+    index: int
+    for index, clause in enumerate(clauses):
+        component: Component
+        if len(clause) == 0:
+            component = Component()
+            ordered.append(component)
+        else:
+            root: int = find(abs(clause[0]))
+            component = components.get(root)
+            if component is None:
+                component = Component()
+                components[root] = component
+                ordered.append(component)
+        component.clause_indexes.append(index)
+        component.clauses.append(clause)
+    for symbol in parents:
+        components[find(symbol)].symbols.append(symbol)
+    for component in ordered:
+        component.symbols.sort()
+    return ordered
+
+
+def _solve_component(component: Component, symbol_names: List[str],
+                     heuristic: Union[str, BranchingHeuristic, None]) -> Optional[Dict[int, bool]]:
+    # Solve one component. Returns its model (in the original symbol ids) or None if it is unsatisfiable.
+    # A module level function so that it can be sent to another process.
+    local_names, clauses = component.local_clauses(symbol_names)
+    solver: DPLLSolver = DPLLSolver(clauses, local_names,
+                                    heuristic=None if heuristic is None else get_heuristic(heuristic))
+    if not solver.solve():
+        return None
+    return {component.symbols[symbol - 1]: value for symbol, value in solver.model().items()}
+
+
+def solve_components(components: List[Component], symbol_names: List[str],
+                     heuristic: Union[str, BranchingHeuristic, None] = None,
+                     workers: Optional[int] = None) -> Optional[Dict[int, bool]]:
+    """
+    Solves each component separately and combines the models.
+    :param components: The components to solve (see find_components)
+    :param symbol_names: The symbol table of the original clauses
+    :param heuristic: Optional branching heuristic name or BranchingHeuristic for each solver
+    :param workers: Number of processes to solve components in. None or 1 solves them one at a time in this process.
+    :return: A model for the symbols that needed a value or None if any component is unsatisfiable.
+    """
+    model: Dict[int, bool] = {}
+    if workers is None or workers <= 1 or len(components) <= 1:
+        for component in components:
+            component_model: Optional[Dict[int, bool]] = _solve_component(component, symbol_names, heuristic)
+            if component_model is None:
+                return None
+            model.update(component_model)
+        return model
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        count: int = len(components)
+        for component_model in executor.map(_solve_component, components, [symbol_names] * count,
+                                            [heuristic] * count):
+            if component_model is None:
+                return None
+            model.update(component_model)
+    return model
+
+
+def _unit_propagate(clauses: List[List[int]]) -> Tuple[Optional[List[List[int]]], Set[int]]:
+    # Repeatedly assigns unit clauses and simplifies. Returns the simplified clauses (None on a conflict) and the
+    # set of symbols that were assigned.
+    true_literals: Set[int] = set()
+    while True:
+        units: List[int] = [clause[0] for clause in clauses if len(clause) == 1]
+        if len(units) == 0:
+            return clauses, {abs(literal) for literal in true_literals}
+        for literal in units:
+            if -literal in true_literals:
+                return None, set()
+            true_literals.add(literal)
+        simplified: List[List[int]] = []
+        for clause in clauses:
+            if any(literal in true_literals for literal in clause):
+                continue
+            reduced: List[int] = [literal for literal in clause if -literal not in true_literals]
+            if len(reduced) == 0:
+                return None, set()
+            simplified.append(reduced)
+        clauses = simplified
+
+
+def _count_models(clauses: List[List[int]], symbols: Set[int]) -> int:
+    # Number of assignments to symbols that make every clause True. Branches on the symbol with the most
+    # occurrences and splits into components again after each branch.
+    clauses, assigned = _unit_propagate(clauses)
+    if clauses is None:
+        return 0
+    free: Set[int] = symbols - assigned
+    total: int = 1
+    for component in find_components(clauses):
+        if len(component.symbols) == 0:
+            return 0
+        free.difference_update(component.symbols)
+        occurrences: Dict[int, int] = {}
+        for clause in component.clauses:
+            for literal in clause:
+                occurrences[abs(literal)] = occurrences.get(abs(literal), 0) + 1
+        symbol: int = max(occurrences, key=occurrences.get)
+        component_symbols: Set[int] = set(component.symbols)
+        count: int = _count_models(component.clauses + [[symbol]], component_symbols) + \
+            _count_models(component.clauses + [[-symbol]], component_symbols)
+        if count == 0:
+            return 0
+        total *= count
+    return total * 2 ** len(free)
+
+
+def _count_component(component: Component) -> int:
+    return _count_models(component.clauses, set(component.symbols))
+
+
+def count_models(clauses: List[List[int]], symbol_count: int, workers: Optional[int] = None) -> int:
+    """
+    Counts the models of integer clauses exactly by counting each component separately and multiplying.
+    :param clauses: Integer clauses
+    :param symbol_count: The number of symbols (ids 1 to symbol_count). Symbols not in any clause can be either value.
+    :param workers: Number of processes to count components in. None or 1 counts them one at a time in this process.
+    :return: The number of assignments to all symbol_count symbols that make every clause True.
+    """
+    components: List[Component] = find_components(clauses)
+    total: int = 1
+    counts: Iterable[int]
+    if workers is None or workers <= 1 or len(components) <= 1:
+        counts = map(_count_component, components)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            counts = list(executor.map(_count_component, components))
+    used_symbols: int = 0
+    for component, count in zip(components, counts):
+        if count == 0:
+            return 0
+        total *= count
+        used_symbols += len(component.symbols)
+    return total * 2 ** (symbol_count - used_symbols)
+
+
+def decompose_knowledge_base(knowledge_base: kb.PLKnowledgeBase) -> List[kb.PLKnowledgeBase]:
+    """
+    Splits a knowledge base into independent knowledge bases that share no symbols.
+    :param knowledge_base: The PLKnowledgeBase to split. It is converted to CNF first if needed.
+    :return: A list of PLKnowledgeBases in CNF format, one per component.
+    """
+    from proplogic.cnf import kb_to_clauses, literals_to_sentence
+    symbol_names, clauses = kb_to_clauses(knowledge_base)
+    knowledge_bases: List[kb.PLKnowledgeBase] = []
+    for component in find_components(clauses):
+        component_kb: kb.PLKnowledgeBase = kb.PLKnowledgeBase()
+        component_kb._sentences = [literals_to_sentence(clause, symbol_names) for clause in component.clauses]
+        component_kb._is_cnf = True
+        knowledge_bases.append(component_kb)
+    return knowledge_bases
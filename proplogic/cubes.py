@@ -0,0 +1,154 @@
+from __future__ import annotations
+from typing import List, Dict, Optional, Set, Tuple, Union
+from concurrent.futures import ProcessPoolExecutor, Future, as_completed
+import multiprocessing
+from proplogic.heuristics import BranchingHeuristic, get_heuristic
+from proplogic.dpll import DPLLSolver
+
+# Cube and conquer
+#
+# The search space of integer clauses (see proplogic.cnf) is split into cubes: sets of assumption literals that
+# together cover every assignment. The clauses are satisfiable exactly when they are satisfiable under at least one
+# cube, so the cubes can be solved independently in worker processes (the conquer step) and the search stops as soon
+# as one of them is satisfiable.
+#
+# The cubes are made by a lookahead splitter. For each candidate symbol, both of its values are propagated and the
+# number of extra literals that unit propagation forces is counted. The symbol with the largest product of the two
+# counts splits the cube, which keeps the two halves balanced and small. When one value of a symbol leads to a
+# conflict the other value is forced (a failed literal), and when both do the cube has no models and is dropped.
+
+
+def split_cubes(clauses: List[List[int]], symbol_names: List[str], depth: int,
+                candidates: int = 16) -> List[List[int]]:
+    """
+    Splits the search space of clauses into cubes with a lookahead splitter.
+    :param clauses: Integer clauses
+    :param symbol_names: The symbol table for the clauses (symbol_names[id - 1] is the name of symbol id)
+    :param depth: The number of splits along each branch, so there are at most 2 ** depth cubes
+    :param candidates: The number of symbols to look ahead on at each split. The symbols that appear in the most
+    clauses are tried.
+    :return: A list of cubes (lists of literals). Cubes that propagation shows to have no models are left out, so an
+    empty list means that the clauses are unsatisfiable.
+    """
+    solver: DPLLSolver = DPLLSolver(clauses, symbol_names)
+    occurrences: Dict[int, int] = {}
+    for clause in clauses:
+        for literal in clause:
+            occurrences[abs(literal)] = occurrences.get(abs(literal), 0) + 1
+    by_occurrence: List[int] = sorted(occurrences, key=lambda symbol: (-occurrences[symbol], symbol))
+    cubes: List[List[int]] = []
+    # (cube, number of splits so far)
+    stack: List[Tuple[List[int], int]] = [([], 0)]
+    while len(stack) > 0:
+        cube, splits = stack.pop()
+        while True:
+            implied: Optional[List[int]] = solver.implied_literals(cube)
+            if implied is None:
+                break
+            if splits == depth:
+                cubes.append(cube)
+                break
+            assigned: Set[int] = {abs(literal) for literal in implied}
+            choices: List[int] = [symbol for symbol in by_occurrence if symbol not in assigned][:candidates]
+            if len(choices) == 0:
+                # Every symbol has a value and there was no conflict, so the cube is a model
+                cubes.append(cube)
+                break
+            best: Optional[int] = None
+            best_score: int = -1
+            forced: Optional[int] = None
+            refuted: bool = False
+            for symbol in choices:
+                positive: Optional[List[int]] = solver.implied_literals(cube + [symbol])
+                negative: Optional[List[int]] = solver.implied_literals(cube + [-symbol])
+                if positive is None and negative is None:
+                    refuted = True
+                    break
+                if positive is None or negative is None:
+                    forced = symbol if negative is None else -symbol
+                    break
+                score: int = (len(positive) - len(implied)) * (len(negative) - len(implied))
+                if score > best_score:
+                    best, best_score = symbol, score
+            if refuted:
+                break
+            if forced is not None:
+                cube = cube + [forced]
+                continue
+            stack.append((cube + [-best], splits + 1))
+            stack.append((cube + [best], splits + 1))
+            break
+    return cubes
+
+
+# Set in each worker process when any cube has been found satisfiable
+_stop_event = None
+
+
+def _set_stop_event(event) -> None:
+    global _stop_event
+    _stop_event = event
+
+
+def _solve_cubes(clauses: List[List[int]], symbol_names: List[str], cubes: List[List[int]],
+                 heuristic: Union[str, BranchingHeuristic, None]) -> Optional[Dict[int, bool]]:
+    # Solve a batch of cubes with one solver. Returns the model for the first satisfiable cube or None if there isn't
+    # one or another process has already found one. A module level function so that it can be sent to another process.
+    solver: DPLLSolver = DPLLSolver(clauses, symbol_names,
+                                    heuristic=None if heuristic is None else get_heuristic(heuristic),
+                                    stop=None if _stop_event is None else _stop_event.is_set)
+    for cube in cubes:
+        if _stop_event is not None and _stop_event.is_set():
+            return None
+        if solver.solve(cube):
+            return solver.model()
+        if solver.stopped:
+            return None
+    return None
+
+
+def cube_and_conquer(clauses: List[List[int]], symbol_names: List[str], workers: Optional[int] = None,
+                     depth: Optional[int] = None,
+                     heuristic: Union[str, BranchingHeuristic, None] = None) -> Optional[Dict[int, bool]]:
+    """
+    Splits the clauses into cubes (see split_cubes) and solves the cubes in worker processes. Each process solves a
+    batch of cubes with one DPLLSolver. As soon as any cube is satisfiable the batches that haven't started are
+    cancelled and the running ones abandon their search (see DPLLSolver's stop), so the worker processes are gone
+    shortly after a model is found.
+    :param clauses: Integer clauses
+    :param symbol_names: The symbol table for the clauses (symbol_names[id - 1] is the name of symbol id)
+    :param workers: Number of processes. None or 1 solves the cubes one at a time in this process.
+    :param depth: The number of splits along each branch. Defaults to enough for about eight cubes per process, or
+    to no splitting at all when there are no extra processes.
+    :param heuristic: Optional branching heuristic name or BranchingHeuristic for each solver
+    :return: A model (symbol id to value) if the clauses are satisfiable, otherwise None.
+    """
+    if workers is None or workers <= 1:
+        if depth is None:
+            solver: DPLLSolver = DPLLSolver(clauses, symbol_names,
+                                            heuristic=None if heuristic is None else get_heuristic(heuristic))
+            return solver.model() if solver.solve() else None
+        return _solve_cubes(clauses, symbol_names, split_cubes(clauses, symbol_names, depth), heuristic)
+    if depth is None:
+        depth = (workers * 8 - 1).bit_length()
+    cubes: List[List[int]] = split_cubes(clauses, symbol_names, depth)
+    if len(cubes) == 0:
+        return None
+    batch_count: int = min(len(cubes), workers * 4)
+    batches: List[List[List[int]]] = [cubes[start::batch_count] for start in range(batch_count)]
+    stop_event = multiprocessing.Event()
+    executor: ProcessPoolExecutor = ProcessPoolExecutor(max_workers=workers, initializer=_set_stop_event,
+                                                       initargs=(stop_event,))
+    model: Optional[Dict[int, bool]] = None
+    try:
+        futures: List[Future] = [executor.submit(_solve_cubes, clauses, symbol_names, batch, heuristic)
+                                 for batch in batches]
+        for future in as_completed(futures):
+            model = future.result()
+            if model is not None:
+                break
+    finally:
+        # Once a model is found (or on an error) cancel the batches that haven't started and stop the running ones
+        stop_event.set()
+        executor.shutdown(cancel_futures=True)
+    return model
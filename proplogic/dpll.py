@@ -0,0 +1,240 @@
+from __future__ import annotations
+from typing import List, Dict, Optional, Iterable, Callable
+from proplogic.symbol import LogicValue
+from proplogic.heuristics import BranchingHeuristic, AlphabeticalHeuristic
+
+# Iterative DPLL
+#
+# Works on integer clauses (see proplogic.cnf). Instead of recursing and cloning the model for every assignment,
+# the solver keeps a single assignment array, a trail of the literals assigned so far (in order), and the trail
+# position where each decision level starts. Backtracking just pops the trail. Each clause keeps a count of its
+# True and False literals so unit clauses, False clauses, and "every clause is True" can be spotted without
+# evaluating the clauses again.
+
+_TRUE: int = LogicValue.TRUE.value
+_FALSE: int = LogicValue.FALSE.value
+_UNDEFINED: int = LogicValue.UNDEFINED.value
+# How many decisions and conflicts solve makes between calls to the stop check
+_STOP_CHECK_INTERVAL: int = 1024
+
+
+class DPLLSolver:
+    """
+    A non-recursive DPLL solver with unit propagation and early termination.
+
+    Usage
+    _____
+    solver = DPLLSolver([[1, 2], [-1], [-2, 3]], ['A', 'B', 'C'])
+
+    if solver.solve():
+        model: Dict[int, bool] = solver.model()
+    """
+    def __init__(self, clauses: Iterable[List[int]], symbol_names: List[str],
+                 heuristic: BranchingHeuristic = None, stop: Optional[Callable[[], bool]] = None) -> None:
+        """
+        :param clauses: The integer clauses to solve
+        :param symbol_names: The symbol table for the clauses (symbol_names[id - 1] is the name of symbol id)
+        :param heuristic: The branching heuristic to use. Defaults to alphabetical order.
+        :param stop: Optional function that solve calls every so often during the search. When it returns True the
+        search is abandoned (see stopped).
+        """
+        self._symbol_count: int = len(symbol_names)
+        self._clauses: List[List[int]] = [list(dict.fromkeys(clause)) for clause in clauses]
+        self._heuristic: BranchingHeuristic = AlphabeticalHeuristic() if heuristic is None else heuristic
+        self._heuristic.initialize(self._clauses, symbol_names)
+        # Occurrence lists indexed by literal + symbol count
+        self._occurrences: List[List[int]] = [[] for _ in range(2 * self._symbol_count + 1)]
+        index: int
+        for index, clause in enumerate(self._clauses):
+            for literal in clause:
+                self._occurrences[literal + self._symbol_count].append(index)
+        self._assignment: List[int] = [_UNDEFINED] * (self._symbol_count + 1)
+        self._true_counts: List[int] = [0] * len(self._clauses)
+        self._false_counts: List[int] = [0] * len(self._clauses)
+        self._open_clauses: int = len(self._clauses)
+        self._trail: List[int] = []
+        # For each decision level: (trail position where the level starts, decision literal, already flipped)
+        self._levels: List[list] = []
+        self._propagated: int = 0
+        self._conflict: Optional[int] = None
+        self._stop: Optional[Callable[[], bool]] = stop
+        self._stopped: bool = False
+        self._steps: int = 0
+        # Symbols forced by unit clauses at level 0 never need to be undone
+        self._root_conflict: bool = any(len(clause) == 0 for clause in self._clauses)
+        if not self._root_conflict:
+            for clause in self._clauses:
+                if len(clause) == 1 and self._value(clause[0]) != _TRUE:
+                    if self._value(clause[0]) == _FALSE:
+                        self._root_conflict = True
+                        break
+                    self._assign(clause[0])
+            if not self._root_conflict and not self._propagate():
+                self._root_conflict = True
+
+    @property
+    def symbol_count(self) -> int:
+        return self._symbol_count
+
+    @property
+    def stopped(self) -> bool:
+        """
+        :return: True if the last call to solve returned False because the stop function said so, rather than
+        because there is no model.
+        """
+        return self._stopped
+
+    def _should_stop(self) -> bool:
+        # Counts a search step and calls the stop function every _STOP_CHECK_INTERVAL steps
+        if self._stop is None:
+            return False
+        self._steps += 1
+        if self._steps % _STOP_CHECK_INTERVAL == 0 and self._stop():
+            self._stopped = True
+        return self._stopped
+
+    def _value(self, literal: int) -> int:
+        value: int = self._assignment[abs(literal)]
+        if value == _UNDEFINED or literal > 0:
+            return value
+        return _TRUE - value
+
+    def _assign(self, literal: int) -> None:
+        self._assignment[abs(literal)] = _TRUE if literal > 0 else _FALSE
+        self._trail.append(literal)
+        for index in self._occurrences[literal + self._symbol_count]:
+            if self._true_counts[index] == 0:
+                self._open_clauses -= 1
+            self._true_counts[index] += 1
+        for index in self._occurrences[-literal + self._symbol_count]:
+            self._false_counts[index] += 1
+
+    def _unassign(self, literal: int) -> None:
+        self._assignment[abs(literal)] = _UNDEFINED
+        for index in self._occurrences[literal + self._symbol_count]:
+            self._true_counts[index] -= 1
+            if self._true_counts[index] == 0:
+                self._open_clauses += 1
+        for index in self._occurrences[-literal + self._symbol_count]:
+            self._false_counts[index] -= 1
+        self._heuristic.unassigned(abs(literal))
+
+    def _propagate(self) -> bool:
+        # Unit propagation over everything assigned since the last call. Returns False on a conflict.
+        while self._propagated < len(self._trail):
+            literal: int = self._trail[self._propagated]
+            self._propagated += 1
+            for index in self._occurrences[-literal + self._symbol_count]:
+                if self._true_counts[index] > 0:
+                    continue
+                clause: List[int] = self._clauses[index]
+                remaining: int = len(clause) - self._false_counts[index]
+                if remaining == 0:
+                    self._conflict = index
+                    return False
+                if remaining == 1:
+                    # Unit clause: the one literal left has to be True
+                    for unit in clause:
+                        if self._assignment[abs(unit)] == _UNDEFINED:
+                            self._assign(unit)
+                            break
+        return True
+
+    def _new_level(self, literal: int, flipped: bool) -> None:
+        self._levels.append([len(self._trail), literal, flipped])
+        self._assign(literal)
+
+    def _backtrack(self, level: int) -> None:
+        # Undo every assignment made at level and above
+        start: int = self._levels[level][0]
+        while len(self._trail) > start:
+            self._unassign(self._trail.pop())
+        del self._levels[level:]
+        self._propagated = min(self._propagated, len(self._trail))
+        self._conflict = None
+
+    def solve(self, assumptions: Iterable[int] = ()) -> bool:
+        """
+        Searches for a model that makes every clause True.
+        :param assumptions: Optional literals that must be True. They only apply to this call, so the solver can
+        be called again with different assumptions.
+        :return: True if the clauses (plus assumptions) can be satisfied, otherwise False. Also False if the search
+        was stopped (see stopped).
+        """
+        self._stopped = False
+        if len(self._levels) > 0:
+            self._backtrack(0)
+        if self._root_conflict:
+            return False
+        # Each assumption gets its own decision level that is never flipped
+        for literal in assumptions:
+            value: int = self._value(literal)
+            if value == _TRUE:
+                continue
+            if value == _FALSE:
+                return False
+            self._new_level(literal, True)
+            if not self._propagate():
+                return False
+        base_level: int = len(self._levels)
+        while True:
+            if self._open_clauses == 0:
+                # Early termination: every clause is already True
+                return True
+            literal: Optional[int] = self._heuristic.choose(self._assignment)
+            if literal is None:
+                return self._open_clauses == 0
+            if self._should_stop():
+                return False
+            self._new_level(literal, False)
+            while not self._propagate():
+                self._heuristic.conflict(self._clauses[self._conflict])
+                if self._should_stop():
+                    return False
+                # Find the most recent decision that hasn't had both values tried yet
+                while True:
+                    if len(self._levels) == base_level:
+                        return False
+                    level: int = len(self._levels) - 1
+                    decision: int = self._levels[level][1]
+                    flipped: bool = self._levels[level][2]
+                    self._backtrack(level)
+                    if not flipped:
+                        self._new_level(-decision, True)
+                        break
+
+    def implied_literals(self, assumptions: Iterable[int] = ()) -> Optional[List[int]]:
+        """
+        Assigns the assumptions and runs unit propagation without searching any further, i.e. a lookahead (see
+        proplogic.cubes). The assignments are undone again before returning.
+        :param assumptions: Literals that must be True
+        :return: Every literal that is True after propagation (including the assumptions and the literals forced by
+        unit clauses) or None if the assumptions lead to a conflict.
+        """
+        if len(self._levels) > 0:
+            self._backtrack(0)
+        if self._root_conflict:
+            return None
+        implied: Optional[List[int]] = None
+        for literal in assumptions:
+            value: int = self._value(literal)
+            if value == _TRUE:
+                continue
+            if value == _FALSE:
+                break
+            self._new_level(literal, True)
+            if not self._propagate():
+                break
+        else:
+            implied = list(self._trail)
+        if len(self._levels) > 0:
+            self._backtrack(0)
+        return implied
+
+    def model(self) -> Dict[int, bool]:
+        """
+        The model found by the last call to solve that returned True. Symbols that didn't need a value to make
+        every clause True are left out.
+        :return: A dictionary of symbol id to bool
+        """
+        return {abs(literal): literal > 0 for literal in self._trail}
@@ -0,0 +1,367 @@
+from __future__ import annotations
+from typing import List, Dict, Optional, Sequence, Union
+import heapq
+from proplogic.symbol import LogicSymbol, LogicValue
+
+# Branching heuristics
+#
+# A branching heuristic decides which symbol DPLL should try next and which value to try first. Heuristics work on
+# integer clauses (see proplogic.cnf) and on an assignment, which is a sequence indexed by symbol id holding the
+# LogicValue code of each symbol (1 = TRUE, 0 = FALSE, -1 = UNDEFINED). Index 0 is not used.
+# The choice is returned as a literal: the symbol id if it should be tried as True first, or its negative if it
+# should be tried as False first.
+
+_TRUE: int = LogicValue.TRUE.value
+_FALSE: int = LogicValue.FALSE.value
+_UNDEFINED: int = LogicValue.UNDEFINED.value
+
+
+class HeuristicError(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+
+
+class _SymbolHeap:
+    # A max priority queue of symbol ids ordered by score. Assigned symbols are dropped lazily as they reach the
+    # top and get pushed back when they are unassigned. A changed score just pushes a new entry and the old entry
+    # is skipped when it reaches the top.
+    def __init__(self, scores: List[float]) -> None:
+        self._scores: List[float] = scores
+        self._heap: List[tuple] = [(-scores[symbol], symbol) for symbol in range(1, len(scores))]
+        heapq.heapify(self._heap)
+        self._in_heap: List[bool] = [False] + [True] * (len(scores) - 1)
+
+    def pop_unassigned(self, assignment: Sequence[int]) -> Optional[int]:
+        while len(self._heap) > 0:
+            negative_score, symbol = heapq.heappop(self._heap)
+            if -negative_score != self._scores[symbol]:
+                # Out of date entry
+                continue
+            self._in_heap[symbol] = False
+            if assignment[symbol] == _UNDEFINED:
+                return symbol
+        return None
+
+    def push(self, symbol: int) -> None:
+        if not self._in_heap[symbol]:
+            self._in_heap[symbol] = True
+            heapq.heappush(self._heap, (-self._scores[symbol], symbol))
+
+    def score(self, symbol: int) -> float:
+        return self._scores[symbol]
+
+    def update(self, symbol: int, score: float) -> None:
+        self._scores[symbol] = score
+        if self._in_heap[symbol]:
+            heapq.heappush(self._heap, (-score, symbol))
+
+    def rescale(self, factor: float) -> None:
+        # Multiplies every score by factor, which keeps their order
+        self._scores = [score * factor for score in self._scores]
+        self._heap = [(-self._scores[symbol], symbol) for symbol in range(1, len(self._scores))
+                      if self._in_heap[symbol]]
+        heapq.heapify(self._heap)
+
+
+class BranchingHeuristic:
+    """
+    The base class for branching heuristics. A subclass must implement choose and may override _setup,
+    unassigned, and conflict.
+
+    Usage
+    _____
+    heuristic = VSIDSHeuristic()
+
+    heuristic.initialize(clauses, symbol_names)
+
+    literal: int = heuristic.choose(assignment)
+    """
+    name: str = ''
+
+    def __init__(self) -> None:
+        self._clauses: List[List[int]] = []
+        self._symbol_names: List[str] = []
+        self._symbol_ids: Dict[str, int] = {}
+        # The assignment as reported by symbol_assigned and symbol_unassigned (see next_symbol)
+        self._assignment: List[int] = [_UNDEFINED]
+
+    def initialize(self, clauses: List[List[int]], symbol_names: List[str]) -> None:
+        """
+        Sets up the heuristic for a new search.
+        :param clauses: The integer clauses being searched
+        :param symbol_names: The symbol table for the clauses (symbol_names[id - 1] is the name of symbol id)
+        :return: None
+        """
+        self._clauses = clauses
+        self._symbol_names = symbol_names
+        self._symbol_ids = {name: i + 1 for i, name in enumerate(symbol_names)}
+        self._assignment = [_UNDEFINED] * (len(symbol_names) + 1)
+        self._setup()
+
+    def _setup(self) -> None:
+        pass
+
+    @property
+    def symbol_count(self) -> int:
+        return len(self._symbol_names)
+
+    def choose(self, assignment: Sequence[int]) -> Optional[int]:
+        """
+        Picks the next literal to branch on.
+        :param assignment: The LogicValue code of each symbol, indexed by symbol id
+        :return: A literal (positive to try True first, negative to try False first) or None if every symbol
+        is assigned.
+        """
+        raise NotImplementedError
+
+    def unassigned(self, symbol: int) -> None:
+        """
+        Called when the search backtracks and symbol no longer has a value.
+        :param symbol: The symbol id
+        :return: None
+        """
+        pass
+
+    def conflict(self, clause: List[int]) -> None:
+        """
+        Called when the search finds a clause that is False under the current assignment.
+        :param clause: The False clause as integer literals
+        :return: None
+        """
+        pass
+
+    def _first_unassigned(self, assignment: Sequence[int]) -> Optional[int]:
+        for symbol in range(1, len(self._symbol_names) + 1):
+            if assignment[symbol] == _UNDEFINED:
+                return symbol
+        return None
+
+    def _open_clauses(self, assignment: Sequence[int]) -> List[List[int]]:
+        # Returns the unassigned literals of each clause that isn't already True
+        open_clauses: List[List[int]] = []
+        for clause in self._clauses:
+            unassigned: List[int] = []
+            for literal in clause:
+                value: int = assignment[abs(literal)]
+                if value == _UNDEFINED:
+                    unassigned.append(literal)
+                elif (value == _TRUE) == (literal > 0):
+                    break
+            else:
+                open_clauses.append(unassigned)
+        return open_clauses
+
+    # Adapters for engines that keep their model in a SymbolList rather than an assignment array. The engine reports
+    # every value it gives a symbol with symbol_assigned and every value it takes back with symbol_unassigned, so the
+    # heuristic keeps its own assignment array instead of reading the whole SymbolList on each decision.
+
+    def next_symbol(self) -> Optional[LogicSymbol]:
+        """
+        Same as choose but uses the assignment reported through symbol_assigned and symbol_unassigned and returns the
+        choice as a LogicSymbol with the value to try first.
+        :return: A LogicSymbol or None if every symbol the heuristic knows about is assigned.
+        """
+        literal: Optional[int] = self.choose(self._assignment)
+        if literal is None:
+            return None
+        return LogicSymbol(self._symbol_names[abs(literal) - 1], literal > 0)
+
+    def symbol_assigned(self, symbol_name: str, value: Union[bool, LogicValue]) -> None:
+        """
+        Called when the search gives a symbol a value. Symbols the heuristic doesn't know about are ignored.
+        :param symbol_name: The symbol name
+        :param value: The value it was given
+        :return: None
+        """
+        symbol: Optional[int] = self._symbol_ids.get(symbol_name)
+        if symbol is not None:
+            if isinstance(value, LogicValue):
+                self._assignment[symbol] = value.value
+            else:
+                self._assignment[symbol] = _TRUE if value else _FALSE
+
+    def symbol_unassigned(self, symbol_name: str) -> None:
+        """
+        Called when the search backtracks and a symbol no longer has a value.
+        :param symbol_name: The symbol name
+        :return: None
+        """
+        symbol: Optional[int] = self._symbol_ids.get(symbol_name)
+        if symbol is not None:
+            self._assignment[symbol] = _UNDEFINED
+            self.unassigned(symbol)
+
+    def literals_of(self, symbols: List[LogicSymbol]) -> List[int]:
+        """
+        Converts LogicSymbols (as returned by Sentence.get_atomic_symbols) into integer literals.
+        :param symbols: A list of LogicSymbol with TRUE for a positive literal and FALSE for a negated one
+        :return: A list of integer literals (symbols the heuristic doesn't know about are left out)
+        """
+        return [self._symbol_ids[symbol.name] if symbol.value == LogicValue.TRUE else -self._symbol_ids[symbol.name]
+                for symbol in symbols if symbol.name in self._symbol_ids]
+
+
+class AlphabeticalHeuristic(BranchingHeuristic):
+    """
+    Branches on symbols in alphabetical order, trying True first. This is what DPLL does without a heuristic.
+    """
+    name = 'alphabetical'
+
+    def _setup(self) -> None:
+        scores: List[float] = [0.0] * (self.symbol_count + 1)
+        for rank, name in enumerate(sorted(self._symbol_names)):
+            scores[self._symbol_ids[name]] = -rank
+        self._heap: _SymbolHeap = _SymbolHeap(scores)
+
+    def choose(self, assignment: Sequence[int]) -> Optional[int]:
+        return self._heap.pop_unassigned(assignment)
+
+    def unassigned(self, symbol: int) -> None:
+        self._heap.push(symbol)
+
+
+class JeroslowWangHeuristic(BranchingHeuristic):
+    """
+    Two-sided Jeroslow-Wang: each literal scores 2^-n for every clause of length n it appears in. Branches on the
+    symbol with the highest combined score and tries the value of its higher scoring literal first. Scores are
+    computed once from the original clauses.
+    """
+    name = 'jeroslow_wang'
+
+    def _setup(self) -> None:
+        self._positive: List[float] = [0.0] * (self.symbol_count + 1)
+        self._negative: List[float] = [0.0] * (self.symbol_count + 1)
+        for clause in self._clauses:
+            weight: float = 2.0 ** -len(clause)
+            for literal in clause:
+                if literal > 0:
+                    self._positive[literal] += weight
+                else:
+                    self._negative[-literal] += weight
+        self._heap: _SymbolHeap = _SymbolHeap([p + n for p, n in zip(self._positive, self._negative)])
+
+    def choose(self, assignment: Sequence[int]) -> Optional[int]:
+        symbol: Optional[int] = self._heap.pop_unassigned(assignment)
+        if symbol is None:
+            return None
+        return symbol if self._positive[symbol] >= self._negative[symbol] else -symbol
+
+    def unassigned(self, symbol: int) -> None:
+        self._heap.push(symbol)
+
+
+class VSIDSHeuristic(BranchingHeuristic):
+    """
+    Variable State Independent Decaying Sum: every symbol in a False clause has its activity bumped, and bumps
+    get bigger over time so that recent conflicts count for more. Branches on the most active symbol.
+    """
+    name = 'vsids'
+
+    def __init__(self, decay: float = 0.95) -> None:
+        super().__init__()
+        self._decay: float = decay
+
+    def _setup(self) -> None:
+        self._increment: float = 1.0
+        self._polarity: List[int] = [0] * (self.symbol_count + 1)
+        for clause in self._clauses:
+            for literal in clause:
+                self._polarity[abs(literal)] += 1 if literal > 0 else -1
+        self._heap: _SymbolHeap = _SymbolHeap([0.0] * (self.symbol_count + 1))
+
+    def activity(self, symbol: int) -> float:
+        return self._heap.score(symbol)
+
+    def choose(self, assignment: Sequence[int]) -> Optional[int]:
+        symbol: Optional[int] = self._heap.pop_unassigned(assignment)
+        if symbol is None:
+            return None
+        return symbol if self._polarity[symbol] >= 0 else -symbol
+
+    def unassigned(self, symbol: int) -> None:
+        self._heap.push(symbol)
+
+    def conflict(self, clause: List[int]) -> None:
+        for literal in clause:
+            symbol: int = abs(literal)
+            self._heap.update(symbol, self._heap.score(symbol) + self._increment)
+        self._increment /= self._decay
+        if self._increment > 1e100:
+            # Scale everything down before the numbers overflow
+            self._increment *= 1e-100
+            self._heap.rescale(1e-100)
+
+
+class DLISHeuristic(BranchingHeuristic):
+    """
+    Dynamic Largest Individual Sum: picks the unassigned literal that appears in the most clauses that aren't
+    True yet. The counts change with every assignment so they are recounted on each choice.
+    """
+    name = 'dlis'
+
+    def choose(self, assignment: Sequence[int]) -> Optional[int]:
+        counts: Dict[int, int] = {}
+        for clause in self._open_clauses(assignment):
+            for literal in clause:
+                counts[literal] = counts.get(literal, 0) + 1
+        if len(counts) == 0:
+            return self._first_unassigned(assignment)
+        return max(counts, key=counts.get)
+
+
+class MOMSHeuristic(BranchingHeuristic):
+    """
+    Maximum Occurrences in clauses of Minimum Size: looks only at the shortest clauses that aren't True yet and
+    picks the symbol that appears in the most of them, preferring symbols that appear with both signs.
+    Recounted on each choice.
+    """
+    name = 'moms'
+
+    def __init__(self, k: int = 1) -> None:
+        super().__init__()
+        self._k: int = k
+
+    def choose(self, assignment: Sequence[int]) -> Optional[int]:
+        open_clauses: List[List[int]] = [clause for clause in self._open_clauses(assignment) if len(clause) > 0]
+        if len(open_clauses) == 0:
+            return self._first_unassigned(assignment)
+        smallest: int = min(len(clause) for clause in open_clauses)
+        counts: Dict[int, int] = {}
+        for clause in open_clauses:
+            if len(clause) == smallest:
+                for literal in clause:
+                    counts[literal] = counts.get(literal, 0) + 1
+        best_literal: Optional[int] = None
+        best_score: int = -1
+        for literal in counts:
+            positives: int = counts.get(abs(literal), 0)
+            negatives: int = counts.get(-abs(literal), 0)
+            score: int = (positives + negatives) * 2 ** self._k + positives * negatives
+            if score > best_score:
+                best_score = score
+                best_literal = abs(literal) if positives >= negatives else -abs(literal)
+        return best_literal
+
+
+_HEURISTICS: Dict[str, type] = {
+    AlphabeticalHeuristic.name: AlphabeticalHeuristic,
+    JeroslowWangHeuristic.name: JeroslowWangHeuristic,
+    'jw': JeroslowWangHeuristic,
+    VSIDSHeuristic.name: VSIDSHeuristic,
+    DLISHeuristic.name: DLISHeuristic,
+    MOMSHeuristic.name: MOMSHeuristic,
+}
+
+
+def get_heuristic(heuristic: Union[str, BranchingHeuristic]) -> BranchingHeuristic:
+    """
+    Turns a heuristic name into a new instance of that heuristic. A BranchingHeuristic instance is returned as is.
+    :param heuristic: One of 'alphabetical', 'jeroslow_wang' (or 'jw'), 'vsids', 'dlis', 'moms', or an instance
+    of a BranchingHeuristic subclass
+    :return: A BranchingHeuristic
+    """
+    if isinstance(heuristic, BranchingHeuristic):
+        return heuristic
+    if isinstance(heuristic, str) and heuristic.lower() in _HEURISTICS:
+        return _HEURISTICS[heuristic.lower()]()
+    raise HeuristicError("Unknown branching heuristic '" + str(heuristic) + "'.")
@@ -1,10 +1,13 @@
 from __future__ import annotations
-from proplogic.parser import LogicParser
-from proplogic.sentence import Sentence, LogicOperatorTypes
-from typing import Optional, List, Union
+from proplogic.parser import LogicParser, parse_cache
+from proplogic.sentence import Sentence, LogicOperatorTypes, Clause
+from typing import Optional, List, Union, Dict, Tuple, FrozenSet, Set, Sequence, TYPE_CHECKING
 from copy import deepcopy
 from proplogic.symbol import LogicSymbol, SymbolList, LogicValue
-import random
+from proplogic.heuristics import BranchingHeuristic, get_heuristic
+from proplogic.dpll import DPLLSolver
+if TYPE_CHECKING:
+    import numpy as np
 
 
 def sentence_or_str(sentence_in: Union[Sentence, str]) -> Sentence:
@@ -36,6 +39,19 @@ def _set_symbol_in_model(symbol: LogicSymbol, symbol_list: SymbolList, a_model:
         return symbol_list, a_model
 
 
+def _next_symbol(symbols: SymbolList, heuristic: Optional[BranchingHeuristic]) -> LogicSymbol:
+    # Removes the next symbol to branch on from symbols and returns it with the value to try first
+    if heuristic is not None:
+        symbol: Optional[LogicSymbol] = heuristic.next_symbol()
+        if symbol is not None and symbols.get_symbol(symbol.name) is not None:
+            symbols.pop(symbol.name)
+            return symbol
+    # No heuristic (or it doesn't know about any of the symbols left) so go alphabetically
+    symbol: LogicSymbol = symbols.get_next_symbol()
+    symbol.value = LogicValue.TRUE
+    return symbol
+
+
 def each_pair(current_clauses: PLKnowledgeBase, new_clauses: PLKnowledgeBase = None) -> (Sentence, Sentence):
     i: int
     j: int
@@ -103,22 +119,12 @@ def _pl_resolve(clause1: Sentence, clause2: Sentence) -> List[Sentence]:
         return False
 
     def create_clause(symbol_list1: List[LogicSymbol], symbol_list2: List[LogicSymbol]):
-        symbol_list: List[LogicSymbol] = []
-        sentence_str: str = ""
-        symbol_list.extend(symbol_list1)
-        symbol_list.extend(symbol_list2)
-        symbol_list = list(set(symbol_list))
+        symbol_list: List[LogicSymbol] = list(set(symbol_list1 + symbol_list2))
         symbol_list.sort()
         for a_symbol in symbol_list:
-            if a_symbol.value == LogicValue.TRUE:
-                sentence_str += a_symbol.name
-            elif a_symbol.value == LogicValue.FALSE:
-                sentence_str += "~" + a_symbol.name
-            else:
+            if a_symbol.value == LogicValue.UNDEFINED:
                 raise KnowledgeBaseError("Called 'create_clause with UNDEFINED logic value.")
-            if a_symbol != symbol_list[len(symbol_list)-1]:
-                sentence_str += " OR "
-        return Sentence(sentence_str)
+        return Clause.from_literals(symbol_list)
 
     # A cnf clause is entirely made up of OR operators and negations
     # So just get a list of all symbols (including duplicates) and their negations and do resolution on those
@@ -156,6 +162,8 @@ class KnowledgeBaseError(Exception):
 
 
 class _KBIterator:
+    __slots__ = ('_clauses', '_index')
+
     def __init__(self, kb: PLKnowledgeBase):
         self._clauses: List[Sentence] = kb.sentences
         self._index: int = 0
@@ -184,8 +192,8 @@ class PLKnowledgeBase:
         kb.is_query_true('A')
 
     """
-    # Static parser -- so that Sentence can parse propositional logic text
-    _parser: LogicParser = LogicParser()
+    __slots__ = ('_sentences', '_count_of_symbols', '_is_cnf', '_version', '_trail', '_checkpoints',
+                 '_checkpoint_count', '_satisfiable', '_index', '_backbone', '_cnf_cache')
 
     def __init__(self) -> None:
         # A propositional logic knowledge base is really just an array of propositional logic sentences
@@ -193,6 +201,21 @@ class PLKnowledgeBase:
         # Used for finding symbol that is a unit clause
         self._count_of_symbols: int = 0
         self._is_cnf: bool = False
+        # Bumped on every change so that anything derived from the sentences can tell if it is out of date
+        self._version: int = 0
+        # Undo trail for checkpoint and rollback. Only recorded while there is at least one checkpoint.
+        self._trail: List[tuple] = []
+        self._checkpoints: Dict[str, int] = {}
+        self._checkpoint_count: int = 0
+        # (version, result) of the last satisfiability check so it isn't repeated until the knowledge base changes
+        self._satisfiable: Optional[Tuple[int, bool]] = None
+        # Symbol to sentence index used to slice queries (see proplogic.slicing). Built the first time it is needed.
+        self._index: Optional[SymbolIndex] = None
+        # (version, entailed literals, is consistent) from the last call to backbone
+        self._backbone: Optional[Tuple[int, FrozenSet[str], bool]] = None
+        # CNF clauses of each sentence, keyed by Sentence.structural_hash, so sentences are only converted once.
+        # Created the first time a CNF conversion is needed and from then on kept up to date by add and retract.
+        self._cnf_cache: Optional[Dict[int, List[Tuple[Sentence, List[Sentence]]]]] = None
 
     def __iter__(self) -> _KBIterator:
         return _KBIterator(self)
@@ -201,6 +224,14 @@ class PLKnowledgeBase:
     def is_cnf(self) -> bool:
         return self._is_cnf
 
+    @property
+    def version(self) -> int:
+        """
+        A number that changes every time a sentence is added, retracted, or rolled back.
+        :return: An integer version number
+        """
+        return self._version
+
     @property
     def sentences(self) -> List[Sentence]:
         return self._sentences
@@ -210,8 +241,24 @@ class PLKnowledgeBase:
         Clears the knowledge base by deleting all of its sentences.
         :return: None
         """
-        self._sentences = []
-        self._is_cnf = False
+        self._replace_sentences([], False)
+
+    def _replace_sentences(self, sentences: List[Sentence], is_cnf: bool) -> None:
+        # Swap out the whole list of sentences (i.e. clear) in a way that can be rolled back
+        self._record(('replace', self._sentences, self._is_cnf))
+        self._sentences = sentences
+        self._is_cnf = is_cnf
+        self._index = None
+        self._cnf_cache = None
+        self._changed()
+
+    def _record(self, entry: tuple) -> None:
+        # Only keep an undo trail if something might want to roll back to a checkpoint
+        if len(self._checkpoints) > 0:
+            self._trail.append(entry)
+
+    def _changed(self) -> None:
+        self._version += 1
 
     def exists(self, sentence: Union[Sentence, str], check_logical_equivalence: bool = False) -> bool:
         """
@@ -235,11 +282,10 @@ class PLKnowledgeBase:
             # Didn't find a match, so doesn't exist
             return False
         elif isinstance(sentence, str):
-            self._parser.set_input(sentence)
-            new_sentence: Sentence = self._parser.parse_line()
-            if self._parser.line_count > 0:
+            sentences: List[Sentence] = parse_cache().parse(sentence)
+            if len(sentences) > 1:
                 raise KnowledgeBaseError("Call to 'exists' only works for a single logical line.")
-            return self.exists(new_sentence, check_logical_equivalence=check_logical_equivalence)
+            return self.exists(sentences[0], check_logical_equivalence=check_logical_equivalence)
         else:
             raise KnowledgeBaseError("Call to 'exists' call requires a Sentence or string.")
 
@@ -266,16 +312,10 @@ class PLKnowledgeBase:
         :return: None
         """
         if isinstance(sentence_or_list, str):
-            PLKnowledgeBase._parser.set_input(sentence_or_list)
-            sentence_list: List[Sentence] = PLKnowledgeBase._parser.parse_input()
+            sentence_list: List[Sentence] = LogicParser(sentence_or_list).parse_input()
             self.add(sentence_list)
         elif isinstance(sentence_or_list, Sentence):
-            if not self.exists(sentence_or_list):
-                self._sentences.append(sentence_or_list)
-            if sentence_or_list.is_valid_cnf():
-                self._is_cnf = True
-            else:
-                self._is_cnf = False
+            self._add_sentence(sentence_or_list, self.exists(sentence_or_list))
         elif isinstance(sentence_or_list, list) and isinstance(sentence_or_list[0], Sentence):
             # A list of Sentences
             for sentence in sentence_or_list:
@@ -284,6 +324,151 @@ class PLKnowledgeBase:
             raise KnowledgeBaseError("Function 'add' called with an incorrect type. Must be a Sentence, str, "
                                      "or List[Sentence]")
 
+    def _add_sentence(self, sentence: Sentence, exists: bool) -> bool:
+        appended: bool = False
+        previous_is_cnf: bool = self._is_cnf
+        if not exists:
+            self._sentences.append(sentence)
+            appended = True
+            if self._index is not None:
+                self._index.add(sentence)
+            if self._cnf_cache is not None:
+                self.sentence_cnf(sentence)
+        if sentence.is_valid_cnf():
+            self._is_cnf = True
+        else:
+            self._is_cnf = False
+        self._record(('add', appended, previous_is_cnf))
+        if appended:
+            self._changed()
+        return appended
+
+    def add_all(self, sentences: List[Sentence]) -> int:
+        """
+        Adds a list of Sentences the same way add does, but checks for sentences that already exist with a set
+        rather than searching the knowledge base for each one, so adding n sentences is O(n) rather than O(n^2).
+        :param sentences: The Sentences to add
+        :return: The number of sentences added
+        """
+        existing: Set[str] = {sentence.to_string(True) for sentence in self._sentences}
+        added: int = 0
+        for sentence in sentences:
+            key: str = sentence.to_string(True)
+            if self._add_sentence(sentence, key in existing):
+                existing.add(key)
+                added += 1
+        return added
+
+    def load_rules(self, text: str, workers: Optional[int] = None) -> int:
+        """
+        Parses a large amount of propositional logic text (i.e. a rule file) and adds it to the knowledge base. With
+        workers the text is split into chunks that are parsed in separate processes (see proplogic.bulk_parser).
+        :param text: The propositional logic text
+        :param workers: Number of processes to parse in. None or 1 parses everything in this process.
+        :return: The number of sentences added
+        """
+        from proplogic.bulk_parser import parse_rules
+        return self.add_all(parse_rules(text, workers=workers))
+
+    def retract(self, sentence: Union[Sentence, str]) -> bool:
+        """
+        Removes a sentence (Sentence or str) from the knowledge base. Like 'exists' it matches sentences by their
+        string representation rather than by logical equivalence.
+        :param sentence: The sentence (Sentence or str) to remove.
+        :return: Returns True if the sentence was found and removed, otherwise False.
+        """
+        key: str = sentence_or_str(sentence).to_string(True)
+        index: int
+        for index in range(len(self._sentences)):
+            if self._sentences[index].to_string(True) == key:
+                removed: Sentence = self._sentences[index]
+                self._record(('retract', index, removed, self._is_cnf))
+                del self._sentences[index]
+                if self._index is not None:
+                    self._index.remove(removed)
+                self._forget_cnf(removed)
+                # Recompute from every remaining sentence, since removing one might have removed the only one not
+                # in CNF format, and the flag might only have reflected the last sentence added
+                self._is_cnf = len(self._sentences) > 0 and all(a_sentence.is_valid_cnf()
+                                                                for a_sentence in self._sentences)
+                self._changed()
+                return True
+        return False
+
+    def checkpoint(self, name: str = None) -> str:
+        """
+        Marks the current state of the knowledge base so that it can later be restored with rollback.
+        Taking a checkpoint is O(1) because from then on the knowledge base keeps an undo trail of its changes
+        rather than making a copy of itself.
+        :param name: An optional name for the checkpoint. It must not already be in use. If not given, a name that
+        isn't in use is made up.
+        :return: The name of the checkpoint.
+        """
+        if name is None:
+            while name is None or name in self._checkpoints:
+                self._checkpoint_count += 1
+                name = "checkpoint" + str(self._checkpoint_count)
+        elif name in self._checkpoints:
+            raise KnowledgeBaseError("Called checkpoint with the name '" + str(name) + "', which is already in use.")
+        self._checkpoints[name] = len(self._trail)
+        return name
+
+    def rollback(self, checkpoint: str) -> None:
+        """
+        Undoes every add, retract, and clear made since the checkpoint was taken. The checkpoint itself is kept,
+        so you can roll back to it again, but any checkpoints taken after it are released.
+        :param checkpoint: The name of the checkpoint to roll back to.
+        :return: None
+        """
+        if checkpoint not in self._checkpoints:
+            raise KnowledgeBaseError("Called rollback with unknown checkpoint '" + str(checkpoint) + "'.")
+        position: int = self._checkpoints[checkpoint]
+        while len(self._trail) > position:
+            entry: tuple = self._trail.pop()
+            if entry[0] == 'add':
+                _, appended, previous_is_cnf = entry
+                if appended:
+                    removed: Sentence = self._sentences.pop()
+                    if self._index is not None:
+                        self._index.remove(removed)
+                    self._forget_cnf(removed)
+                    self._changed()
+                self._is_cnf = previous_is_cnf
+            elif entry[0] == 'retract':
+                _, index, removed, previous_is_cnf = entry
+                self._sentences.insert(index, removed)
+                if self._index is not None:
+                    self._index.add(removed)
+                self._is_cnf = previous_is_cnf
+                self._changed()
+            elif entry[0] == 'replace':
+                _, sentences, previous_is_cnf = entry
+                self._sentences = sentences
+                self._is_cnf = previous_is_cnf
+                self._index = None
+                self._cnf_cache = None
+                self._changed()
+        # Drop any checkpoints that were taken after this one
+        self._checkpoints = {name: mark for name, mark in self._checkpoints.items() if mark <= position}
+
+    def release(self, checkpoint: str) -> None:
+        """
+        Forgets a checkpoint. Once there are no checkpoints left the undo trail is thrown away.
+        :param checkpoint: The name of the checkpoint to release.
+        :return: None
+        """
+        if checkpoint not in self._checkpoints:
+            raise KnowledgeBaseError("Called release with unknown checkpoint '" + str(checkpoint) + "'.")
+        self._checkpoints.pop(checkpoint)
+        if len(self._checkpoints) == 0:
+            self._trail = []
+        else:
+            # Nothing before the earliest remaining checkpoint can be rolled back to anymore
+            earliest: int = min(self._checkpoints.values())
+            if earliest > 0:
+                self._trail = self._trail[earliest:]
+                self._checkpoints = {name: mark - earliest for name, mark in self._checkpoints.items()}
+
     @property
     def line_count(self) -> int:
         """
@@ -313,6 +498,21 @@ class PLKnowledgeBase:
             kb_clone.add(query)
         return kb_clone
 
+    def overlay(self, query: Union[Sentence, str] = None) -> PLKnowledgeBase:
+        """
+        Makes a copy-on-write overlay of this knowledge base (see proplogic.overlay). It can be used anywhere a
+        PLKnowledgeBase can but shares this knowledge base's sentences, symbol index, and CNF cache instead of
+        copying them, and only keeps track of its own changes. This knowledge base must not be changed while the
+        overlay is in use. Use clone for an independent copy.
+        :param query: A Sentence or str with a query to add to the overlay (for convenience)
+        :return: A new KBOverlay
+        """
+        from proplogic.overlay import KBOverlay
+        kb_overlay: PLKnowledgeBase = KBOverlay(self)
+        if query is not None:
+            kb_overlay.add(query)
+        return kb_overlay
+
     def get_symbol_list(self) -> SymbolList:
         """
         Traverses the knowledge base tree and finds each symbol and then returns them all as a SymbolList.
@@ -349,16 +549,31 @@ class PLKnowledgeBase:
         """
         result: LogicValue = LogicValue.TRUE
         for sentence in self._sentences:
-            if sentence.evaluate(model) == LogicValue.FALSE:
+            value: LogicValue = sentence.evaluate(model)
+            if value == LogicValue.FALSE:
                 # If one sentence is false, the whole knowledge base is false
                 return LogicValue.FALSE
-            elif sentence.evaluate(model) == LogicValue.UNDEFINED:
+            elif value == LogicValue.UNDEFINED:
                 # We have at least one Undefined, so the default is now Undefined
                 result = LogicValue.UNDEFINED
         return result
 
-    def _truth_table(self, query: Sentence, symbols: SymbolList, model: SymbolList, use_speedup=False) \
-            -> (int, int):
+    def evaluate_batch(self, models: np.ndarray, symbols: Optional[Sequence[str]] = None) -> np.ndarray:
+        """
+        Evaluates the knowledge base for many models at once with numpy (see proplogic.batch). Gives the same results
+        as calling evaluate for each model.
+        :param models: An (n_models x n_symbols) int8 array of LogicValue codes (1 TRUE, 0 FALSE, -1 UNDEFINED)
+        :param symbols: The symbol name of each column of models. Defaults to the symbols of the knowledge base,
+        sorted alphabetically (the order of get_symbol_list().get_keys()).
+        :return: An int8 array with the LogicValue code for each model
+        """
+        from proplogic.batch import evaluate_batch
+        if symbols is None:
+            symbols = self.get_symbol_list().get_keys()
+        return evaluate_batch(self._sentences, models, symbols)
+
+    def _truth_table(self, query: Sentence, symbols: SymbolList, model: SymbolList, use_speedup=False,
+                     heuristic: BranchingHeuristic = None) -> (int, int):
         # Verify we're in cnf format if using the unit clause speedup, otherwise disable the speedup
         if use_speedup and not self.is_cnf:
             use_speedup = False
@@ -397,25 +612,43 @@ class PLKnowledgeBase:
             if unit_symbol is not None:
                 # Move this symbol from the symbols list (of symbols to try) to the model (symbols with values assigned)
                 symbols, model = _set_symbol_in_model(unit_symbol, symbols, model)
-                return self._truth_table(query, symbols, model, use_speedup=use_speedup)
+                if heuristic is not None:
+                    heuristic.symbol_assigned(unit_symbol.name, unit_symbol.value)
+                counts: (int, int) = self._truth_table(query, symbols, model, use_speedup=use_speedup,
+                                                       heuristic=heuristic)
+                if heuristic is not None:
+                    heuristic.symbol_unassigned(unit_symbol.name)
+                return counts
 
         # Done with pure symbol and unit clause shortcuts for now.
         # Now extend the model with both True and False (similar to truth table entails)
         # You don't yet have a full model - so get next symbol to try out
-        next_symbol: str = symbols.get_next_symbol().name
+        next_symbol: LogicSymbol = _next_symbol(symbols, heuristic)
+        first_value: bool = next_symbol.value == LogicValue.TRUE
         # Extend model as both True and False
-        copy_model1: SymbolList = model.extend_model(next_symbol, True)
-        copy_model2: SymbolList = model.extend_model(next_symbol, False)
+        copy_model1: SymbolList = model.extend_model(next_symbol.name, first_value)
+        copy_model2: SymbolList = model.extend_model(next_symbol.name, not first_value)
         # Try both extended models
-        true_count1, false_count1 = self._truth_table(query, symbols.clone(), copy_model1, use_speedup=use_speedup)
+        if heuristic is not None:
+            heuristic.symbol_assigned(next_symbol.name, first_value)
+        true_count1, false_count1 = self._truth_table(query, symbols.clone(), copy_model1, use_speedup=use_speedup,
+                                                      heuristic=heuristic)
         if true_count1 > 0 and false_count1 > 0:
-            return 1, 1
-        true_count2, false_count2 = self._truth_table(query, symbols.clone(), copy_model2, use_speedup=use_speedup)
-        if true_count2 > 0 and false_count2 > 0:
+            true_count2, false_count2 = 0, 0
+        else:
+            if heuristic is not None:
+                heuristic.symbol_assigned(next_symbol.name, not first_value)
+            true_count2, false_count2 = self._truth_table(query, symbols.clone(), copy_model2,
+                                                          use_speedup=use_speedup, heuristic=heuristic)
+        if heuristic is not None:
+            heuristic.symbol_unassigned(next_symbol.name)
+        if (true_count1 > 0 and false_count1 > 0) or (true_count2 > 0 and false_count2 > 0):
             return 1, 1
         return true_count1 + true_count2, false_count1 + false_count2
 
-    def truth_table_entails(self, query: Union[Sentence, str], use_speedup=False) -> LogicValue:
+    def truth_table_entails(self, query: Union[Sentence, str], use_speedup=False,
+                            heuristic: Union[str, BranchingHeuristic] = None, gray_code: bool = False,
+                            workers: Optional[int] = None) -> LogicValue:
         """
         An implementation of the Truth Table entails algorithm. Given a query sentence, returns if the knowledge base
         entails that sentence as True, False, or Undefined.
@@ -423,6 +656,14 @@ class PLKnowledgeBase:
         This algorithm includes some dpll speedups if the knowledge base is in CNF format, and you ask for it.
         :param query: A Sentence or str that contains the query to the database.
         :param use_speedup: Defaults to False. Set to True if you want to use unit clause heuristic if already in CNF.
+        :param heuristic: Optional branching heuristic (a name or BranchingHeuristic, see proplogic.heuristics) used
+        to pick the order symbols are tried in. Defaults to alphabetical order.
+        :param gray_code: Set to True to go through every model in Gray code order instead, re-evaluating only the
+        sentences that contain the one symbol that changes from each model to the next (see proplogic.truth_table).
+        This doesn't prune partial models, so it suits knowledge bases that aren't in CNF and have few symbols.
+        use_speedup and heuristic are ignored.
+        :param workers: Number of processes to split the truth table across. More than 1 uses the Gray code mode in
+        each process, each with a different combination of values for the first few symbols.
         :return: A LogicValue
         """
         query_sentence: Sentence = sentence_or_str(query)
@@ -431,7 +672,13 @@ class PLKnowledgeBase:
         symbols.add(query_sentence.get_symbol_list())
         model: SymbolList = symbols.clone()
         # Get true and false counts
-        true_count, false_count = self._truth_table(query_sentence, symbols, model, use_speedup=use_speedup)
+        if gray_code or (workers is not None and workers > 1):
+            from proplogic.truth_table import parallel_gray_code_counts
+            true_count, false_count = parallel_gray_code_counts(list(self._sentences), query_sentence,
+                                                                symbols.get_keys(), model, workers=workers)
+        else:
+            true_count, false_count = self._truth_table(query_sentence, symbols, model, use_speedup=use_speedup,
+                                                        heuristic=self._make_heuristic(heuristic))
         # Do final evaluation
         if true_count > 0 and false_count == 0:
             # All True Knowledge Bases evaluate this query as True
@@ -443,12 +690,69 @@ class PLKnowledgeBase:
             # It is a weird mix, so we don't know
             return LogicValue.UNDEFINED
 
+    def backbone(self) -> FrozenSet[str]:
+        """
+        Finds every literal entailed by the knowledge base, i.e. the symbols that have the same value in every model.
+        Uses a single DPLLSolver: after finding one model, each literal of the model is a candidate and is checked
+        with one solve that assumes its negation. Any model found along the way rules out every candidate it
+        disagrees with, so usually far fewer than one solve per symbol is needed.
+
+        The result is remembered until the knowledge base changes. While it is, entails, is_query_true,
+        is_query_false, and is_query_undefined answer queries that are a single literal by looking them up.
+        :return: A frozenset of literals such as 'A' and '~B'. If the knowledge base is inconsistent it entails
+        everything, so every literal and its negation is included.
+        """
+        if self._backbone is not None and self._backbone[0] == self._version:
+            return self._backbone[1]
+        from proplogic.cnf import kb_to_clauses
+        symbol_names, clauses = kb_to_clauses(self)
+        solver: DPLLSolver = DPLLSolver(clauses, symbol_names)
+        literals: List[int] = []
+        consistent: bool = solver.solve()
+        if not consistent:
+            literals = [symbol for symbol in range(1, len(symbol_names) + 1)]
+            literals += [-literal for literal in literals]
+        else:
+            # Symbols left out of the model can be either value, so they are never in the backbone
+            candidates: Dict[int, bool] = solver.model()
+            while len(candidates) > 0:
+                symbol, value = candidates.popitem()
+                literal: int = symbol if value else -symbol
+                if not solver.solve([-literal]):
+                    literals.append(literal)
+                else:
+                    # Model based filtering: drop every candidate this model disagrees with
+                    model: Dict[int, bool] = solver.model()
+                    candidates = {symbol: value for symbol, value in candidates.items()
+                                  if model.get(symbol) == value}
+        result: FrozenSet[str] = frozenset(symbol_names[literal - 1] if literal > 0 else
+                                           '~' + symbol_names[-literal - 1] for literal in literals)
+        self._backbone = (self._version, result, consistent)
+        return result
+
+    def _backbone_lookup(self, query: Union[Sentence, str], truth_table: bool, negate: bool = False) -> Optional[bool]:
+        # If the backbone is up to date and the query is a single literal, returns whether it (or its negation if
+        # negate is set) is entailed, otherwise None. The truth table finds nothing entailed by an inconsistent
+        # knowledge base, unlike DPLL.
+        if self._backbone is None or self._backbone[0] != self._version:
+            return None
+        query_sentence: Sentence = sentence_or_str(query)
+        if not query_sentence.is_atomic or query_sentence.symbol is None:
+            return None
+        if not self._backbone[2]:
+            # Inconsistent: the backbone only lists this knowledge base's own symbols, but DPLL entails any literal
+            return not truth_table
+        return ('~' if query_sentence.negation != negate else '') + query_sentence.symbol in self._backbone[1]
+
     def is_query_true(self, query: Union[Sentence, str]) -> bool:
         """
         Returns True if the query is entailed by the knowledge base.
         :param query: The sentence you are asking if it is entailed in the form of a Sentence or str.
         :return: A boolean value.
         """
+        entailed: Optional[bool] = self._backbone_lookup(query, not self.is_cnf)
+        if entailed is not None:
+            return entailed
         if self.is_cnf:
             return self.dpll_entails(query)
         else:
@@ -460,6 +764,9 @@ class PLKnowledgeBase:
         :param query: The sentence you are asking if it is False in the form of a Sentence or str.
         :return: A boolean value.
         """
+        entailed: Optional[bool] = self._backbone_lookup(query, not self.is_cnf, negate=True)
+        if entailed is not None:
+            return entailed
         if self.is_cnf:
             sentence: Sentence() = sentence_or_str(query)
             sentence.negate_sentence()
@@ -475,6 +782,13 @@ class PLKnowledgeBase:
         uses a Truth Table instead. This matters because DPLL needs to run twice to find out if something is UNDEFINED.
         :return: A boolean value.
         """
+        query = sentence_or_str(query)
+        is_true: Optional[bool] = self._backbone_lookup(query, not (use_dpll and self.is_cnf))
+        if is_true is not None:
+            if not self._backbone[2]:
+                # Inconsistent: DPLL finds everything True and False while the truth table finds it UNDEFINED
+                return not (use_dpll and self.is_cnf)
+            return not is_true and not self._backbone_lookup(query, False, negate=True)
         if use_dpll and self.is_cnf:
             is_true: bool = self.is_query_true(query)
             is_false: bool = self.is_query_false(query)
@@ -494,19 +808,74 @@ class PLKnowledgeBase:
         with the DPLL algorithms.
         :return: Returns a PLKnowledgeBase
         """
-        sentence_list: List[Sentence] = deepcopy(self._sentences)
-        converted_list: List[Sentence] = []
-        for sentence in sentence_list:
-            converted_list.extend(sentence.convert_to_cnf(or_clauses_only=True))
         new_kb: PLKnowledgeBase = PLKnowledgeBase()
-        new_kb.add(converted_list)
+        # Copy the cached clauses so changes to the new knowledge base don't leak into the cache
+        new_kb._sentences = deepcopy(self._cnf_sentences())
         new_kb._is_cnf = True
-        # Set each sentence in the knowledge base to is_cnf = True also
-        for sentence in new_kb.sentences:
-            sentence._is_cnf = True
         return new_kb
 
-    def _dpll(self, symbols: SymbolList, model: SymbolList) -> bool:
+    def sentence_cnf(self, sentence: Sentence) -> List[Sentence]:
+        """
+        Returns the CNF clauses of one sentence (as from sentence.convert_to_cnf(or_clauses_only=True)). Conversions
+        are cached by the structure of the sentence, so converting a sentence already seen is just a lookup.
+        The clauses returned are shared with the cache so must not be changed.
+        :param sentence: The Sentence to convert
+        :return: A list of Sentences, each one a CNF clause
+        """
+        key: int = sentence.structural_hash()
+        clauses: Optional[List[Sentence]] = self._find_cnf(sentence, key)
+        if clauses is not None:
+            return clauses
+        clauses = sentence.convert_to_cnf(or_clauses_only=True)
+        for clause in clauses:
+            clause._is_cnf = True
+        if self._cnf_cache is None:
+            self._cnf_cache = {}
+        self._cnf_cache.setdefault(key, []).append((sentence, clauses))
+        return clauses
+
+    def _find_cnf(self, sentence: Sentence, key: int) -> Optional[List[Sentence]]:
+        # Looks up the cached CNF clauses of a sentence given its structural hash (key). None if not cached.
+        if self._cnf_cache is not None:
+            for original, clauses in self._cnf_cache.get(key, []):
+                if original.is_structurally_equal(sentence):
+                    return clauses
+        return None
+
+    def _forget_cnf(self, sentence: Sentence) -> None:
+        # Drop a sentence that is no longer in the knowledge base from the CNF cache
+        if self._cnf_cache is None:
+            return
+        key: int = sentence.structural_hash()
+        entries: List[Tuple[Sentence, List[Sentence]]] = self._cnf_cache.get(key, [])
+        self._cnf_cache[key] = [entry for entry in entries if not entry[0].is_structurally_equal(sentence)]
+        if len(self._cnf_cache[key]) == 0:
+            del self._cnf_cache[key]
+
+    def _cnf_sentences(self, extra_clauses: List[Sentence] = ()) -> List[Sentence]:
+        # Every CNF clause of the knowledge base (from the cache) followed by extra_clauses, without duplicates
+        all_clauses: List[Sentence] = [clause for sentence in self._sentences for clause in self.sentence_cnf(sentence)]
+        all_clauses.extend(extra_clauses)
+        clauses: List[Sentence] = []
+        seen: set = set()
+        for clause in all_clauses:
+            key: str = clause.to_string(True)
+            if key not in seen:
+                seen.add(key)
+                clauses.append(clause)
+        return clauses
+
+    def _make_heuristic(self, heuristic: Union[str, BranchingHeuristic, None]) -> Optional[BranchingHeuristic]:
+        # Set up a branching heuristic for a search over this knowledge base
+        if heuristic is None:
+            return None
+        from proplogic.cnf import kb_to_clauses
+        branching: BranchingHeuristic = get_heuristic(heuristic)
+        symbol_names, clauses = kb_to_clauses(self)
+        branching.initialize(clauses, symbol_names)
+        return branching
+
+    def _dpll(self, symbols: SymbolList, model: SymbolList, heuristic: BranchingHeuristic = None) -> bool:
         # This function evaluates the query against the knowledge base, but does so with the DPLL algorithm
         # instead of a full brute truth table - thus it's faster
         # The query passed must be the entire knowledge base plus the query in CNF form
@@ -522,30 +891,48 @@ class PLKnowledgeBase:
             return True
         # If some clause in clauses is False in model then return False
         if self.is_false(model):
+            if heuristic is not None:
+                # Tell the heuristic which clause failed
+                for sentence in self._sentences:
+                    if sentence.is_false(model):
+                        heuristic.conflict(heuristic.literals_of(sentence.get_atomic_symbols()))
+                        break
             return False
         # Otherwise, we are still "Undefined" and so we need to keep recursively building the model
         # Strategy 3: Handle unit clauses - This is equivalent to forward chaining
-        unit_symbol: LogicSymbol = self.find_unit_clause(model)
-        if unit_symbol is not None:
-            # Move this symbol from the symbols list (of symbols to try) to the model (symbols with values assigned)
-            symbols, model = _set_symbol_in_model(unit_symbol, symbols, model)
-            return self._dpll(symbols, model)
         # Strategy 2: Handle pure symbols
-        pure_symbol: LogicSymbol = self.find_pure_symbol(symbols, model)
-        if pure_symbol is not None:
+        forced_symbol: LogicSymbol = self.find_unit_clause(model)
+        if forced_symbol is None:
+            forced_symbol = self.find_pure_symbol(symbols, model)
+        if forced_symbol is not None:
             # Move this symbol from the symbols list (of symbols to try) to the model (symbols with values assigned)
-            symbols, model = _set_symbol_in_model(pure_symbol, symbols, model)
-            return self._dpll(symbols, model)
+            symbols, model = _set_symbol_in_model(forced_symbol, symbols, model)
+            if heuristic is not None:
+                heuristic.symbol_assigned(forced_symbol.name, forced_symbol.value)
+            result: bool = self._dpll(symbols, model, heuristic=heuristic)
+            if heuristic is not None:
+                heuristic.symbol_unassigned(forced_symbol.name)
+            return result
 
         # Done with pure symbol and unit clause shortcuts for now.
         # Now extend the model with both True and False (similar to truth table entails)
         # You don't yet have a full model - so get next symbol to try out
-        next_symbol: str = symbols.get_next_symbol().name
+        next_symbol: LogicSymbol = _next_symbol(symbols, heuristic)
+        first_value: bool = next_symbol.value == LogicValue.TRUE
         # Extend model as both True and False
-        copy_model1: SymbolList = model.extend_model(next_symbol, True)
-        copy_model2: SymbolList = model.extend_model(next_symbol, False)
+        copy_model1: SymbolList = model.extend_model(next_symbol.name, first_value)
+        copy_model2: SymbolList = model.extend_model(next_symbol.name, not first_value)
         # Try both extended models
-        return self._dpll(symbols.clone(), copy_model1) or self._dpll(symbols.clone(), copy_model2)
+        if heuristic is not None:
+            heuristic.symbol_assigned(next_symbol.name, first_value)
+        result: bool = self._dpll(symbols.clone(), copy_model1, heuristic=heuristic)
+        if not result:
+            if heuristic is not None:
+                heuristic.symbol_assigned(next_symbol.name, not first_value)
+            result = self._dpll(symbols.clone(), copy_model2, heuristic=heuristic)
+        if heuristic is not None:
+            heuristic.symbol_unassigned(next_symbol.name)
+        return result
 
     def _put_in_cnf_format(self, query: Union[Sentence, str]) -> PLKnowledgeBase:
         # This function does the work for both dpll_entails and pl_resolution to make sure
@@ -557,29 +944,139 @@ class PLKnowledgeBase:
         query_sentence: Sentence = sentence_or_str(query)
         # Negate query before adding to the knowledge base
         query_sentence.negate_sentence()
-        # Check for CNF format
+        # Only the query needs converting. The knowledge base's own clauses come from the CNF cache and are shared
+        # with the new knowledge base rather than copied, which is safe because they are never changed.
+        query_list: List[Sentence] = query_sentence.convert_to_cnf(or_clauses_only=True)
+        cnf_clauses: PLKnowledgeBase
         if self.is_cnf:
-            kb_clone: PLKnowledgeBase = self.clone()
-            # Make sure query is in CNF format
-            query_list: List[Sentence] = query_sentence.convert_to_cnf(or_clauses_only=True)
-            kb_clone.add(query_list)
-            return kb_clone
+            cnf_clauses = self.overlay()
+            cnf_clauses.add(query_list)
         else:
-            cnf_clauses: PLKnowledgeBase = self.clone()
-            cnf_clauses.add(query_sentence)
-            cnf_clauses = cnf_clauses.convert_to_cnf()
-            return cnf_clauses
+            for clause in query_list:
+                clause._is_cnf = True
+            cnf_clauses = PLKnowledgeBase()
+            cnf_clauses._sentences = self._cnf_sentences(query_list)
+        cnf_clauses._is_cnf = True
+        return cnf_clauses
+
+    def _query_clauses(self, query: Union[Sentence, str]) -> (List[str], List[List[int]], int):
+        # Integer clauses (see proplogic.cnf) for this knowledge base plus the negated query. 'a' entails 'b'
+        # if 'a AND ~b' is unsatisfiable. Also returns how many of the clauses came from the knowledge base, the
+        # rest are the query clauses.
+        from proplogic.cnf import kb_to_clauses, clause_to_literals
+        symbol_names, clauses = kb_to_clauses(self)
+        kb_clause_count: int = len(clauses)
+        symbol_ids: Dict[str, int] = {name: i + 1 for i, name in enumerate(symbol_names)}
+        negated_query: Sentence = Sentence(sentence_or_str(query), negated=True)
+        for clause in negated_query.convert_to_cnf(or_clauses_only=True):
+            clauses.append(clause_to_literals(clause, symbol_ids, symbol_names))
+        return symbol_names, clauses, kb_clause_count
+
+    def decompose(self) -> List[PLKnowledgeBase]:
+        """
+        Splits the knowledge base into independent knowledge bases that share no symbols (see proplogic.components).
+        :return: A list of PLKnowledgeBases in CNF format. Together they are equivalent to this knowledge base.
+        """
+        from proplogic.components import decompose_knowledge_base
+        return decompose_knowledge_base(self)
 
-    def dpll_entails(self, query: Union[Sentence, str]) -> bool:
+    def is_satisfiable(self, heuristic: Union[str, BranchingHeuristic] = None, workers: Optional[int] = None) -> bool:
+        """
+        Returns True if there is a model that makes every sentence True. Each independent part of the knowledge base
+        is solved separately. The result is remembered until the knowledge base changes.
+        :param heuristic: Optional branching heuristic name or BranchingHeuristic (see dpll_entails).
+        :param workers: Number of processes to solve the independent parts in. None or 1 means no extra processes.
+        :return: A boolean value.
+        """
+        if self._satisfiable is not None and self._satisfiable[0] == self._version:
+            return self._satisfiable[1]
+        from proplogic.cnf import kb_to_clauses
+        from proplogic.components import find_components, solve_components
+        symbol_names, clauses = kb_to_clauses(self)
+        satisfiable: bool = solve_components(find_components(clauses), symbol_names, heuristic=heuristic,
+                                             workers=workers) is not None
+        self._satisfiable = (self._version, satisfiable)
+        return satisfiable
+
+    def count_models(self, workers: Optional[int] = None) -> int:
+        """
+        Counts the models of the knowledge base, i.e. the number of ways to assign True or False to every symbol
+        so that every sentence is True. Each independent part of the knowledge base is counted separately and the
+        counts are multiplied.
+        :param workers: Number of processes to count the independent parts in. None or 1 means no extra processes.
+        :return: The number of models.
+        """
+        from proplogic.cnf import kb_to_clauses
+        from proplogic.components import count_models
+        symbol_names, clauses = kb_to_clauses(self)
+        return count_models(clauses, len(symbol_names), workers=workers)
+
+    def _decomposed_entails(self, symbol_names: List[str], clauses: List[List[int]], kb_clause_count: int,
+                            heuristic: Union[str, BranchingHeuristic, None], workers: Optional[int]) -> bool:
+        # Only the components the query clauses ended up in need solving to find out if the query is entailed.
+        # The rest only matter if the knowledge base is inconsistent (it then entails everything) and that
+        # answer is remembered by is_satisfiable.
+        from proplogic.components import Component, find_components, solve_components
+        components: List[Component] = find_components(clauses)
+        query_components: List[Component] = [component for component in components
+                                             if component.clause_indexes[-1] >= kb_clause_count]
+        if solve_components(query_components, symbol_names, heuristic=heuristic, workers=workers) is None:
+            return True
+        if self._satisfiable is not None and self._satisfiable[0] == self._version:
+            return not self._satisfiable[1]
+        # The knowledge base part of the query components was satisfiable so only the rest need checking
+        other_components: List[Component] = [component for component in components
+                                             if component.clause_indexes[-1] < kb_clause_count]
+        satisfiable: bool = solve_components(other_components, symbol_names, heuristic=heuristic,
+                                             workers=workers) is not None
+        self._satisfiable = (self._version, satisfiable)
+        return not satisfiable
+
+    def dpll_entails(self, query: Union[Sentence, str], preprocess: bool = False,
+                     heuristic: Union[str, BranchingHeuristic] = None, recursive: bool = False,
+                     decompose: bool = False, workers: Optional[int] = None, cubes: bool = False) -> bool:
         """
         Returns True if the query is entailed by the knowledge base. Uses the DPLL algorithm. Must be in CNF format.
         :param query: The sentence you are asking if it is entailed in the form of a Sentence or str.
+        :param preprocess: Set to True to simplify the clauses (see proplogic.preprocess) before searching.
+        :param heuristic: Optional branching heuristic, either a name ('alphabetical', 'jeroslow_wang', 'vsids',
+        'dlis', 'moms') or a BranchingHeuristic (see proplogic.heuristics). Defaults to alphabetical order.
+        :param recursive: Set to True to use the original recursive DPLL (_dpll) instead of the iterative DPLLSolver.
+        The recursive version can't handle knowledge bases with more symbols than Python's recursion limit.
+        :param decompose: Set to True to split the clauses into independent components (see proplogic.components)
+        and only search the ones the query touches.
+        :param workers: With decompose, the number of processes to solve components in, and with cubes the number of
+        processes to solve cubes in. Defaults to no extra processes.
+        :param cubes: Set to True to split the search into cubes with a lookahead splitter and solve them in parallel
+        (see proplogic.cubes). The search stops as soon as any cube has a model that refutes the query.
         :return: A boolean value.
         """
-        cnf_kb: PLKnowledgeBase = self._put_in_cnf_format(query)
-        symbols: SymbolList = cnf_kb.get_symbol_list()
-        model: SymbolList = symbols.clone()
-        return not cnf_kb._dpll(symbols, model)
+        if recursive:
+            cnf_kb: PLKnowledgeBase = self._put_in_cnf_format(query)
+            if preprocess:
+                from proplogic.preprocess import preprocess_knowledge_base
+                cnf_kb, preprocessor = preprocess_knowledge_base(cnf_kb)
+                if preprocessor.is_unsatisfiable:
+                    return True
+            symbols: SymbolList = cnf_kb.get_symbol_list()
+            model: SymbolList = symbols.clone()
+            return not cnf_kb._dpll(symbols, model, heuristic=cnf_kb._make_heuristic(heuristic))
+
+        symbol_names, clauses, kb_clause_count = self._query_clauses(query)
+        if decompose and not preprocess:
+            return self._decomposed_entails(symbol_names, clauses, kb_clause_count, heuristic, workers)
+        if preprocess:
+            from proplogic.preprocess import CNFPreprocessor
+            preprocessor: CNFPreprocessor = CNFPreprocessor(clauses)
+            clauses = preprocessor.run()
+            if preprocessor.is_unsatisfiable:
+                return True
+        if cubes:
+            from proplogic.cubes import cube_and_conquer
+            return cube_and_conquer(clauses, symbol_names, workers=workers, heuristic=heuristic) is None
+        solver: DPLLSolver = DPLLSolver(clauses, symbol_names,
+                                        heuristic=None if heuristic is None else get_heuristic(heuristic))
+        return not solver.solve()
 
     def satisfied_sentence_count(self, model: SymbolList):
         """
@@ -594,18 +1091,30 @@ class PLKnowledgeBase:
                 count += 1
         return count
 
-    def walk_sat(self, p: float = 0.5, max_flips: int = 210, seed: Optional[int] = None) -> bool:
+    def walk_sat(self, p: float = 0.5, max_flips: int = 210, seed: Optional[int] = None,
+                 preprocess: bool = False) -> bool:
         """
         Returns True if the query in the knowledge base can be satisfied. Uses the WalkSAT algorithm, which is random.
         Does not need to be in CNF format.
         :param p: The probability of choosing to do a 'random walk' instead of flipping to max satisfiable statements.
         :param max_flips: Number of flips to try before giving up.
         :param seed: An optional random seed so that the outcome can be repeated (for unit testing)
+        :param preprocess: Set to True to convert to CNF and simplify the clauses (see proplogic.preprocess) first.
         :return: A boolean value. True if knowledge base can be satisfied. False if it can't, or we ran out of time.
         """
+        # Only WalkSAT needs random, so leave it out of the import of this module
+        import random
         if seed is not None:
             random.seed(seed)
-        kb_clone: PLKnowledgeBase = self.clone()
+        kb_clone: PLKnowledgeBase
+        if preprocess:
+            from proplogic.preprocess import preprocess_knowledge_base
+            kb_clone, preprocessor = preprocess_knowledge_base(self)
+            if preprocessor.is_unsatisfiable:
+                return False
+        else:
+            # Nothing below changes the knowledge base, so there is no need to copy it
+            kb_clone = self
         # Initialize model to random values
         model: SymbolList = kb_clone.get_symbol_list()
         symbol: str
@@ -661,9 +1170,10 @@ class PLKnowledgeBase:
         :return: A boolean value. True if the algorithm thinks the query can be entailed by the knowledge base.
         However, since this is a local search random algorithm, there are no guarantees.
         """
+        import random
         if seed is not None:
             random.seed(seed)
-        kb_clone: PLKnowledgeBase = self.clone()
+        kb_clone: PLKnowledgeBase = self.overlay()
         # Make sure in right format
         query_sentence: Sentence = sentence_or_str(query)
         # Negate query before adding to the knowledge base
@@ -671,12 +1181,51 @@ class PLKnowledgeBase:
         kb_clone.add(query_sentence)
         return not kb_clone.walk_sat()
 
-    def entails(self, query: Union[Sentence, str]) -> bool:
+    def symbol_index(self) -> SymbolIndex:
+        """
+        The index from symbol to the sentences containing it (see proplogic.slicing). Built on first use and then
+        kept up to date by add, retract, and rollback.
+        :return: A SymbolIndex
+        """
+        if self._index is None:
+            from proplogic.slicing import SymbolIndex
+            self._index = SymbolIndex(self._sentences)
+        return self._index
+
+    def cone_of_influence(self, query: Union[Sentence, str]) -> PLKnowledgeBase:
+        """
+        Returns a knowledge base of only the sentences connected to the query through shared symbols. The rest of
+        the knowledge base shares no symbols with the query so can't change whether it is entailed (unless the rest
+        is inconsistent).
+        :param query: A Sentence or str with the query.
+        :return: A new PLKnowledgeBase that shares the sentences of this one.
+        """
+        from proplogic.slicing import slice_knowledge_base
+        return slice_knowledge_base(self, self.symbol_index(), sentence_or_str(query))
+
+    def entails(self, query: Union[Sentence, str], slice_query: bool = True) -> bool:
         """
         Returns True if the query is entailed by the knowledge base.
         :param query: The sentence you are asking if it is entailed in the form of a Sentence or str.
+        :param slice_query: Defaults to True to only search the sentences in the cone of influence of the query
+        (see cone_of_influence). The rest of the knowledge base is only looked at if the answer depends on whether it
+        is consistent, and that check is remembered until the knowledge base changes.
         :return: A boolean value. True if this query is entailed by the knowledge base.
         """
+        entailed: Optional[bool] = self._backbone_lookup(query, not self.is_cnf)
+        if entailed is not None:
+            return entailed
+        if slice_query:
+            query = sentence_or_str(query)
+            sliced_kb: PLKnowledgeBase = self.cone_of_influence(query)
+            if sliced_kb.line_count < self.line_count:
+                entailed: bool = sliced_kb.entails(query, slice_query=False)
+                if self.is_cnf:
+                    # An inconsistent knowledge base entails everything
+                    return entailed or not self.is_satisfiable()
+                # The truth table only counts models of the whole knowledge base, and there are none if the
+                # rest of it is inconsistent
+                return entailed and self.is_satisfiable()
         if self.is_cnf:
             return self.dpll_entails(query)
         else:
@@ -700,63 +1249,47 @@ class PLKnowledgeBase:
 
         def _search_for_unit_symbol(clause: Sentence, a_model: SymbolList) -> (LogicSymbol, int):
             # Pass in a sentence and, if possible, it returns a unit clause symbol.
-            # Recursively look through this sentence for one and only one symbol name
-            # that has no assignment in the model.
+            # Look left to right through this sentence (with a stack rather than recursion) for one and only one
+            # symbol name that has no assignment in the model.
             # Assumption: we are in CNF format
-            # Return values consist of a potential unit symbol and a count so far
-            if clause is None:
-                return None, 0
-
+            # Return values consist of a potential unit symbol (the one found by the last literal) and a count
             total_count: int = 0
-            possible_unit: Optional[LogicSymbol]
-            if clause.is_atomic:
-                # This is just a lone symbol
-                value: LogicValue = a_model.get_value(clause.symbol)
-                if value == LogicValue.UNDEFINED:
-                    # This one has no value assigned yet, so it is a potential unit clause
-                    possible_unit = LogicSymbol(clause.symbol)
-                    # Set value to positive if no negation and negative otherwise
-                    possible_unit.value = not clause.negation
-                    return possible_unit, 1
-                else:  # if value is TRUE or FALSE
-                    # The other condition for a unit clause is that all other literals in the clause are False
-                    literal_value: bool = (value == LogicValue.TRUE)
-                    # If the clause is negated, then treat a True as a False and vice versa
-                    if clause.negation:
-                        literal_value = not literal_value
-                    if literal_value:
-                        # literal_value is True, so this can't be a unit clause
-                        return None, -1
-                    else:
+            possible_unit: Optional[LogicSymbol] = None
+            stack: List[Sentence] = [clause]
+            while len(stack) > 0:
+                sub_clause: Sentence = stack.pop()
+                if sub_clause is None:
+                    possible_unit = None
+                elif sub_clause.is_atomic:
+                    # This is just a lone symbol
+                    value: LogicValue = a_model.get_value(sub_clause.symbol)
+                    if value == LogicValue.UNDEFINED:
+                        # This one has no value assigned yet, so it is a potential unit clause
+                        possible_unit = LogicSymbol(sub_clause.symbol)
+                        # Set value to positive if no negation and negative otherwise
+                        possible_unit.value = not sub_clause.negation
+                        total_count += 1
+                        if total_count > 1:
+                            # Abort search because this symbol isn't a single unit clause
+                            return None, -1
+                    else:  # if value is TRUE or FALSE
+                        # The other condition for a unit clause is that all other literals in the clause are False
+                        literal_value: bool = (value == LogicValue.TRUE)
+                        # If the clause is negated, then treat a True as a False and vice versa
+                        if sub_clause.negation:
+                            literal_value = not literal_value
+                        if literal_value:
+                            # literal_value is True, so this can't be a unit clause
+                            return None, -1
                         # This literal value is false, so continue processing.
-                        return None, 0
-            elif clause.logic_operator == LogicOperatorTypes.OR:
-                # This is not a lone symbol, so recurse
-                # Search first sentence
-                count: int
-                possible_unit, count = _search_for_unit_symbol(clause.first_sentence, a_model)
-                if count == -1:
-                    # Abort search
-                    return None, -1
-                else:
-                    total_count += count
-                if total_count > 1:
-                    # Abort search because this symbol isn't a single unit clause
-                    return None, -1
-                possible_unit, count = _search_for_unit_symbol(clause.second_sentence, a_model)
-                if count == -1:
-                    # Abort search
-                    return None, -1
+                        possible_unit = None
+                elif sub_clause.logic_operator == LogicOperatorTypes.OR:
+                    # This is not a lone symbol, so search each of the sentences under it
+                    stack.extend(reversed(sub_clause.operands))
                 else:
-                    total_count += count
-                if total_count > 1:
-                    # Abort search because this symbol isn't a single unit clause
-                    return None, -1
-                # Continue search
-                return possible_unit, total_count
-            else:
-                # There should be only OR clauses and unit clauses in each clause if in CNF format
-                raise KnowledgeBaseError("find_unit_clause was called for a sentence not in CNF format")
+                    # There should be only OR clauses and unit clauses in each clause if in CNF format
+                    raise KnowledgeBaseError("find_unit_clause was called for a sentence not in CNF format")
+            return possible_unit, total_count
 
         # This function searches the sentence and, given the model, determines if this sentence is a unit clause
         # A unit clause is defined as either a sentence made up of a single symbol (negated or not)
@@ -779,37 +1312,28 @@ class PLKnowledgeBase:
         :return: A LogicValue where if TRUE or FALSE is a pure symbol and UNDEFINED if not.
         """
         def assess_symbol(a_sentence: Sentence, a_search_symbol: str) -> (int, int):
-            # Recursively look through this sentence for symbol_name and return True if there
-            # are no negated versions of the symbol in this sentence.
+            # Look through this sentence (with a stack rather than recursion) for symbol_name and count how many
+            # times it appears without and with a negation.
             positive_count: int = 0
             negative_count: int = 0
-            if a_sentence.logic_operator == LogicOperatorTypes.OR:
-                # Search first sentence
-                positives, negatives = assess_symbol(a_sentence.first_sentence, a_search_symbol)
-                positive_count += positives
-                negative_count += negatives
-                if positive_count > 0 and negative_count > 0:
-                    return 1, 1
-                # Search second sentence
-                positives, negatives = assess_symbol(a_sentence.second_sentence, a_search_symbol)
-                positive_count += positives
-                negative_count += negatives
-                if positive_count > 0 and negative_count > 0:
-                    return 1, 1
-                return positive_count, negative_count
-            elif a_sentence.is_atomic:
-                if a_sentence.symbol == a_search_symbol and not a_sentence.negation:
-                    # We found the symbol without a negation
-                    return 1, 0
-                elif a_sentence.symbol == a_search_symbol and a_sentence.negation:
-                    # We found the symbol with a negation
-                    return 0, 1
+            stack: List[Sentence] = [a_sentence]
+            while len(stack) > 0:
+                sub_sentence: Sentence = stack.pop()
+                if sub_sentence.logic_operator == LogicOperatorTypes.OR:
+                    stack.extend(reversed(sub_sentence.operands))
+                elif sub_sentence.is_atomic:
+                    if sub_sentence.symbol == a_search_symbol and not sub_sentence.negation:
+                        # We found the symbol without a negation
+                        positive_count += 1
+                    elif sub_sentence.symbol == a_search_symbol and sub_sentence.negation:
+                        # We found the symbol with a negation
+                        negative_count += 1
+                    if positive_count > 0 and negative_count > 0:
+                        return 1, 1
                 else:
-                    # Not finding our symbol counts as pure
-                    return 0, 0
-            else:
-                # There should be only OR clauses and unit clauses in each clause if in CNF format
-                raise KnowledgeBaseError("is_pure_symbol was called for a sentence not in CNF format")
+                    # There should be only OR clauses and unit clauses in each clause if in CNF format
+                    raise KnowledgeBaseError("is_pure_symbol was called for a sentence not in CNF format")
+            return positive_count, negative_count
 
         total_pos: int = 0
         total_neg: int = 0
@@ -864,8 +1388,7 @@ class PLKnowledgeBase:
         :return: Returns if the database is satisfiable or not (as if you called sat_resolution).
         """
         if force_cnf_format:
-            self._sentences = self.convert_to_cnf()._sentences
-            self._is_cnf = True
+            self._replace_sentences(self.convert_to_cnf()._sentences, True)
         if not self.is_cnf:
             raise KnowledgeBaseError("Called cache_resolvents when not in CNF format.")
         return do_resolution(self)
@@ -883,8 +1406,8 @@ class PLKnowledgeBase:
             result: bool = do_resolution(query_kb)
             if result:
                 return True
-            # Make a clone
-            clone_kb = self.clone()
+            # Resolution adds clauses, so work on an overlay rather than the knowledge base itself
+            clone_kb: PLKnowledgeBase = self.overlay()
             return do_resolution(clone_kb, query_kb)
         else:
             clauses: PLKnowledgeBase = self._put_in_cnf_format(query)
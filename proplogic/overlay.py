@@ -0,0 +1,154 @@
+from __future__ import annotations
+from typing import List, Optional, Sequence, Union
+from collections.abc import MutableSequence
+import proplogic.knowledge_base as kb
+from proplogic.sentence import Sentence
+
+# Copy-on-write knowledge base overlays
+#
+# Most queries only need the knowledge base plus a few extra sentences (usually the negated query). Rather than deep
+# copying the whole knowledge base to add them, a KBOverlay shares the base knowledge base's sentence list, symbol
+# index, and CNF cache and keeps only its own additions. The shared list is only copied (and then just the list of
+# references, not the sentences) if the overlay changes or removes one of the base knowledge base's sentences.
+
+
+class _OverlaySentences(MutableSequence):
+    # The sentence list of a KBOverlay: the first base_length sentences of the base list followed by the overlay's
+    # own additions.
+    def __init__(self, base: Sequence[Sentence]) -> None:
+        self._base: Sequence[Sentence] = base
+        self._base_length: int = len(base)
+        self._added: List[Sentence] = []
+        self._shared: bool = True
+
+    @property
+    def shared(self) -> bool:
+        """
+        :return: True while the base list is still shared rather than copied
+        """
+        return self._shared
+
+    @property
+    def added(self) -> List[Sentence]:
+        """
+        :return: The sentences added on top of the base list
+        """
+        return self._added
+
+    def _copy_base(self) -> None:
+        # Copy on write: take a private copy of the base list before changing any of it
+        if self._shared:
+            self._base = [self._base[i] for i in range(self._base_length)] + self._added
+            self._base_length = len(self._base)
+            self._added = []
+            self._shared = False
+
+    def __len__(self) -> int:
+        return self._base_length + len(self._added)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Sentence, List[Sentence]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("Sentence index out of range.")
+        if index < self._base_length:
+            return self._base[index]
+        return self._added[index - self._base_length]
+
+    def __setitem__(self, index: int, sentence: Sentence) -> None:
+        if index < 0:
+            index += len(self)
+        if index >= self._base_length:
+            self._added[index - self._base_length] = sentence
+        else:
+            self._copy_base()
+            self._base[index] = sentence
+
+    def __delitem__(self, index: int) -> None:
+        if index < 0:
+            index += len(self)
+        if index >= self._base_length:
+            del self._added[index - self._base_length]
+        else:
+            self._copy_base()
+            del self._base[index]
+            self._base_length -= 1
+
+    def insert(self, index: int, sentence: Sentence) -> None:
+        if index < 0:
+            index = max(0, index + len(self))
+        if index >= self._base_length:
+            self._added.insert(index - self._base_length, sentence)
+        else:
+            self._copy_base()
+            self._base.insert(index, sentence)
+            self._base_length += 1
+
+
+class KBOverlay(kb.PLKnowledgeBase):
+    """
+    A copy-on-write view of a PLKnowledgeBase that can be used anywhere a PLKnowledgeBase can. It starts out with
+    the same sentences as the base knowledge base without copying them. Changes only affect the overlay.
+
+    The base knowledge base must not be changed while the overlay is in use.
+
+    Usage
+    _____
+    query_kb = kb.overlay()
+    query_kb.add("~Q")
+    """
+    __slots__ = ('_base',)
+
+    def __init__(self, base: kb.PLKnowledgeBase) -> None:
+        super().__init__()
+        self._base: kb.PLKnowledgeBase = base
+        self._sentences = _OverlaySentences(base.sentences)
+        self._is_cnf = base.is_cnf
+
+    @property
+    def base(self) -> kb.PLKnowledgeBase:
+        return self._base
+
+    @property
+    def added(self) -> List[Sentence]:
+        """
+        :return: The sentences added to the overlay (empty once the overlay has had to copy the base sentences)
+        """
+        if isinstance(self._sentences, _OverlaySentences):
+            return self._sentences.added
+        return []
+
+    def _shares_base(self) -> bool:
+        return isinstance(self._sentences, _OverlaySentences) and self._sentences.shared
+
+    def symbol_index(self) -> SymbolIndex:
+        if self._index is None:
+            from proplogic.slicing import SymbolIndex
+            if self._shares_base():
+                # Layer the additions on the base knowledge base's index
+                self._index = SymbolIndex(self._sentences.added, base=self._base.symbol_index())
+            else:
+                self._index = SymbolIndex(self._sentences)
+        return self._index
+
+    def retract(self, sentence: Union[Sentence, str]) -> bool:
+        layered: bool = self._shares_base()
+        retracted: bool = super().retract(sentence)
+        if layered and not self._shares_base():
+            # A base sentence was removed, which the layered index can't express, so rebuild it when next needed
+            self._index = None
+        return retracted
+
+    def rollback(self, checkpoint: str) -> None:
+        layered: bool = self._shares_base()
+        super().rollback(checkpoint)
+        if layered and not self._shares_base():
+            self._index = None
+
+    def _find_cnf(self, sentence: Sentence, key: int) -> Optional[List[Sentence]]:
+        clauses: Optional[List[Sentence]] = super()._find_cnf(sentence, key)
+        if clauses is None:
+            clauses = self._base._find_cnf(sentence, key)
+        return clauses
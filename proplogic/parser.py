@@ -1,7 +1,8 @@
 from __future__ import annotations
-from pyparsing import alphas, alphanums, Word, ZeroOrMore, Forward, OneOrMore, Group, exceptions, oneOf, Literal
 from enum import Enum
-from typing import Optional, List
+from typing import Optional, List, Tuple, Dict
+from collections import OrderedDict
+from threading import Lock
 from proplogic.sentence import Sentence, LogicOperatorTypes
 
 # Original Grammar for the Propositional Logic Parser (I've changed it a bit since)
@@ -15,6 +16,14 @@ from proplogic.sentence import Sentence, LogicOperatorTypes
 # MoreAndOperators -> AND Term | ""
 # Term -> ~Term | (LogicalSentence) | Symbol
 # Symbol -> <any string consisting of one letter and then any combination of letters and numbers>
+#
+# Line breaks are just whitespace: a line ends where the next token can't continue the sentence, so a sentence can
+# wrap over several lines of text and "A B" is two lines.
+#
+# LogicParser tokenizes the input in a single pass and then finds where each line ends in a second pass over the
+# tokens. Tokens are kept in flat lists with a cursor, so consuming a token is O(1). PyParsingLogicParser is the
+# original pyparsing based tokenizer, kept as a reference. Both produce the same tokens for the same (valid) input,
+# except that pyparsing will also split an operator off the front of a word ("A ORB" is "A OR B").
 
 
 class ParseError(Exception):
@@ -39,6 +48,14 @@ class TokenType(Enum):
     ENDLINE = 10
 
 
+_WHITESPACE: str = " \t\r\n"
+_SYMBOL_START: frozenset = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+_SYMBOL_CHARS: frozenset = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789")
+_KEYWORDS: Dict[str, TokenType] = {"AND": TokenType.AND, "OR": TokenType.OR}
+_PUNCTUATION: Dict[str, TokenType] = {"~": TokenType.NOT, "(": TokenType.LPAREN, ")": TokenType.RPAREN,
+                                      "=>": TokenType.IMPLIES, "<=>": TokenType.BICONDITIONAL}
+
+
 class LogicParser:
     """
     The LogicParser class is used to convert input strings in the for of propositional logic into a list of
@@ -53,26 +70,21 @@ class LogicParser:
     or
 
     result_list: List[Sentence] = parser.parse_input()
+
+    Invalid input raises a ParseError whose message starts with "Incorrect syntax. Details: ", the same as
+    PyParsingLogicParser. Only the exception type and that prefix are kept: the details say what this parser expected
+    at the first token it couldn't accept, which can differ from pyparsing's message for the same input (pyparsing
+    backtracks and often reports "Expected end of text" or a description of its grammar instead).
     """
     def __init__(self, input_str: str = None) -> None:
-        self._tokens = None
-        self._token_list: List = []
-        self._current_line: List = []
-        self._current_token: Optional[str] = None
+        # Every token of the input in order, with an "END LINE" token after each line
+        self._tokens: List[str] = []
+        self._token_types: List[TokenType] = []
+        # Index of the next token to consume
+        self._position: int = 0
+        # Number of lines not yet finished (i.e. END LINE tokens not yet consumed)
+        self._lines_left: int = 0
         self._sentences: List[Sentence] = []
-
-        not_sign = Literal('~')
-        symbol = Word(alphas.upper(), alphanums.upper())
-        logical_sentence = Forward()
-        term = Forward()
-        term << (not_sign + term | "(" + logical_sentence + ")" | symbol)
-        or_and_operator = oneOf(["AND", "OR"])
-        or_and_phrase = term + ZeroOrMore(or_and_operator + term)
-        logical_sentence << (or_and_phrase + "=>" + or_and_phrase
-                             | or_and_phrase + "<=>" + or_and_phrase
-                             | or_and_phrase)
-        line = logical_sentence + "\n" | logical_sentence
-        self.lines = OneOrMore(Group(line))
         if input_str is not None:
             self.set_input(input_str)
 
@@ -83,16 +95,104 @@ class LogicParser:
         :param input_str: The input string to be converted into a list of Sentence(s)
         :return: None
         """
-        input_str = input_str.upper()
-        self._tokens = None
-        try:
-            self._tokens = self.lines.parse_string(input_str, parse_all=True)
-        except exceptions.ParseException as err:
-            raise ParseError("Incorrect syntax. Details: " + err.msg)
-        self._token_list: List = self._tokens.asList()
-        self._current_line: List = self._token_list[0]
-        self._current_token: str = self._current_line[0]
-        self._sentences: List[Sentence] = []
+        tokens, token_types = LogicParser._tokenize(input_str.upper())
+        self._set_tokens(*LogicParser._split_lines(tokens, token_types))
+
+    def _set_tokens(self, tokens: List[str], token_types: List[TokenType]) -> None:
+        self._tokens = tokens
+        self._token_types = token_types
+        self._position = 0
+        self._lines_left = token_types.count(TokenType.ENDLINE)
+        self._sentences = []
+
+    @staticmethod
+    def _tokenize(input_str: str) -> Tuple[List[str], List[TokenType]]:
+        # Single pass over the characters of the (already upper case) input
+        tokens: List[str] = []
+        token_types: List[TokenType] = []
+        length: int = len(input_str)
+        index: int = 0
+        while index < length:
+            char: str = input_str[index]
+            if char in _WHITESPACE:
+                index += 1
+                continue
+            if char in _SYMBOL_START:
+                start: int = index
+                index += 1
+                while index < length and input_str[index] in _SYMBOL_CHARS:
+                    index += 1
+                word: str = input_str[start:index]
+                tokens.append(word)
+                token_types.append(_KEYWORDS.get(word, TokenType.SYMBOL))
+                continue
+            if char == "=" and input_str.startswith("=>", index):
+                token: str = "=>"
+            elif char == "<" and input_str.startswith("<=>", index):
+                token = "<=>"
+            elif char in "~()":
+                token = char
+            else:
+                raise ParseError("Incorrect syntax. Details: Unexpected character " + repr(char) + " at position "
+                                 + str(index))
+            tokens.append(token)
+            token_types.append(_PUNCTUATION[token])
+            index += len(token)
+        return tokens, token_types
+
+    @staticmethod
+    def _split_lines(tokens: List[str], token_types: List[TokenType]) -> Tuple[List[str], List[TokenType]]:
+        # Checks the syntax without building anything and adds an END LINE token where each line ends. A line ends
+        # after a complete sentence when the next token can't continue it. Works without recursion so deeply
+        # nested parentheses are fine. Error details describe the first token that doesn't fit, so they don't
+        # always match pyparsing's wording (see the class docstring).
+        if len(tokens) == 0:
+            raise ParseError("Incorrect syntax. Details: Expected a symbol, '~' or '('")
+        lines: List[str] = []
+        line_types: List[TokenType] = []
+        # For each open parenthesis (and the line itself): has an => or <=> been seen at that level yet?
+        implication_seen: List[bool] = [False]
+        expect_term: bool = True
+        for token, token_type in zip(tokens, token_types):
+            if expect_term:
+                if token_type == TokenType.LPAREN:
+                    implication_seen.append(False)
+                elif token_type == TokenType.SYMBOL:
+                    expect_term = False
+                elif token_type != TokenType.NOT:
+                    raise ParseError("Incorrect syntax. Details: Expected a symbol, '~' or '(' but found "
+                                     + repr(token))
+            elif token_type == TokenType.AND or token_type == TokenType.OR:
+                expect_term = True
+            elif token_type == TokenType.IMPLIES or token_type == TokenType.BICONDITIONAL:
+                if implication_seen[-1]:
+                    raise ParseError("Incorrect syntax. Details: "
+                                     + ("Expected ')'" if len(implication_seen) > 1 else "Expected end of text"))
+                implication_seen[-1] = True
+                expect_term = True
+            elif len(implication_seen) > 1:
+                if token_type != TokenType.RPAREN:
+                    raise ParseError("Incorrect syntax. Details: Expected ')'")
+                implication_seen.pop()
+            elif token_type == TokenType.RPAREN:
+                raise ParseError("Incorrect syntax. Details: Expected end of text")
+            else:
+                # The sentence is complete and this token starts the next line
+                lines.append("END LINE")
+                line_types.append(TokenType.ENDLINE)
+                implication_seen[-1] = False
+                if token_type == TokenType.LPAREN:
+                    implication_seen.append(False)
+                expect_term = token_type != TokenType.SYMBOL
+            lines.append(token)
+            line_types.append(token_type)
+        if expect_term:
+            raise ParseError("Incorrect syntax. Details: Expected a symbol, '~' or '('")
+        if len(implication_seen) > 1:
+            raise ParseError("Incorrect syntax. Details: Expected ')'")
+        lines.append("END LINE")
+        line_types.append(TokenType.ENDLINE)
+        return lines, line_types
 
     @staticmethod
     def _str_to_token_type(str_token: str) -> TokenType:
@@ -147,7 +247,9 @@ class LogicParser:
         This method allows you to pass in a string that the parser can then parse.
         :return: A TokenType of the current token
         """
-        return self._str_to_token_type(self.current_token)
+        if self._position < len(self._token_types):
+            return self._token_types[self._position]
+        return TokenType.EOF
 
     @property
     def current_token(self) -> str:
@@ -155,16 +257,9 @@ class LogicParser:
         Gets the current token that will be parsed next.
         :return: A string that contains the next token.
         """
-        if len(self._token_list) > 0 or len(self._current_line) > 0:
-            self._current_line = self._token_list[0]
-            if len(self._current_line) > 0:
-                self._current_token = self._current_line[0]
-            else:
-                self._current_token = "END LINE"
-        else:
-            self._current_token = "EOF"
-
-        return self._current_token
+        if self._position < len(self._tokens):
+            return self._tokens[self._position]
+        return "EOF"
 
     @property
     def line_count(self) -> int:
@@ -172,16 +267,19 @@ class LogicParser:
         Gets the count of lines of text to be parsed
         :return: An integer that is a count of lines.
         """
-        return len(self._token_list)
+        return self._lines_left
 
     def token_look_head(self, look_ahead: int) -> Optional[TokenType]:
         """
         Returns the token look_ahead number of tokens out.
         :return: A TokenType of the token found
         """
-        if len(self._token_list[0]) <= look_ahead:
-            return None
-        return self._str_to_token_type(self._current_line[look_ahead])
+        index: int = self._position
+        while index < len(self._token_types) and self._token_types[index] != TokenType.ENDLINE:
+            if index == self._position + look_ahead:
+                return self._token_types[index]
+            index += 1
+        return None
 
     def consume_token(self, check: TokenType = None) -> str:
         """
@@ -192,26 +290,32 @@ class LogicParser:
         you just consume the next token. If the expected type if not matched, an ParseError is raised.
         :return: A string containing the next token
         """
-        # Note:
-        if len(self._token_list) == 0:
-            if check is not None and check != TokenType.EOF:
-                raise ParseError("Expected EOF")
-            return "EOF"
-        self._current_line = self._token_list[0]
-        if len(self._current_line) == 0 and len(self._token_list) == 0:
+        if self._position >= len(self._tokens):
             if check is not None and check != TokenType.EOF:
                 raise ParseError("Expected EOF")
             return "EOF"
-        elif len(self._current_line) == 0:
-            if check is not None and check != TokenType.ENDLINE:
+        token_type: TokenType = self._token_types[self._position]
+        if check is not None and token_type != check:
+            if token_type == TokenType.ENDLINE:
                 raise ParseError("Expected END LINE")
-            self._token_list.pop(0)
-            return "END LINE"
-        else:
-            current_token: str = self._current_line.pop(0)
-            if check is not None and LogicParser._str_to_token_type(current_token) != check:
-                raise ParseError("Expected " + LogicParser._token_type_to_str(check))
-            return current_token
+            raise ParseError("Expected " + LogicParser._token_type_to_str(check))
+        token: str = self._tokens[self._position]
+        self._position += 1
+        if token_type == TokenType.ENDLINE:
+            self._lines_left -= 1
+        return token
+
+    @staticmethod
+    def _group_lines(tokens: List[str]) -> list:
+        lines: list = [[]]
+        for token in tokens:
+            if token == "END LINE":
+                lines.append([])
+            else:
+                lines[-1].append(token)
+        # The last END LINE starts a line that isn't there
+        lines.pop()
+        return lines
 
     @property
     def token_list(self) -> list:
@@ -219,14 +323,14 @@ class LogicParser:
         A property that returns the current list of tokens.
         :return: A list containing the unprocessed tokens.
         """
-        return self._token_list
+        return LogicParser._group_lines(self._tokens[self._position:])
 
     def get_original_token_list(self) -> list:
         """
         Same as token_list property except it gives what the original list looked like.
         :return: A list containing the unprocessed tokens.
         """
-        return self._tokens.asList()
+        return LogicParser._group_lines(self._tokens)
 
     def is_end_of_file(self) -> bool:
         """
@@ -264,69 +368,241 @@ class LogicParser:
         return line
 
     def _logical_sentence(self) -> Sentence:
-        or_and_phrase: Sentence = self._or_and_phrase()
-        if self.current_token_type == TokenType.IMPLIES:
-            self.consume_token(TokenType.IMPLIES)
-            sentence: Sentence = Sentence(or_and_phrase, LogicOperatorTypes.IMPLIES, self._or_and_phrase())
-            return sentence
-        elif self.current_token_type == TokenType.BICONDITIONAL:
-            self.consume_token(TokenType.BICONDITIONAL)
-            sentence: Sentence = Sentence(or_and_phrase, LogicOperatorTypes.BI_CONDITIONAL, self._or_and_phrase())
-            return sentence
-        else:
-            return or_and_phrase
-
-    def _or_and_phrase(self) -> Optional[Sentence]:
-        sentence1: Optional[Sentence] = None
-        # First try to process an and phrase
-        if self.current_token_type != TokenType.OR:
-            sentence1: Sentence = self._and_phrase()
-
-        # After processing an "and phrase", try to process an "or phrase"
-        if sentence1 is not None and self.current_token_type == TokenType.OR:
-            self.consume_token(TokenType.OR)
-            sentence: Sentence = Sentence(sentence1, LogicOperatorTypes.OR, self._or_and_phrase())
-            return sentence
-        else:
-            return sentence1
-
-    def _and_phrase(self) -> Sentence:
-        term1: Sentence = self._term()
-        if self.current_token_type == TokenType.AND:
-            self.consume_token(TokenType.AND)
-            sentence: Sentence = Sentence(term1, LogicOperatorTypes.AND, self._and_phrase())
-            return sentence
-        else:
-            return term1
-
-    def _term(self) -> Sentence:
-        sentence: Sentence
-        negate_sentence: bool = False
-
-        # Deal with a not symbol
-        if self.current_token_type == TokenType.NOT:
-            self.consume_token(TokenType.NOT)
-            negate_sentence = True
-            logical_sentence = self._term()
-            if negate_sentence and logical_sentence.negation:
+        # Parse with an explicit stack of the parenthetical sentences that are still open, rather than recursing into
+        # each one, so that deeply nested sentences can't overflow the stack
+        open_sentences: List[_OpenSentence] = []
+        current: _OpenSentence = _OpenSentence(0)
+        while True:
+            # A term: any number of nots, then a parenthetical sentence or a symbol
+            negations: int = 0
+            while self.current_token_type == TokenType.NOT:
+                self.consume_token(TokenType.NOT)
+                negations += 1
+            if self.current_token_type == TokenType.LPAREN:
+                self.consume_token(TokenType.LPAREN)
+                open_sentences.append(current)
+                current = _OpenSentence(negations)
+                continue
+            term: Sentence = LogicParser._negate(Sentence(self.consume_token(TokenType.SYMBOL)), negations)
+            # After a term, either carry on with the current sentence or finish it (and any parentheses it closes)
+            while True:
+                current.terms.append(term)
+                token_type: TokenType = self.current_token_type
+                if token_type == TokenType.AND:
+                    self.consume_token(TokenType.AND)
+                    break
+                elif token_type == TokenType.OR:
+                    self.consume_token(TokenType.OR)
+                    current.end_and_phrase()
+                    break
+                elif current.logic_operator is None \
+                        and (token_type == TokenType.IMPLIES or token_type == TokenType.BICONDITIONAL):
+                    self.consume_token(token_type)
+                    current.left = current.or_and_phrase()
+                    current.logic_operator = LogicOperatorTypes.IMPLIES if token_type == TokenType.IMPLIES \
+                        else LogicOperatorTypes.BI_CONDITIONAL
+                    break
+                sentence: Sentence = current.finish()
+                if len(open_sentences) == 0:
+                    return sentence
+                self.consume_token(TokenType.RPAREN)
+                term = LogicParser._negate(sentence, current.negations)
+                current = open_sentences.pop()
+
+    @staticmethod
+    def _nest_right(sentences: List[Sentence], logic_operator: LogicOperatorTypes) -> Sentence:
+        # A chain of the same operator becomes one n-ary node, which stands for the right nested binary chain
+        if len(sentences) == 1:
+            return sentences[0]
+        return Sentence._nary(logic_operator, sentences)
+
+    @staticmethod
+    def _negate(sentence: Sentence, negations: int) -> Sentence:
+        # Apply the nots in front of a term, innermost first
+        for _ in range(negations):
+            if sentence.negation:
                 # Double negation, so make this sentence a level above
-                sentence = Sentence()
-                sentence.first_sentence = logical_sentence
+                outer: Sentence = Sentence()
+                outer.first_sentence = sentence
+                sentence = outer
+            sentence.negation = True
+        return sentence
+
+
+class _OpenSentence:
+    # A logical sentence the parser is part way through: the whole line or the inside of a pair of parentheses
+    __slots__ = ('negations', 'left', 'logic_operator', 'and_phrases', 'terms')
+
+    def __init__(self, negations: int) -> None:
+        # The number of nots in front of the parentheses
+        self.negations: int = negations
+        # The left side and operator of an implies or bi-conditional, once one is found
+        self.left: Optional[Sentence] = None
+        self.logic_operator: Optional[LogicOperatorTypes] = None
+        self.and_phrases: List[Sentence] = []
+        self.terms: List[Sentence] = []
+
+    def end_and_phrase(self) -> None:
+        self.and_phrases.append(LogicParser._nest_right(self.terms, LogicOperatorTypes.AND))
+        self.terms = []
+
+    def or_and_phrase(self) -> Sentence:
+        self.end_and_phrase()
+        phrase: Sentence = LogicParser._nest_right(self.and_phrases, LogicOperatorTypes.OR)
+        self.and_phrases = []
+        return phrase
+
+    def finish(self) -> Sentence:
+        phrase: Sentence = self.or_and_phrase()
+        if self.logic_operator is None:
+            return phrase
+        return Sentence(self.left, self.logic_operator, phrase)
+
+
+class PyParsingLogicParser(LogicParser):
+    """
+    The original LogicParser, which tokenizes the input with a pyparsing grammar. Kept as a reference to check
+    LogicParser against. Sentences are built the same way as LogicParser once the input is tokenized.
+    """
+    def __init__(self, input_str: str = None) -> None:
+        from pyparsing import alphas, alphanums, Word, ZeroOrMore, Forward, OneOrMore, Group, one_of, Literal
+        not_sign = Literal('~')
+        symbol = Word(alphas.upper(), alphanums.upper())
+        logical_sentence = Forward()
+        term = Forward()
+        term << (not_sign + term | "(" + logical_sentence + ")" | symbol)
+        or_and_operator = one_of(["AND", "OR"])
+        or_and_phrase = term + ZeroOrMore(or_and_operator + term)
+        logical_sentence << (or_and_phrase + "=>" + or_and_phrase
+                             | or_and_phrase + "<=>" + or_and_phrase
+                             | or_and_phrase)
+        line = logical_sentence + "\n" | logical_sentence
+        self.lines = OneOrMore(Group(line))
+        super().__init__(input_str)
+
+    def set_input(self, input_str: str) -> None:
+        """
+        This method allows you to pass in a string that the parser can then parse.
+
+        :param input_str: The input string to be converted into a list of Sentence(s)
+        :return: None
+        """
+        from pyparsing import exceptions
+        input_str = input_str.upper()
+        try:
+            token_lines: list = self.lines.parse_string(input_str, parse_all=True).as_list()
+        except exceptions.ParseException as err:
+            raise ParseError("Incorrect syntax. Details: " + err.msg)
+        tokens: List[str] = []
+        token_types: List[TokenType] = []
+        for token_line in token_lines:
+            for token in token_line:
+                tokens.append(token)
+                token_types.append(LogicParser._str_to_token_type(token))
+            tokens.append("END LINE")
+            token_types.append(TokenType.ENDLINE)
+        self._set_tokens(tokens, token_types)
+
+
+class ParseCache:
+    """
+    A bounded, thread safe, least recently used cache of parsed text. Text is normalized first (upper case, runs of
+    whitespace collapsed to one space) so "a and b" and "A  AND\nB" share an entry. The cached Sentences are never
+    handed out. Each lookup returns fresh clones so callers are free to change what they get back.
+
+    Usage
+    _____
+    sentences: List[Sentence] = parse_cache().parse("A AND B\nC")
+    """
+    __slots__ = ('_entries', '_lock', '_max_size', '_max_length', '_hits', '_misses')
+
+    def __init__(self, max_size: int = 1024, max_length: int = 4096) -> None:
+        """
+        :param max_size: The most entries to keep before the least recently used entry is dropped
+        :param max_length: Text longer than this (after normalizing) is parsed but not cached, so that loading a
+        large rule file doesn't push out the queries
+        """
+        self._entries: OrderedDict[str, Tuple[Sentence, ...]] = OrderedDict()
+        self._lock: Lock = Lock()
+        self._max_size: int = max_size
+        self._max_length: int = max_length
+        self._hits: int = 0
+        self._misses: int = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        :return: The fraction of lookups that were found in the cache (0.0 if there have been no lookups)
+        """
+        lookups: int = self._hits + self._misses
+        return 0.0 if lookups == 0 else self._hits / lookups
+
+    @staticmethod
+    def normalize(input_str: str) -> str:
+        """
+        :param input_str: Propositional logic text
+        :return: The key the text is cached under
+        """
+        return " ".join(input_str.upper().split())
+
+    def parse(self, input_str: str) -> List[Sentence]:
+        """
+        Parses text into Sentences (one per line, as LogicParser.parse_input does), using the cache if the same text
+        was parsed before.
+        :param input_str: The propositional logic text to parse
+        :return: A list of newly cloned Sentences
+        """
+        key: str = ParseCache.normalize(input_str)
+        with self._lock:
+            sentences: Optional[Tuple[Sentence, ...]] = self._entries.get(key)
+            if sentences is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
             else:
-                sentence = logical_sentence
-        # Is this a parenthetical sentence?
-        elif self.current_token_type == TokenType.LPAREN:
-            # This is a parenthetical sentence
-            self.consume_token(TokenType.LPAREN)
-            sentence = self._logical_sentence()
-            self.consume_token(TokenType.RPAREN)
-        else:
-            # This must be a symbol
-            symbol: str = self.consume_token(TokenType.SYMBOL)
-            sentence = Sentence(symbol)
+                self._misses += 1
+        if sentences is None:
+            # Parse outside the lock. Two threads may parse the same text at once, which is harmless.
+            sentences = tuple(LogicParser(key).parse_input())
+            if len(key) <= self._max_length:
+                with self._lock:
+                    self._entries[key] = sentences
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self._max_size:
+                        self._entries.popitem(last=False)
+        return [sentence.clone() for sentence in sentences]
+
+    def clear(self) -> None:
+        """
+        Empties the cache and resets the hit and miss counts.
+        :return: None
+        """
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
 
-        # Deal with the negation if there was one
-        if negate_sentence:
-            sentence.negation = True
 
-        return sentence
+# The process wide parse cache used by parse_sentence, Sentence(str), and PLKnowledgeBase
+_parse_cache: ParseCache = ParseCache()
+
+
+def parse_cache() -> ParseCache:
+    """
+    :return: The process wide ParseCache
+    """
+    return _parse_cache
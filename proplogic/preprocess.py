@@ -0,0 +1,325 @@
+from __future__ import annotations
+from typing import List, Dict, Set, Optional, Tuple, Iterable
+import time
+import proplogic.knowledge_base as kb
+from proplogic.cnf import kb_to_clauses, literals_to_sentence
+
+# CNF preprocessing
+#
+# These passes simplify a set of integer clauses (see proplogic.cnf) before any search is done. Every pass keeps
+# the clauses satisfiable if and only if the original clauses were satisfiable. Passes that remove a symbol
+# (fixing its value or eliminating it) push an entry onto a reconstruction stack so that a model of the simplified
+# clauses can be turned back into a model of the original clauses.
+
+
+class PassStatistics:
+    """
+    Statistics for a single preprocessing pass, added up over every time the pass was run.
+    """
+    def __init__(self, name: str) -> None:
+        self.name: str = name
+        self.runs: int = 0
+        self.clauses_removed: int = 0
+        self.literals_removed: int = 0
+        self.symbols_fixed: int = 0
+        self.symbols_eliminated: int = 0
+        self.seconds: float = 0.0
+
+    def __repr__(self) -> str:
+        return self.name + ": runs=" + str(self.runs) + ", clauses removed=" + str(self.clauses_removed) + \
+            ", literals removed=" + str(self.literals_removed) + ", symbols fixed=" + str(self.symbols_fixed) + \
+            ", symbols eliminated=" + str(self.symbols_eliminated) + ", seconds=" + format(self.seconds, '.4f')
+
+
+class CNFPreprocessor:
+    """
+    Simplifies integer CNF clauses with unit propagation, pure literal elimination, subsumption, self-subsuming
+    resolution, and bounded variable elimination.
+
+    Usage
+    _____
+    preprocessor = CNFPreprocessor([[1, 2], [-1], [2, 3]])
+
+    simplified: List[List[int]] = preprocessor.run()
+
+    full_model: Dict[int, bool] = preprocessor.extend_model(model_of_simplified)
+    """
+    PASSES: Tuple[str, ...] = ('unit_propagation', 'pure_literals', 'subsumption', 'self_subsumption',
+                               'variable_elimination')
+
+    def __init__(self, clauses: Iterable[List[int]], max_occurrences: int = 16, max_growth: int = 0) -> None:
+        """
+        :param clauses: The integer clauses to simplify. The clauses passed in are not changed.
+        :param max_occurrences: Bounded variable elimination skips any symbol that appears in more clauses than this.
+        :param max_growth: Bounded variable elimination only eliminates a symbol if this doesn't add more than
+        max_growth clauses.
+        """
+        self._clauses: List[Optional[List[int]]] = []
+        self._occurrences: Dict[int, Set[int]] = {}
+        self._symbols: Set[int] = set()
+        self._units: List[int] = []
+        self._stack: List[tuple] = []
+        self._unsatisfiable: bool = False
+        self._max_occurrences: int = max_occurrences
+        self._max_growth: int = max_growth
+        self.statistics: Dict[str, PassStatistics] = {name: PassStatistics(name) for name in self.PASSES}
+        for clause in clauses:
+            self._symbols.update(abs(literal) for literal in clause)
+            self._add_clause(clause)
+
+    @property
+    def is_unsatisfiable(self) -> bool:
+        """
+        :return: True if preprocessing proved the clauses can't be satisfied.
+        """
+        return self._unsatisfiable
+
+    @property
+    def clauses(self) -> List[List[int]]:
+        """
+        :return: The current (simplified) clauses. If the clauses were found unsatisfiable this is just the empty
+        clause.
+        """
+        if self._unsatisfiable:
+            return [[]]
+        return [list(clause) for clause in self._clauses if clause is not None]
+
+    def _add_clause(self, clause: Iterable[int]) -> None:
+        literals: List[int] = []
+        for literal in clause:
+            if -literal in literals:
+                # Tautologies are always True, so just drop them
+                return
+            if literal not in literals:
+                literals.append(literal)
+        if len(literals) == 0:
+            self._unsatisfiable = True
+            return
+        index: int = len(self._clauses)
+        self._clauses.append(literals)
+        for literal in literals:
+            self._occurrences.setdefault(literal, set()).add(index)
+        if len(literals) == 1:
+            self._units.append(index)
+
+    def _remove_clause(self, index: int) -> None:
+        for literal in self._clauses[index]:
+            self._occurrences[literal].discard(index)
+        self._clauses[index] = None
+
+    def _remove_literal(self, index: int, literal: int) -> None:
+        clause: List[int] = self._clauses[index]
+        clause.remove(literal)
+        self._occurrences[literal].discard(index)
+        if len(clause) == 0:
+            self._unsatisfiable = True
+        elif len(clause) == 1:
+            self._units.append(index)
+
+    def _occurrence_list(self, literal: int) -> Set[int]:
+        return self._occurrences.get(literal, set())
+
+    def _assign(self, literal: int) -> None:
+        # Fix literal to True: clauses containing it are satisfied, and its negation can be removed everywhere
+        self._stack.append(('assign', literal))
+        for index in list(self._occurrence_list(literal)):
+            self._remove_clause(index)
+        for index in list(self._occurrence_list(-literal)):
+            self._remove_literal(index, -literal)
+
+    def _size(self) -> Tuple[int, int]:
+        clauses: List[List[int]] = [clause for clause in self._clauses if clause is not None]
+        return len(clauses), sum(len(clause) for clause in clauses)
+
+    def run(self, passes: Iterable[str] = None, max_rounds: int = 5) -> List[List[int]]:
+        """
+        Runs the preprocessing passes, in order, over and over until nothing changes (or max_rounds is reached).
+        :param passes: The names of the passes to run (see CNFPreprocessor.PASSES). Defaults to all of them.
+        :param max_rounds: The maximum number of times to run through all the passes.
+        :return: The simplified clauses (same as the clauses property)
+        """
+        pass_names: List[str] = list(self.PASSES if passes is None else passes)
+        for name in pass_names:
+            if name not in self.PASSES:
+                raise kb.KnowledgeBaseError("Unknown preprocessing pass '" + name + "'.")
+        for _ in range(max_rounds):
+            changed: bool = False
+            for name in pass_names:
+                if self._unsatisfiable:
+                    return self.clauses
+                changed = self._run_pass(name) or changed
+            if not changed:
+                break
+        return self.clauses
+
+    def _run_pass(self, name: str) -> bool:
+        statistics: PassStatistics = self.statistics[name]
+        clauses_before, literals_before = self._size()
+        stack_before: int = len(self._stack)
+        start: float = time.perf_counter()
+        getattr(self, '_' + name)()
+        statistics.seconds += time.perf_counter() - start
+        statistics.runs += 1
+        clauses_after, literals_after = self._size()
+        statistics.clauses_removed += clauses_before - clauses_after
+        statistics.literals_removed += literals_before - literals_after
+        for entry in self._stack[stack_before:]:
+            if entry[0] == 'assign':
+                statistics.symbols_fixed += 1
+            else:
+                statistics.symbols_eliminated += 1
+        return clauses_before != clauses_after or literals_before != literals_after
+
+    def _unit_propagation(self) -> None:
+        # Unit propagation at decision level 0
+        while len(self._units) > 0 and not self._unsatisfiable:
+            index: int = self._units.pop()
+            clause: Optional[List[int]] = self._clauses[index]
+            if clause is not None and len(clause) == 1:
+                self._assign(clause[0])
+
+    def _pure_literals(self) -> None:
+        # A symbol that only ever appears with one sign can be fixed to whatever makes it True
+        found: bool = True
+        while found:
+            found = False
+            for symbol in sorted(self._symbols):
+                positives: Set[int] = self._occurrence_list(symbol)
+                negatives: Set[int] = self._occurrence_list(-symbol)
+                if len(positives) > 0 and len(negatives) == 0:
+                    self._assign(symbol)
+                    found = True
+                elif len(negatives) > 0 and len(positives) == 0:
+                    self._assign(-symbol)
+                    found = True
+
+    def _clauses_by_size(self) -> List[int]:
+        indexes: List[int] = [i for i in range(len(self._clauses)) if self._clauses[i] is not None]
+        indexes.sort(key=lambda i: len(self._clauses[i]))
+        return indexes
+
+    def _subsumption(self) -> None:
+        # Remove any clause D where some other clause C is a subset of D (C being True forces D to be True)
+        for index in self._clauses_by_size():
+            clause: Optional[List[int]] = self._clauses[index]
+            if clause is None:
+                continue
+            clause_set: Set[int] = set(clause)
+            # Every clause that C subsumes contains C's least common literal
+            literal: int = min(clause, key=lambda a_literal: len(self._occurrence_list(a_literal)))
+            for other_index in list(self._occurrence_list(literal)):
+                other: List[int] = self._clauses[other_index]
+                if other_index != index and len(other) >= len(clause) and clause_set.issubset(other):
+                    self._remove_clause(other_index)
+
+    def _self_subsumption(self) -> None:
+        # If C = C' OR l and D contains C' OR ~l, then resolving C and D gives D without ~l, which subsumes D.
+        # So ~l can just be removed from D.
+        for index in self._clauses_by_size():
+            clause: Optional[List[int]] = self._clauses[index]
+            if clause is None:
+                continue
+            for literal in list(clause):
+                rest: Set[int] = set(clause)
+                rest.discard(literal)
+                for other_index in list(self._occurrence_list(-literal)):
+                    other: List[int] = self._clauses[other_index]
+                    if other is not None and len(other) >= len(clause) and rest.issubset(other):
+                        self._remove_literal(other_index, -literal)
+                if self._unsatisfiable:
+                    return
+        self._unit_propagation()
+
+    def _variable_elimination(self) -> None:
+        # Replace all clauses containing a symbol with all the resolvents on that symbol, as long as that doesn't
+        # grow the number of clauses by more than max_growth
+        symbols: List[int] = sorted(self._symbols, key=lambda a_symbol: len(self._occurrence_list(a_symbol)) +
+                                    len(self._occurrence_list(-a_symbol)))
+        for symbol in symbols:
+            positives: List[int] = list(self._occurrence_list(symbol))
+            negatives: List[int] = list(self._occurrence_list(-symbol))
+            occurrence_count: int = len(positives) + len(negatives)
+            if occurrence_count == 0 or occurrence_count > self._max_occurrences:
+                continue
+            limit: int = occurrence_count + self._max_growth
+            resolvents: Optional[List[List[int]]] = []
+            for positive in positives:
+                for negative in negatives:
+                    resolvent: Optional[List[int]] = _resolve(self._clauses[positive], self._clauses[negative],
+                                                              symbol)
+                    if resolvent is not None:
+                        resolvents.append(resolvent)
+                        if len(resolvents) > limit:
+                            resolvents = None
+                            break
+                if resolvents is None:
+                    break
+            if resolvents is None:
+                continue
+            # Eliminate the symbol
+            self._stack.append(('eliminate', symbol, [list(self._clauses[i]) for i in positives + negatives]))
+            for index in positives + negatives:
+                self._remove_clause(index)
+            for resolvent in resolvents:
+                self._add_clause(resolvent)
+            self._unit_propagation()
+            if self._unsatisfiable:
+                return
+
+    def extend_model(self, model: Dict[int, bool]) -> Dict[int, bool]:
+        """
+        Turns a model of the simplified clauses into a model of the original clauses by replaying the
+        reconstruction stack backwards. Any symbol not in the model is treated as False.
+        :param model: A dictionary of symbol id to bool that satisfies the simplified clauses.
+        :return: A dictionary with a value for every symbol that appeared in the original clauses.
+        """
+        full_model: Dict[int, bool] = {symbol: model.get(symbol, False) for symbol in self._symbols}
+        full_model.update(model)
+        for entry in reversed(self._stack):
+            if entry[0] == 'assign':
+                literal: int = entry[1]
+                full_model[abs(literal)] = literal > 0
+            else:
+                _, symbol, clauses = entry
+                # False satisfies every clause with ~symbol. The resolvents guarantee the rest of those clauses
+                # are True if any clause with symbol needs symbol to be True.
+                full_model[symbol] = False
+                for clause in clauses:
+                    if symbol in clause and not any(full_model.get(abs(literal), False) == (literal > 0)
+                                                    for literal in clause if literal != symbol):
+                        full_model[symbol] = True
+                        break
+        return full_model
+
+
+def _resolve(clause1: List[int], clause2: List[int], symbol: int) -> Optional[List[int]]:
+    # Resolve two clauses on symbol. Returns None if the resolvent is always True.
+    resolvent: List[int] = [literal for literal in clause1 if literal != symbol]
+    for literal in clause2:
+        if literal == -symbol or literal in resolvent:
+            continue
+        if -literal in resolvent:
+            return None
+        resolvent.append(literal)
+    return resolvent
+
+
+def preprocess_knowledge_base(knowledge_base: kb.PLKnowledgeBase, passes: Iterable[str] = None) \
+        -> Tuple[kb.PLKnowledgeBase, CNFPreprocessor]:
+    """
+    Converts a knowledge base to CNF (if needed) and runs the preprocessing passes on it.
+    :param knowledge_base: The PLKnowledgeBase to simplify. It is left unchanged.
+    :param passes: The names of the passes to run. Defaults to all of them.
+    :return: A tuple of a new simplified PLKnowledgeBase in CNF format and the CNFPreprocessor (which has the
+    statistics and can turn models of the new knowledge base back into models of the original one).
+    """
+    symbol_names: List[str]
+    clauses: List[List[int]]
+    symbol_names, clauses = kb_to_clauses(knowledge_base)
+    preprocessor: CNFPreprocessor = CNFPreprocessor(clauses)
+    simplified: List[List[int]] = preprocessor.run(passes)
+    new_kb: kb.PLKnowledgeBase = kb.PLKnowledgeBase()
+    # The clauses are already free of duplicates, so skip the checks 'add' does
+    new_kb._sentences = [literals_to_sentence(clause, symbol_names) for clause in simplified]
+    new_kb._is_cnf = True
+    return new_kb, preprocessor
@@ -1,11 +1,12 @@
 from __future__ import annotations
-from typing import Optional, List, Union
+from typing import Optional, List, Union, Iterator, Iterable, Tuple, Dict, Set, Callable, Sequence, TYPE_CHECKING
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
 from functools import total_ordering
-import proplogic.knowledge_base as kb
-from copy import deepcopy
 from enum import Enum
-import proplogic.parser as pl_parser
-from proplogic.symbol import LogicSymbol, LogicValue
+from proplogic.symbol import LogicSymbol, LogicValue, SymbolList, intern_symbol, symbol_table
+if TYPE_CHECKING:
+    import numpy as np
 
 
 @total_ordering
@@ -27,34 +28,58 @@ class LogicOperatorTypes(Enum):
         return NotImplemented
 
 
-def _apply_operator(value1: kb.LogicValue, value2: kb.LogicValue, operator: LogicOperatorTypes) -> kb.LogicValue:
-    final_value: kb.LogicValue
+# When True, == compares structure instead of logical equivalence (see structural_equality). A context variable so
+# that a with block in one thread (or asyncio task) doesn't change == in another.
+_structural_equality: ContextVar[bool] = ContextVar('structural_equality', default=False)
+
+
+@contextmanager
+def structural_equality() -> Iterator[None]:
+    """
+    Makes == (and so 'in', list.remove, list.index, etc.) compare Sentences by structure (see
+    Sentence.is_structurally_equal) instead of by logical equivalence while inside the with block. Only affects the
+    current thread.
+
+    Usage
+    _____
+    with structural_equality():
+        clauses.remove(clause)
+    """
+    token: Token = _structural_equality.set(True)
+    try:
+        yield
+    finally:
+        _structural_equality.reset(token)
+
+
+def _apply_operator(value1: LogicValue, value2: LogicValue, operator: LogicOperatorTypes) -> LogicValue:
+    final_value: LogicValue
     if operator == LogicOperatorTypes.NO_OPERATOR:
         return value1
     elif operator == LogicOperatorTypes.AND:
-        if value1 == kb.LogicValue.TRUE and value2 == kb.LogicValue.TRUE:
-            return kb.LogicValue.TRUE
-        elif value1 == kb.LogicValue.FALSE or value2 == kb.LogicValue.FALSE:
-            return kb.LogicValue.FALSE
+        if value1 == LogicValue.TRUE and value2 == LogicValue.TRUE:
+            return LogicValue.TRUE
+        elif value1 == LogicValue.FALSE or value2 == LogicValue.FALSE:
+            return LogicValue.FALSE
     elif operator == LogicOperatorTypes.OR:
-        if value1 == kb.LogicValue.TRUE or value2 == kb.LogicValue.TRUE:
-            return kb.LogicValue.TRUE
-        elif value1 == kb.LogicValue.FALSE and value2 == kb.LogicValue.FALSE:
-            return kb.LogicValue.FALSE
+        if value1 == LogicValue.TRUE or value2 == LogicValue.TRUE:
+            return LogicValue.TRUE
+        elif value1 == LogicValue.FALSE and value2 == LogicValue.FALSE:
+            return LogicValue.FALSE
     elif operator == LogicOperatorTypes.IMPLIES:
         # a => b means ~a or b
-        if value1 == kb.LogicValue.FALSE or value2 == kb.LogicValue.TRUE:
-            return kb.LogicValue.TRUE
+        if value1 == LogicValue.FALSE or value2 == LogicValue.TRUE:
+            return LogicValue.TRUE
         # ~(~a or b) = a and ~b
-        elif value1 == kb.LogicValue.TRUE and value2 == kb.LogicValue.FALSE:
-            return kb.LogicValue.FALSE
+        elif value1 == LogicValue.TRUE and value2 == LogicValue.FALSE:
+            return LogicValue.FALSE
     elif operator == LogicOperatorTypes.BI_CONDITIONAL:
-        # Biconditional is just implies going both ways connected by an And operator
-        value3: kb.LogicValue = _apply_operator(value1, value2, LogicOperatorTypes.IMPLIES)
-        value4: kb.LogicValue = _apply_operator(value2, value1, LogicOperatorTypes.IMPLIES)
-        return _apply_operator(value3, value4, LogicOperatorTypes.AND)
+        # Biconditional is just implies going both ways connected by an And operator, which is True when both
+        # values are the same and False when they differ (and Undefined if either one is)
+        if value1 != LogicValue.UNDEFINED and value2 != LogicValue.UNDEFINED:
+            return LogicValue.TRUE if value1 == value2 else LogicValue.FALSE
     # No evaluation, so must be UNDEFINED
-    return kb.LogicValue.UNDEFINED
+    return LogicValue.UNDEFINED
 
 
 def _split_and_lines(sentence: Sentence) -> List[Sentence]:
@@ -76,21 +101,40 @@ def _split_and_lines(sentence: Sentence) -> List[Sentence]:
     if not sentence.is_cnf:
         raise SentenceError("Function _split_and_lines was called with a 'sentence' not in CNF form.")
     sentences: List[Sentence] = []
-    if sentence.logic_operator == LogicOperatorTypes.OR or sentence.is_atomic:
-        # This is the top of an OR clause, or it's atomic, so add it as is
-        sentences.append(sentence)
-    elif sentence.logic_operator == LogicOperatorTypes.AND:
-        if sentence.is_cnf:
-            # Set sub sentences to is_cnf = True if this sentence is in CNF format already
-            sentence.first_sentence._is_cnf = True
-            sentence.second_sentence._is_cnf = True
-        sentences.extend(_split_and_lines(sentence.first_sentence))
-        sentences.extend(_split_and_lines(sentence.second_sentence))
-    else:
-        raise SentenceError("Function _split_and_lines was called with a 'sentence' not in CNF form.")
+    stack: List[Sentence] = [sentence]
+    while len(stack) > 0:
+        sentence = stack.pop()
+        if sentence.logic_operator == LogicOperatorTypes.OR or sentence.is_atomic:
+            # This is the top of an OR clause, or it's atomic, so add it as is
+            sentences.append(sentence)
+        elif sentence.logic_operator == LogicOperatorTypes.AND:
+            # Set sub sentences to is_cnf = True since this sentence is in CNF format already
+            for operand in sentence.operands:
+                operand._is_cnf = True
+            # Push the last operand first so that the clauses come out in left to right order
+            stack.extend(reversed(sentence.operands))
+        else:
+            raise SentenceError("Function _split_and_lines was called with a 'sentence' not in CNF form.")
     return sentences
 
 
+def _binary_parts(node) -> tuple:
+    # The (symbol, negation, operator, first, second) of a node as it would be in the binary tree. The rest of an n-ary
+    # node's chain is given as an (operands, start, operator) tuple instead of building the binary nodes.
+    if isinstance(node, tuple):
+        operands, start, operator = node
+        return None, False, operator, operands[start], _chain_rest(operands, start + 1, operator)
+    if node._operands is not None:
+        return None, node._negation, node._logic_operator, node._operands[0], \
+            _chain_rest(node._operands, 1, node._logic_operator)
+    return node._symbol, node._negation, node._logic_operator, node._first_sentence, node._second_sentence
+
+
+def _chain_rest(operands: tuple, start: int, operator: LogicOperatorTypes):
+    # The second sentence of the chain from operands[start - 1]: the last operand or the rest of the chain
+    return operands[start] if start == len(operands) - 1 else (operands, start, operator)
+
+
 class SentenceError(Exception):
     def __init__(self, message=None):
         self.message = message
@@ -103,11 +147,12 @@ def parse_sentence(input_str: str) -> Sentence:
     :param input_str: The text (in the form of propositional logic) you wish to parse.
     :return: A Sentence containing the parsed logic
     """
-    parser: pl_parser.LogicParser = pl_parser.LogicParser(input_str)
-    result: Sentence = parser.parse_line()
-    if parser.line_count > 0:
+    # Imported here because the parser builds Sentences, so proplogic.parser imports this module
+    from proplogic.parser import parse_cache
+    sentences: List[Sentence] = parse_cache().parse(input_str)
+    if len(sentences) > 1:
         raise SentenceError("Call to 'parse_sentence' takes only a single line of input.")
-    return result
+    return sentences[0]
 
 
 def logic_operator_to_string(logic_operator: LogicOperatorTypes) -> str:
@@ -134,14 +179,25 @@ class Sentence:
     complex_sentence1 = Sentence('Q1', LogicOperatorTypes.AND, 'Q2')
 
     sentence1 = Sentence("a => b")
+
+    A chain of ANDs (or of ORs) like "A OR B OR C OR D" can also be held as a single n-ary node with a flat tuple of
+    operands (see operands). The parser and the builders make n-ary nodes for chains of three or more. They mean the
+    same as the right nested binary chain A OR (B OR (C OR D)), and turn into it the first time first_sentence,
+    second_sentence, or logic_operator is used, so code that walks the binary tree works unchanged. Code that only
+    reads a Sentence (evaluate, get_symbol_list, to_string, is_valid_cnf, ...) uses the flat operands instead.
     """
+    # Sentences are the nodes of every parse tree so use slots to keep them small
+    __slots__ = ('_symbol', '_first_sentence', '_second_sentence', '_logic_operator', '_is_cnf', '_negation',
+                 '_operands')
+
     def __init__(self, sentence1: Union[Sentence, str] = None, logical_operator: LogicOperatorTypes = None,
                  sentence2: Union[Sentence, str] = None, negated: bool = False) -> None:
         # Set default values
         self._symbol: Optional[str] = None
         self._first_sentence: Optional[Sentence] = None
         self._second_sentence: Optional[Sentence] = None
-        self._parent_sentence: Optional[Sentence] = None
+        # The operands of an n-ary AND or OR node (otherwise None)
+        self._operands: Optional[Tuple[Sentence, ...]] = None
         self._logic_operator: LogicOperatorTypes = LogicOperatorTypes.NO_OPERATOR
         self._is_cnf: bool = False
         # Set negation
@@ -199,7 +255,7 @@ class Sentence:
                 # Only parameter 1 was passed, so check if it is a symbol or sentence needing parsing?
                 if sentence1.isalnum() and sentence1[0].isalpha():
                     # This is a single symbol
-                    self._symbol = sentence1
+                    self._symbol = intern_symbol(sentence1)
                 elif sentence1.isalnum() and sentence1[0].isalpha():
                     # Invalid value for a symbol since it doesn't start with a letter
                     SentenceError("Symbols must start with a letter.")
@@ -218,6 +274,8 @@ class Sentence:
     def __eq__(self, other: Sentence) -> bool:
         if type(self) != type(other):
             return False
+        elif _structural_equality.get():
+            return self.is_structurally_equal(other)
         else:
             if self.is_equivalent(other):
                 return True
@@ -238,6 +296,8 @@ class Sentence:
 
     @logic_operator.setter
     def logic_operator(self, value: LogicOperatorTypes) -> None:
+        if self._operands is not None:
+            self._binarize()
         self._logic_operator = value
 
     @property
@@ -254,25 +314,72 @@ class Sentence:
 
     @symbol.setter
     def symbol(self, value: str) -> None:
-        self._symbol = value
+        self._symbol = None if value is None else intern_symbol(value)
+
+    @property
+    def symbol_id(self) -> Optional[int]:
+        """
+        :return: The id of this Sentence's symbol in the process wide symbol table (see proplogic.symbol.symbol_table)
+        or None if this isn't an atomic Sentence with a symbol.
+        """
+        return None if self._symbol is None else symbol_table().get_id(self._symbol)
 
     @property
     def first_sentence(self) -> Sentence:
+        if self._operands is not None:
+            self._binarize()
         return self._first_sentence
 
     @first_sentence.setter
     def first_sentence(self, value: Sentence) -> None:
+        if self._operands is not None:
+            self._binarize()
         self._first_sentence = value
-        self._first_sentence._parent_sentence = self
 
     @property
     def second_sentence(self) -> Sentence:
+        if self._operands is not None:
+            self._binarize()
         return self._second_sentence
 
     @second_sentence.setter
     def second_sentence(self, value: Sentence) -> None:
+        if self._operands is not None:
+            self._binarize()
         self._second_sentence = value
-        self._second_sentence._parent_sentence = self
+
+    @property
+    def is_nary(self) -> bool:
+        """
+        :return: True if this is an n-ary AND or OR node holding a flat tuple of operands
+        """
+        return self._operands is not None
+
+    @property
+    def operands(self) -> Tuple[Sentence, ...]:
+        """
+        The sub Sentences directly under this one, without turning an n-ary node into a binary chain: all the
+        operands of an n-ary node, the first and second sentence of a binary node, the negated sentence of a lone
+        negation, and nothing for an atomic Sentence.
+        :return: A tuple of Sentences
+        """
+        if self._operands is not None:
+            return self._operands
+        if self._second_sentence is not None:
+            return self._first_sentence, self._second_sentence
+        if self._first_sentence is not None:
+            return self._first_sentence,
+        return ()
+
+    def _binarize(self) -> None:
+        # Turn this n-ary node into the equivalent right nested chain of binary nodes
+        operands: Tuple[Sentence, ...] = self._operands
+        self._operands = None
+        second: Sentence = operands[-1]
+        for index in range(len(operands) - 2, 0, -1):
+            second = Sentence._node(None, self._logic_operator, operands[index], second)
+        self._first_sentence = operands[0]
+        self._second_sentence = second
 
     @property
     def is_atomic(self) -> bool:
@@ -281,7 +388,9 @@ class Sentence:
         :return: A boolean value set to True if this is an atomic Sentence otherwise False
         """
         # Returns True if this is a simple atomic sentence and False if it is a complex sentence
-        if self.logic_operator == LogicOperatorTypes.NO_OPERATOR \
+        if self._operands is not None:
+            return False
+        elif self.logic_operator == LogicOperatorTypes.NO_OPERATOR \
                 and self.first_sentence is None and self.second_sentence is None:
             # Simple atomic sentence with one symbol or no parameters at all
             return True
@@ -305,6 +414,7 @@ class Sentence:
             # If we are negating this copy, and it is already negated, then make it a first sentence instead
             new_sentence: Sentence = Sentence(sentence)
             self._first_sentence = new_sentence
+            self._operands = None
             self._negation = True
         else:
             # Otherwise make a shallow copy
@@ -316,6 +426,7 @@ class Sentence:
                 self._negation = sentence._negation
             self._first_sentence = sentence._first_sentence
             self._second_sentence = sentence._second_sentence
+            self._operands = sentence._operands
             self._logic_operator = sentence._logic_operator
 
     def _sentence_from_tokens(self, token1: str, operator: LogicOperatorTypes, token2: str) -> None:
@@ -332,6 +443,7 @@ class Sentence:
             self._symbol = None
             self._first_sentence = sentence1
             self._second_sentence = sentence2
+            self._operands = None
         else:
             raise SentenceError("Illegal parameters. Operator cannot be 'None' and Tokens cannot be blank.")
 
@@ -346,6 +458,94 @@ class Sentence:
         self._symbol = None
         self._first_sentence = sentence
         self._second_sentence = None
+        self._operands = None
+
+    @staticmethod
+    def _node(symbol: Optional[str], logic_operator: LogicOperatorTypes, first: Optional[Sentence],
+              second: Optional[Sentence], negated: bool = False) -> Sentence:
+        # Builds a node directly, skipping the checks (and string handling) in the constructor
+        node: Sentence = Sentence.__new__(Sentence)
+        node._symbol = symbol
+        node._logic_operator = logic_operator
+        node._first_sentence = first
+        node._second_sentence = second
+        node._operands = None
+        node._negation = negated
+        node._is_cnf = False
+        return node
+
+    @staticmethod
+    def _nary(logic_operator: LogicOperatorTypes, operands: List[Sentence]) -> Sentence:
+        # Joins two or more sentences with AND or OR, as an n-ary node if there are more than two
+        if len(operands) == 2:
+            return Sentence._node(None, logic_operator, operands[0], operands[1])
+        node: Sentence = Sentence._node(None, logic_operator, None, None)
+        node._operands = tuple(operands)
+        return node
+
+    @staticmethod
+    def atom(symbol: str, negated: bool = False) -> Sentence:
+        """
+        Builds an atomic Sentence without going through the parser.
+        :param symbol: The symbol name
+        :param negated: Set to True for the negated literal
+        :return: An atomic Sentence
+        """
+        if not (symbol.isalnum() and symbol[0].isalpha()):
+            raise SentenceError("Symbols must start with a letter and then be alphanumeric.")
+        return Sentence._node(intern_symbol(symbol.upper()), LogicOperatorTypes.NO_OPERATOR, None, None, negated)
+
+    @staticmethod
+    def _as_sentence(sentence: Union[Sentence, str]) -> Sentence:
+        return sentence if isinstance(sentence, Sentence) else Sentence(sentence)
+
+    @staticmethod
+    def not_(sentence: Union[Sentence, str]) -> Sentence:
+        """
+        Builds the negation of a Sentence the same way the parser builds "~sentence". The Sentence passed in becomes
+        part of the result, so don't change it afterwards.
+        :param sentence: A Sentence or symbol name
+        :return: The negated Sentence
+        """
+        sentence = Sentence._as_sentence(sentence)
+        if sentence._negation:
+            # Double negation, so make this sentence a level above (the same as the parser does)
+            return Sentence._node(None, LogicOperatorTypes.NO_OPERATOR, sentence, None, True)
+        negated: Sentence = Sentence._node(sentence._symbol, sentence._logic_operator, sentence._first_sentence,
+                                           sentence._second_sentence, True)
+        negated._operands = sentence._operands
+        return negated
+
+    @staticmethod
+    def _join(sentences: tuple, logic_operator: LogicOperatorTypes) -> Sentence:
+        # The same as the parser builds: a single sentence as is, otherwise an n-ary (or binary) node
+        if len(sentences) == 0:
+            raise SentenceError("Called 'and_' or 'or_' without any sentences.")
+        if len(sentences) == 1:
+            return Sentence._as_sentence(sentences[0])
+        return Sentence._nary(logic_operator, [Sentence._as_sentence(sentence) for sentence in sentences])
+
+    @staticmethod
+    def and_(*sentences: Union[Sentence, str]) -> Sentence:
+        """
+        Builds "sentence1 AND sentence2 AND ..." without going through the parser. The Sentences passed in become
+        part of the result, so don't change them afterwards.
+
+        Usage: Sentence.and_('A', Sentence.or_('B', Sentence.not_('C')))
+        :param sentences: One or more Sentences or symbol names
+        :return: The conjunction
+        """
+        return Sentence._join(sentences, LogicOperatorTypes.AND)
+
+    @staticmethod
+    def or_(*sentences: Union[Sentence, str]) -> Sentence:
+        """
+        Builds "sentence1 OR sentence2 OR ..." without going through the parser. The Sentences passed in become
+        part of the result, so don't change them afterwards.
+        :param sentences: One or more Sentences or symbol names
+        :return: The disjunction
+        """
+        return Sentence._join(sentences, LogicOperatorTypes.OR)
 
     def to_string(self, full_parentheses: bool = False) -> str:
         """
@@ -353,71 +553,83 @@ class Sentence:
         :param full_parentheses: Set this to True if you want to see all the parentheses.
         :return: A string representation of this Sentence
         """
-        def to_string_sub_sentence(sub_sentence: Sentence):
-            if self.logic_operator != sub_sentence.logic_operator \
-                    and self.logic_operator < sub_sentence.logic_operator \
+        # Build the string with an explicit stack of pieces (strings, or Sentences still to be written) rather than
+        # recursing, so that very deep sentences can't overflow the stack
+        pieces: List[str] = []
+        stack: List[Union[str, Sentence]] = [self]
+        while len(stack) > 0:
+            item: Union[str, Sentence] = stack.pop()
+            if isinstance(item, str):
+                pieces.append(item)
+            elif full_parentheses:
+                stack.extend(reversed(item._full_parentheses_parts()))
+            else:
+                stack.extend(reversed(item._string_parts()))
+        return "".join(pieces)
+
+    def _full_parentheses_parts(self) -> List[Union[str, Sentence]]:
+        # The pieces of to_string(True) for this node, with the sub sentences left to be written
+        parts: List[Union[str, Sentence]] = ["~"] if self._negation else []
+        if self.is_atomic:
+            if self._symbol is not None:
+                parts.append(self._symbol)
+        elif self._logic_operator == LogicOperatorTypes.NO_OPERATOR and self._negation \
+                and self._first_sentence is not None:
+            # We have a lone negation of another sentence
+            parts.extend(["(", self._first_sentence, ")"])
+        else:
+            # Full complex sentence. An n-ary node is written the same as the binary chain it stands for:
+            # (A OR (B OR (C OR D)))
+            operands: Tuple[Sentence, ...] = self.operands
+            operator: str = " " + logic_operator_to_string(self._logic_operator) + " "
+            for operand in operands[:-1]:
+                parts.extend(["(", operand, operator])
+            parts.extend([operands[-1], ")" * (len(operands) - 1)])
+        return parts
+
+    def _string_parts(self) -> List[Union[str, Sentence]]:
+        # The pieces of to_string() for this node, with the sub sentences left to be written
+        def sub_sentence_parts(sub_sentence: Sentence) -> List[Union[str, Sentence]]:
+            if self._logic_operator != sub_sentence._logic_operator \
+                    and self._logic_operator < sub_sentence._logic_operator \
                     and not sub_sentence.is_atomic \
-                    and not sub_sentence.negation:
+                    and not sub_sentence._negation:
                 # Include parentheses if:
                 # 1. The operators at this level is a lower priority than the one below
                 # 2. The next level down is a complex sentence
                 # 3. The next level down has no negation
-                return "(" + sub_sentence.to_string() + ")"
-            elif (self.logic_operator == LogicOperatorTypes.IMPLIES or
-                  self.logic_operator == LogicOperatorTypes.BI_CONDITIONAL) \
-                    and (sub_sentence.logic_operator == LogicOperatorTypes.IMPLIES or
-                         sub_sentence.logic_operator == LogicOperatorTypes.BI_CONDITIONAL):
+                return ["(", sub_sentence, ")"]
+            elif (self._logic_operator == LogicOperatorTypes.IMPLIES or
+                  self._logic_operator == LogicOperatorTypes.BI_CONDITIONAL) \
+                    and (sub_sentence._logic_operator == LogicOperatorTypes.IMPLIES or
+                         sub_sentence._logic_operator == LogicOperatorTypes.BI_CONDITIONAL):
                 # Use parentheses with implies or biconditionals next to each other to be more clear
-                return "(" + sub_sentence.to_string() + ")"
+                return ["(", sub_sentence, ")"]
             else:
                 # Otherwise, skip the parentheses
-                return sub_sentence.to_string()
+                return [sub_sentence]
 
-        ret_val: str = ""
-        if full_parentheses:
+        parts: List[Union[str, Sentence]] = []
+        if self.is_atomic:
+            # Handle atomic sentence
+            if self._symbol is not None:
+                parts.append("~" + self._symbol if self._negation else self._symbol)
+        elif self._logic_operator == LogicOperatorTypes.NO_OPERATOR and self._negation \
+                and self._first_sentence is not None and self._second_sentence is None:
+            # Handle lone negation
+            parts.append("~")
+            parts.extend(sub_sentence_parts(self._first_sentence))
+        else:  # sentence is full complex
             if self._negation:
-                ret_val += "~"
-
-            if self.is_atomic:
-                if self.symbol is not None:
-                    ret_val += self.symbol
-                else:
-                    ret_val += ""
-            elif self.logic_operator == LogicOperatorTypes.NO_OPERATOR and self.negation \
-                    and self.first_sentence is not None:
-                # We have a lone negation of another sentence
-                ret_val += "(" + self.first_sentence.to_string(True) + ")"
-            else:
-                # Full complex sentence
-                ret_val += "(" + self.first_sentence.to_string(True) + " " + \
-                           logic_operator_to_string(self.logic_operator) + " " + \
-                           self.second_sentence.to_string(True) + ")"
-
-            return ret_val
-        else:
-            if self.is_atomic:
-                # Handle atomic sentence
-                if self.symbol is not None:
-                    ret_val += self.to_string(True)
-                else:
-                    ret_val += ""
-            elif self.logic_operator == LogicOperatorTypes.NO_OPERATOR and self.negation \
-                    and self.first_sentence is not None and self.second_sentence is None:
-                # Handle lone negation
-                if self._negation:
-                    ret_val += "~"
-                ret_val += to_string_sub_sentence(self.first_sentence)
-            else:  # sentence is full complex
-                # First Sentence
-                ret_val += to_string_sub_sentence(self.first_sentence)
-                # Logical operator
-                ret_val += " " + logic_operator_to_string(self.logic_operator) + " "
-                # Second Sentence
-                ret_val += to_string_sub_sentence(self.second_sentence)
-                if self._negation:
-                    ret_val = "~(" + ret_val + ")"
-
-            return ret_val
+                parts.append("~(")
+            operator: str = " " + logic_operator_to_string(self._logic_operator) + " "
+            for index, operand in enumerate(self.operands):
+                if index > 0:
+                    parts.append(operator)
+                parts.extend(sub_sentence_parts(operand))
+            if self._negation:
+                parts.append(")")
+        return parts
 
     def get_atomic_symbols(self) -> List[LogicSymbol]:
         """
@@ -427,29 +639,25 @@ class Sentence:
         """
         return self._get_atomic_symbols()
 
-    def _get_atomic_symbols(self, temp_symbol_list: kb.List[LogicSymbol] = None, sub_sentence: Sentence = None)\
-            -> List[LogicSymbol]:
-        if temp_symbol_list is None:
-            temp_symbol_list = []
-        if sub_sentence is None:
-            sub_sentence = self
-
-        if sub_sentence.is_atomic:
-            if sub_sentence.symbol is not None:
-                symbol: LogicSymbol = LogicSymbol(sub_sentence.symbol)
-                symbol.value = not sub_sentence.negation
+    def _get_atomic_symbols(self) -> List[LogicSymbol]:
+        symbols: List[LogicSymbol] = []
+        seen: Set[Tuple[str, bool]] = set()
+        # Walk the sentence left to right without recursion so that very long sentences can't overflow the stack
+        stack: List[Sentence] = [self]
+        while len(stack) > 0:
+            sub_sentence: Sentence = stack.pop()
+            if sub_sentence.is_atomic:
                 # Only append this symbol if it is not already in the list (with the same name value combo)
-                if symbol not in temp_symbol_list:
-                    temp_symbol_list.append(symbol)
-        else:
-            # All complex sentences have at least one sentence
-            Sentence._get_atomic_symbols(sub_sentence.first_sentence, temp_symbol_list)
-            # If we have a second sentence, then process that
-            if sub_sentence.second_sentence is not None:
-                Sentence._get_atomic_symbols(sub_sentence.second_sentence, temp_symbol_list)
-        return temp_symbol_list
+                if sub_sentence._symbol is not None and (sub_sentence._symbol, sub_sentence._negation) not in seen:
+                    seen.add((sub_sentence._symbol, sub_sentence._negation))
+                    symbol: LogicSymbol = LogicSymbol(sub_sentence._symbol)
+                    symbol.value = not sub_sentence._negation
+                    symbols.append(symbol)
+            else:
+                stack.extend(reversed(sub_sentence.operands))
+        return symbols
 
-    def get_symbol_list(self, model: kb.SymbolList = None) -> kb.SymbolList:
+    def get_symbol_list(self, model: SymbolList = None) -> SymbolList:
         """
         For each symbol, check if it's already in the list and, if not, add it then return the full list.
         It will default to value undefined for everything. then handle the rest, i.e. atomic vs. complex.
@@ -460,32 +668,24 @@ class Sentence:
         """
         return self._get_symbol_list(model=model)
 
-    def _get_symbol_list(self, temp_symbol_list: kb.SymbolList = None, sub_sentence: Sentence = None,
-                         model: kb.SymbolList = None) -> kb.SymbolList:
-        if temp_symbol_list is None:
-            temp_symbol_list = kb.SymbolList()
-        if sub_sentence is None:
-            sub_sentence = self
-
-        if sub_sentence.is_atomic:
-            symbol: str = sub_sentence.symbol
-            value: LogicValue = LogicValue.UNDEFINED
-            if model is not None:
-                current: LogicSymbol = model.get_symbol(symbol)
-                if current is not None:
-                    value = current.value
-            temp_symbol_list.add(symbol, value=value)
-        else:
-            # All complex sentences have at least one sentence
-            self._get_symbol_list(temp_symbol_list=temp_symbol_list, sub_sentence=sub_sentence.first_sentence,
-                                  model=model)
-            # If we have a second sentence, then process that
-            if sub_sentence.second_sentence is not None:
-                self._get_symbol_list(temp_symbol_list=temp_symbol_list, sub_sentence=sub_sentence.second_sentence,
-                                      model=model)
-        return temp_symbol_list
+    def _get_symbol_list(self, model: SymbolList = None) -> SymbolList:
+        symbol_list: SymbolList = SymbolList()
+        stack: List[Sentence] = [self]
+        while len(stack) > 0:
+            sub_sentence: Sentence = stack.pop()
+            if sub_sentence.is_atomic:
+                symbol: str = sub_sentence._symbol
+                value: LogicValue = LogicValue.UNDEFINED
+                if model is not None:
+                    current: LogicSymbol = model.get_symbol(symbol)
+                    if current is not None:
+                        value = current.value
+                symbol_list.add(symbol, value=value)
+            else:
+                stack.extend(reversed(sub_sentence.operands))
+        return symbol_list
 
-    def evaluate(self, model: kb.SymbolList) -> kb.LogicValue:
+    def evaluate(self, model: SymbolList) -> LogicValue:
         """
         Given a model (SymbolList) evaluates the Sentence and returns a LogicValue
         Note: There is a limitation of this evaluation. To save time it does not try every possible
@@ -497,51 +697,69 @@ class Sentence:
         """
         return self._traverse_and_evaluate(model)
 
-    def is_true(self, model: kb.SymbolList) -> bool:
+    def evaluate_batch(self, models: np.ndarray, symbols: Optional[Sequence[str]] = None) -> np.ndarray:
+        """
+        Evaluates the Sentence for many models at once with numpy (see proplogic.batch). Gives the same results as
+        calling evaluate for each model.
+        :param models: An (n_models x n_symbols) int8 array of LogicValue codes (1 TRUE, 0 FALSE, -1 UNDEFINED)
+        :param symbols: The symbol name of each column of models. Defaults to the symbols of this Sentence, sorted
+        alphabetically (the order of get_symbol_list().get_keys()).
+        :return: An int8 array with the LogicValue code for each model
+        """
+        from proplogic.batch import evaluate_batch
+        if symbols is None:
+            symbols = self.get_symbol_list().get_keys()
+        return evaluate_batch([self], models, symbols)
+
+    def is_true(self, model: SymbolList) -> bool:
         # noinspection GrazieInspection
         """
         Given a model, does this Sentence evaluate to LogicValue.TRUE?
         :param model: A SymbolList with symbols set to TRUE, FALSE, or UNDEFINED
         :return: A boolean value of True if evaluate returns TRUE otherwise returns False
         """
-        return self.evaluate(model) == kb.LogicValue.TRUE
+        return self.evaluate(model) == LogicValue.TRUE
 
-    def is_false(self, model: kb.SymbolList) -> bool:
+    def is_false(self, model: SymbolList) -> bool:
         # noinspection GrazieInspection
         """
         Given a model, does this Sentence evaluate to LogicValue.FALSE?
         :param model: A SymbolList with symbols set to TRUE, FALSE, or UNDEFINED
         :return: A boolean value of True if evaluate returns TRUE otherwise returns False
         """
-        return self.evaluate(model) == kb.LogicValue.FALSE
-
-    def _traverse_and_evaluate(self, model: kb.SymbolList) -> kb.LogicValue:
-        evaluate: kb.LogicValue
-        if self.is_atomic:
-            evaluate = model.get_value(self.symbol)
-        else:
-            sub_evaluate1: kb.LogicValue
-            sub_evaluate2: kb.LogicValue
-            # There should always be a first sentence
-            sub_evaluate1 = self.first_sentence._traverse_and_evaluate(model)
-            # If there is a second sentence evaluate it next
-            if self.second_sentence is not None:
-                sub_evaluate2 = self.second_sentence._traverse_and_evaluate(model)
-                evaluate = _apply_operator(sub_evaluate1, sub_evaluate2, self.logic_operator)
+        return self.evaluate(model) == LogicValue.FALSE
+
+    def _traverse_and_evaluate(self, model: SymbolList) -> LogicValue:
+        # Evaluate bottom up without recursion. Each node is visited twice: first to push its operands, then (once
+        # they are all evaluated) to combine their values.
+        values: Dict[int, LogicValue] = {}
+        stack: List[Tuple[Sentence, bool]] = [(self, False)]
+        while len(stack) > 0:
+            sub_sentence, operands_done = stack.pop()
+            evaluate: LogicValue
+            if sub_sentence._first_sentence is None and sub_sentence._operands is None:
+                # Atomic (the same as is_atomic for any legal sentence, but this is the inner loop of truth tables)
+                evaluate = model.get_value(sub_sentence._symbol)
+            elif not operands_done:
+                stack.append((sub_sentence, True))
+                stack.extend((operand, False) for operand in sub_sentence.operands)
+                continue
             else:
-                evaluate = sub_evaluate1
-        # Handle negations
-        if self.negation:
-            if evaluate == kb.LogicValue.TRUE:
-                return kb.LogicValue.FALSE
-            elif evaluate == kb.LogicValue.FALSE:
-                return kb.LogicValue.TRUE
-            else:
-                return kb.LogicValue.UNDEFINED
-        else:
-            return evaluate
-
-    def _truth_table_check_all(self, sentence: Sentence, symbols: kb.SymbolList, model: kb.SymbolList) -> bool:
+                operands: Tuple[Sentence, ...] = sub_sentence.operands
+                # Fold from the right, the same as the right nested binary chain an n-ary node stands for
+                evaluate = values[id(operands[-1])]
+                for index in range(len(operands) - 2, -1, -1):
+                    evaluate = _apply_operator(values[id(operands[index])], evaluate, sub_sentence._logic_operator)
+            # Handle negations
+            if sub_sentence._negation:
+                if evaluate == LogicValue.TRUE:
+                    evaluate = LogicValue.FALSE
+                elif evaluate == LogicValue.FALSE:
+                    evaluate = LogicValue.TRUE
+            values[id(sub_sentence)] = evaluate
+        return values[id(self)]
+
+    def _truth_table_check_all(self, sentence: Sentence, symbols: SymbolList, model: SymbolList) -> bool:
         if symbols is None or symbols.length == 0:
             # We've processed every single symbol so this is one possible combination to evaluate
             if self.evaluate(model) == sentence.evaluate(model):
@@ -550,9 +768,9 @@ class Sentence:
                 return False
         else:
             # We still have symbols to pop off the queue and try both true and false for
-            next_symbol: kb.LogicSymbol = symbols.get_next_symbol()
-            copy_model1: kb.SymbolList = model.clone()
-            copy_model2: kb.SymbolList = model.clone()
+            next_symbol: LogicSymbol = symbols.get_next_symbol()
+            copy_model1: SymbolList = model.clone()
+            copy_model2: SymbolList = model.clone()
             copy_model1.set_value(next_symbol.name, True)
             copy_model2.set_value(next_symbol.name, False)
             # Recurse to create every possibility
@@ -562,17 +780,18 @@ class Sentence:
 
     def is_equivalent(self, other_sentence: Union[Sentence, str]) -> bool:
         """
-        Does an evaluation of this Sentence (self) and other_sentence. It does a truth table check on the
-        two sentences so see if under every possible model they evaluate the same. If so, returns True otherwise False
+        Checks if this Sentence (self) and other_sentence evaluate the same under every possible model. If so, returns
+        True otherwise False. Sentences with the same structure are equivalent straight away. Otherwise, rather than
+        a truth table, a SAT solver looks for a model where exactly one of the two sentences is True (A XOR B).
         :param other_sentence: The Sentence you want to see if it's equivalent to the current Sentence (self)
         :return: A boolean value set to True of the two Sentences are equivalent otherwise False.
         """
-        sentence: Sentence = kb.sentence_or_str(other_sentence)
-        if isinstance(sentence, str):
-            sentence = Sentence(sentence)
+        sentence: Sentence = other_sentence if isinstance(other_sentence, Sentence) else Sentence(other_sentence)
+        if self.is_structurally_equal(sentence):
+            return True
 
-        symbols1: kb.SymbolList = self.get_symbol_list()
-        symbols2: kb.SymbolList = sentence.get_symbol_list()
+        symbols1: SymbolList = self.get_symbol_list()
+        symbols2: SymbolList = sentence.get_symbol_list()
         if symbols1.length != symbols2.length:
             # The sentences can't be equivalent if they don't have the same number of symbols
             return False
@@ -581,15 +800,111 @@ class Sentence:
                 # Abort if there is ever a mismatch between symbol names because they can't be equivalent then
                 if symbols1[i] != symbols2[i]:
                     return False
-        # All the symbols match, so move on to create the truth table
-        return self._truth_table_check_all(sentence, symbols1.clone(), symbols1.clone())
+        if symbols1.length == 0:
+            # Nothing to encode for the SAT solver, so fall back to the truth table
+            return self._truth_table_check_all(sentence, symbols1.clone(), symbols1.clone())
+        return not self._is_xor_satisfiable(sentence)
+
+    def _is_xor_satisfiable(self, other_sentence: Sentence) -> bool:
+        # True if there is a model where exactly one of self and other_sentence is True
+        from proplogic.cnf import tseitin_encode
+        from proplogic.dpll import DPLLSolver
+        symbol_ids: dict = {}
+        symbol_names: List[str] = []
+        clauses: List[List[int]] = []
+        literal1: int = tseitin_encode(self, symbol_ids, symbol_names, clauses)
+        literal2: int = tseitin_encode(other_sentence, symbol_ids, symbol_names, clauses)
+        clauses.extend([[literal1, literal2], [-literal1, -literal2]])
+        return DPLLSolver(clauses, symbol_names).solve()
+
+    def structural_hash(self) -> int:
+        """
+        A hash of the structure of this Sentence (symbols, negations, and operators, in order). Sentences that are
+        structurally equal (see is_structurally_equal) have the same hash. Unlike __eq__ this says nothing about
+        logical equivalence: 'A OR B' and 'B OR A' will usually hash differently.
+        :return: An integer hash
+        """
+        hashes: dict = {}
+        stack: List[tuple] = [(self, False)]
+        while len(stack) > 0:
+            node, children_done = stack.pop()
+            operands: Tuple[Sentence, ...] = node.operands
+            if node._operands is not None and children_done:
+                # Hash the same as the right nested binary chain the n-ary node stands for
+                rest: int = hashes[id(operands[-1])]
+                for index in range(len(operands) - 2, 0, -1):
+                    rest = hash((None, False, node._logic_operator, hashes[id(operands[index])], rest))
+                hashes[id(node)] = hash((None, node._negation, node._logic_operator, hashes[id(operands[0])], rest))
+            elif children_done or len(operands) == 0:
+                first: Optional[Sentence] = node._first_sentence
+                second: Optional[Sentence] = node._second_sentence
+                hashes[id(node)] = hash((node._symbol, node._negation, node._logic_operator,
+                                         None if first is None else hashes[id(first)],
+                                         None if second is None else hashes[id(second)]))
+            else:
+                stack.append((node, True))
+                stack.extend((operand, False) for operand in operands)
+        return hashes[id(self)]
+
+    def is_structurally_equal(self, other_sentence: Sentence) -> bool:
+        """
+        Returns True if the two Sentences have exactly the same structure, i.e. the same symbols, negations, and
+        operators in the same order. This is the same as comparing to_string(True) but without building the strings.
+        :param other_sentence: The Sentence to compare with
+        :return: A boolean value
+        """
+        stack: List[tuple] = [(self, other_sentence)]
+        while len(stack) > 0:
+            node1, node2 = stack.pop()
+            if node1 is node2:
+                continue
+            if node1 is None or node2 is None:
+                return False
+            symbol1, negation1, operator1, first1, second1 = _binary_parts(node1)
+            symbol2, negation2, operator2, first2, second2 = _binary_parts(node2)
+            if symbol1 != symbol2 or negation1 != negation2 or operator1 != operator2:
+                return False
+            stack.append((first1, first2))
+            stack.append((second1, second2))
+        return True
 
     def clone(self) -> Sentence:
         """
-        Creates a deep copy clone of the current Sentence (self)
+        Creates a deep copy clone of the current Sentence (self). Sub sentences shared within the tree stay shared in
+        the clone, the same as copy.deepcopy.
         :return: A clone of the current Sentence (self)
         """
-        return deepcopy(self)
+        clones: dict = {}
+        stack: List[Sentence] = [self]
+        while len(stack) > 0:
+            node: Sentence = stack[-1]
+            if id(node) in clones:
+                stack.pop()
+                continue
+            pending: List[Sentence] = [operand for operand in node.operands if id(operand) not in clones]
+            if len(pending) > 0:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            first: Optional[Sentence] = node._first_sentence
+            second: Optional[Sentence] = node._second_sentence
+            clone: Sentence = type(node).__new__(type(node))
+            clone._symbol = node._symbol
+            clone._negation = node._negation
+            clone._logic_operator = node._logic_operator
+            clone._is_cnf = node._is_cnf
+            clone._first_sentence = None if first is None else clones[id(first)]
+            clone._second_sentence = None if second is None else clones[id(second)]
+            clone._operands = None if node._operands is None \
+                else tuple(clones[id(operand)] for operand in node._operands)
+            clones[id(node)] = clone
+        return clones[id(self)]
+
+    def __deepcopy__(self, memo: dict) -> Sentence:
+        # copy.deepcopy recurses once per level of the tree, so use the iterative clone instead
+        clone: Sentence = self.clone()
+        memo[id(self)] = clone
+        return clone
 
     def convert_to_cnf(self, or_clauses_only=False) -> Union[Sentence, List[Sentence]]:
         """
@@ -613,6 +928,7 @@ class Sentence:
         while temp_sentence.to_string(True) != sentence.to_string(True):
             temp_sentence = sentence.clone()
             sentence = sentence._transform_distribute_ors()
+        sentence._flatten()
         # Mark this sentence as in cnf format
         sentence._is_cnf = True
         # Is this to be converted into a list of CNF clauses with only or clauses?
@@ -622,95 +938,120 @@ class Sentence:
         else:
             return sentence
 
+    def _flatten(self) -> None:
+        # Turn each right nested chain of the same AND or OR operator (three or more operands) into an n-ary node, in
+        # place. Only the right spine of a chain is flattened so that the n-ary node stands for exactly the same tree.
+        stack: List[Sentence] = [self]
+        while len(stack) > 0:
+            node: Sentence = stack.pop()
+            operator: LogicOperatorTypes = node._logic_operator
+            if node._operands is None and node._second_sentence is not None \
+                    and (operator == LogicOperatorTypes.AND or operator == LogicOperatorTypes.OR):
+                operands: List[Sentence] = [node._first_sentence]
+                rest: Sentence = node._second_sentence
+                while rest._operands is None and rest._second_sentence is not None \
+                        and rest._logic_operator == operator and not rest._negation:
+                    operands.append(rest._first_sentence)
+                    rest = rest._second_sentence
+                if rest._operands is not None and rest._logic_operator == operator and not rest._negation:
+                    operands.extend(rest._operands)
+                else:
+                    operands.append(rest)
+                if len(operands) > 2:
+                    node._operands = tuple(operands)
+                    node._first_sentence = None
+                    node._second_sentence = None
+            stack.extend(node.operands)
+
+    def _shallow_copy(self) -> Sentence:
+        # A new node with the same fields (and the same sub sentences) as this one
+        node: Sentence = Sentence._node(self._symbol, self._logic_operator, self._first_sentence,
+                                        self._second_sentence, self._negation)
+        node._operands = self._operands
+        node._is_cnf = self._is_cnf
+        return node
+
+    def _rewrite_top_down(self, rewrite: Callable[[Sentence], Sentence]) -> Sentence:
+        # Rewrites every node of this sentence from the top down without recursion. rewrite is given a new copy of a
+        # node (which it may change) and returns the node to put in its place, whose sub sentences are then rewritten
+        # the same way. Every node is copied before it is rewritten, so this sentence is left unchanged.
+        top: Sentence = rewrite(self._shallow_copy())
+        stack: List[Sentence] = [top]
+        while len(stack) > 0:
+            node: Sentence = stack.pop()
+            if node._operands is not None:
+                node._operands = tuple(rewrite(operand._shallow_copy()) for operand in node._operands)
+            else:
+                if node._first_sentence is not None:
+                    node._first_sentence = rewrite(node._first_sentence._shallow_copy())
+                if node._second_sentence is not None:
+                    node._second_sentence = rewrite(node._second_sentence._shallow_copy())
+            stack.extend(node.operands)
+        return top
+
     def _transform_conditionals(self) -> Sentence:
-        # Start with a clone to avoid any side effect
-        sentence: Sentence = self.clone()
-        # Transform top level bi-conditional
-        if sentence.logic_operator == LogicOperatorTypes.BI_CONDITIONAL:
-            # Replace bi-conditional (a <=> b) with a => b AND b => a
-            clone_ab: Sentence
-            clone_ba: Sentence
-            temp: Sentence
-            # a => b
-            clone_ab = sentence.clone()
-            clone_ab.negation = False
-            clone_ab.logic_operator = LogicOperatorTypes.IMPLIES
-            # b => a
-            clone_ba = sentence.clone()
-            clone_ba.negation = False
-            temp = clone_ba.first_sentence
-            clone_ba.first_sentence = clone_ba.second_sentence
-            clone_ba.second_sentence = temp
-            clone_ba.logic_operator = LogicOperatorTypes.IMPLIES
-            # And
-            sentence = Sentence(clone_ab, LogicOperatorTypes.AND, clone_ba, negated=sentence.negation)
-        # Transform top level Implies
-        if sentence.logic_operator == LogicOperatorTypes.IMPLIES:
-            # Replace implies (a => b) with ~a OR b
-            neg_first_sentence: Sentence
-            neg_first_sentence = Sentence(sentence.first_sentence, negated=True)
-            # neg_first_sentence = neg_first_sentence.transform_conditionals()
-            sentence.logic_operator = LogicOperatorTypes.OR
-            sentence.first_sentence = neg_first_sentence
-        # Top level should now be transformed -- if sentence is not atomic, recurse down the chain
-        if not sentence.is_atomic:
-            # We have completed the current top node, and it's not a condition, so we need to traverse down
-            sentence.first_sentence = sentence.first_sentence._transform_conditionals()
-            if sentence.second_sentence is not None:
-                sentence.second_sentence = sentence.second_sentence._transform_conditionals()
-        # Return final result
-        return sentence
+        def transform_node(sentence: Sentence) -> Sentence:
+            # Transform bi-conditional
+            if sentence._logic_operator == LogicOperatorTypes.BI_CONDITIONAL:
+                # Replace bi-conditional (a <=> b) with a => b AND b => a
+                # a => b
+                clone_ab: Sentence = Sentence._node(None, LogicOperatorTypes.IMPLIES, sentence._first_sentence,
+                                                    sentence._second_sentence)
+                # b => a
+                clone_ba: Sentence = Sentence._node(None, LogicOperatorTypes.IMPLIES, sentence._second_sentence,
+                                                    sentence._first_sentence)
+                # And
+                sentence = Sentence._node(None, LogicOperatorTypes.AND, clone_ab, clone_ba, sentence._negation)
+            # Transform Implies
+            if sentence._logic_operator == LogicOperatorTypes.IMPLIES:
+                # Replace implies (a => b) with ~a OR b
+                sentence._first_sentence = Sentence(sentence._first_sentence, negated=True)
+                sentence._logic_operator = LogicOperatorTypes.OR
+            return sentence
+        # Transform each node from the top down
+        return self._rewrite_top_down(transform_node)
 
     def _move_not_inward(self) -> Sentence:
-        sentence: Sentence = self.clone()
+        sentence: Sentence = self._shallow_copy()
         # Flip the negation on this sentence
-        sentence.negation = not sentence.negation
+        sentence._negation = not sentence._negation
         # If we now have a non-negated sentence without an operator, then we need to pull it all up one level
-        if sentence.logic_operator == LogicOperatorTypes.NO_OPERATOR and not sentence.negation \
-                and sentence.first_sentence is not None and sentence.second_sentence is None:
-            sentence = sentence.first_sentence
+        if sentence._logic_operator == LogicOperatorTypes.NO_OPERATOR and not sentence._negation \
+                and sentence._first_sentence is not None and sentence._second_sentence is None:
+            sentence = sentence._first_sentence._shallow_copy()
         return sentence
 
     def _transform_not(self) -> Sentence:
-        sentence: Sentence = self.clone()
-        # CNF requires not (~) to appear only in literals
-        if sentence.is_atomic:
-            # if sentence is atomic we just want to leave it as is
-            return sentence
-        else:
-            # sentence is complex
-            if self.negation:
+        def transform_node(sentence: Sentence) -> Sentence:
+            # CNF requires not (~) to appear only in literals, so if sentence is atomic we just want to leave it as is
+            while sentence._negation and not sentence.is_atomic:
                 # This is a complex sentence with a negation, so deal with it
-                sentence.negation = False
+                sentence._negation = False
+                operands: Tuple[Sentence, ...] = sentence.operands
+                if len(operands) == 1:
+                    # This is a 'negation' only sentence, so pull it up one level (and deal with it again)
+                    sentence = operands[0]._move_not_inward()
+                    continue
+                # This ia a regular logical operation. Flip ands and ors because it was negated
+                if sentence._logic_operator == LogicOperatorTypes.AND:
+                    sentence._logic_operator = LogicOperatorTypes.OR
+                elif sentence._logic_operator == LogicOperatorTypes.OR:
+                    sentence._logic_operator = LogicOperatorTypes.AND
+                else:
+                    # Throw an error if we don't yet have all other types of operators removed by now
+                    raise SentenceError("Do not call transform_not without first calling transform_conditionals.")
                 # Flip negation sign on one level down because we just removed the negation at this level
-                if sentence.second_sentence is None:
-                    # This is a 'negation' only sentence, so pull it up one level
-                    sentence = sentence.first_sentence._move_not_inward()
-                    if not sentence.is_atomic:
-                        sentence = sentence._transform_not()
-                else:  # if sentence.second_sentence is not None:
-                    # This ia a regular two sentence logical operation
-                    sentence.first_sentence = sentence.first_sentence._move_not_inward()
-                    # Flip ands and ors because this is a regular complex sentence that was negated
-                    if sentence.logic_operator == LogicOperatorTypes.AND:
-                        sentence.logic_operator = LogicOperatorTypes.OR
-                    elif sentence.logic_operator == LogicOperatorTypes.OR:
-                        sentence.logic_operator = LogicOperatorTypes.AND
-                    else:
-                        # Throw an error if we don't yet have all other types of operators removed by now
-                        raise SentenceError("Do not call transform_not without first calling transform_conditionals.")
-                    # Flip negation sign on one level down because we just removed the negation at this level
-                    sentence.second_sentence = sentence.second_sentence._move_not_inward()
-            # Recurse down to the level
-            if sentence.first_sentence is not None:
-                sentence.first_sentence = sentence.first_sentence._transform_not()
-            if sentence.second_sentence is not None:
-                sentence.second_sentence = sentence.second_sentence._transform_not()
-            # Return final complex sentence
+                if sentence._operands is not None:
+                    sentence._operands = tuple(operand._move_not_inward() for operand in operands)
+                else:
+                    sentence._first_sentence = sentence._first_sentence._move_not_inward()
+                    sentence._second_sentence = sentence._second_sentence._move_not_inward()
             return sentence
+        # Transform each node from the top down
+        return self._rewrite_top_down(transform_node)
 
     def _redistribute_or(self, sub_sentence: Sentence) -> Sentence:
-        sentence: Sentence = self.clone()
+        sentence: Sentence = self._shallow_copy()
         # This function should only be called if self is guaranteed to be an AND clause
         if self.logic_operator != LogicOperatorTypes.AND:
             raise SentenceError("redistribute_or can only be called on a sentence whose top node is an AND clause.")
@@ -721,43 +1062,28 @@ class Sentence:
             return sentence
 
     def _transform_distribute_ors(self) -> Sentence:
-        sentence: Sentence = self.clone()
-        sub_sentence: Sentence
-        # This function assumes there are no logical operators except "AND" and "OR" plus NOT next to only literals
-        # Anything else will throw an error
-        if sentence.is_atomic:
-            # Atomic sentences don't need to change, so just return them
+        def transform_node(sentence: Sentence) -> Sentence:
+            # This function assumes there are no logical operators except "AND" and "OR" plus NOT next to only
+            # literals. Anything else will throw an error
+            if sentence.is_atomic:
+                # Atomic sentences don't need to change, so just return them
+                return sentence
+            elif sentence._logic_operator == LogicOperatorTypes.OR:
+                # Top level is an Or operator. Distributing works on the binary chain, so an n-ary OR turns into it.
+                if sentence.first_sentence._logic_operator == LogicOperatorTypes.AND:
+                    # We have an OR above an AND on the left side
+                    # Grab the right side to redistribute over the left side and put it under each AND clause
+                    return sentence.first_sentence._redistribute_or(sentence.second_sentence)
+                elif sentence.second_sentence._logic_operator == LogicOperatorTypes.AND:
+                    # We have an OR above an AND on right side
+                    # Grab the left side to redistribute over the right side and put it under each AND clause
+                    return sentence.second_sentence._redistribute_or(sentence.first_sentence)
+            elif sentence._logic_operator != LogicOperatorTypes.AND \
+                    and sentence._logic_operator != LogicOperatorTypes.NO_OPERATOR:
+                raise SentenceError("Encountered an illegal operator type in _transform_distribute_ors.")
             return sentence
-        elif sentence.logic_operator == LogicOperatorTypes.OR:
-            # Top level is an Or operator
-            if sentence.first_sentence.logic_operator == LogicOperatorTypes.AND:
-                # We have an OR above an AND on right side
-                # Grab the left side to redistribute over the right side
-                sub_sentence = sentence.second_sentence.clone()
-                # Drop the right side
-                sentence = sentence.first_sentence.clone()
-                # Now traverse the AND plus anymore beneath it and put the left under each AND clause
-                sentence = sentence._redistribute_or(sub_sentence)
-            elif sentence.second_sentence.logic_operator == LogicOperatorTypes.AND:
-                # We have an OR above an AND on right side
-                # Grab the left side to redistribute over the right side
-                sub_sentence = sentence.first_sentence.clone()
-                # Drop the right side
-                sentence = sentence.second_sentence.clone()
-                # Now traverse the AND plus anymore beneath it and put the left under each AND clause
-                sentence = sentence._redistribute_or(sub_sentence)
-        elif sentence.logic_operator == LogicOperatorTypes.AND:
-            pass
-        elif sentence.logic_operator == LogicOperatorTypes.NO_OPERATOR:
-            pass
-        else:
-            raise SentenceError("Encountered an illegal operator type in _transform_distribute_ors.")
-
-        # Recurse down
-        sentence.first_sentence = sentence.first_sentence._transform_distribute_ors()
-        if sentence.second_sentence is not None:
-            sentence.second_sentence = sentence.second_sentence._transform_distribute_ors()
-        return sentence
+        # Transform each node from the top down
+        return self._rewrite_top_down(transform_node)
 
     def _is_valid_cnf_or_only(self) -> bool:
         # The rules are the same as for the _is_valid_cnf_include_and version except for the following:
@@ -768,10 +1094,10 @@ class Sentence:
         def is_valid_node(sentence: Sentence) -> bool:
             if sentence.is_atomic:
                 return True
-            elif not sentence.is_atomic and sentence.second_sentence is None:
+            elif len(sentence.operands) < 2:
                 # CNF should always have a second sentence unless it is atomic
                 return False
-            elif not sentence.is_atomic and sentence.negation:
+            elif sentence.negation:
                 # CNF should never have negated sentences unless they are literals (i.e. atomic)
                 return False
             elif sentence.logic_operator == LogicOperatorTypes.OR:
@@ -779,12 +1105,14 @@ class Sentence:
                 return True
             else:
                 return False
-        # Recursively validate entire sentence is CNF format
-        if self.is_atomic:
-            return is_valid_node(self)
-        else:
-            return is_valid_node(self) and self.first_sentence._is_valid_cnf_or_only() \
-                     and self.second_sentence._is_valid_cnf_or_only()
+        # Validate the entire sentence is in CNF format, without recursion so long clauses can't overflow the stack
+        stack: List[Sentence] = [self]
+        while len(stack) > 0:
+            sentence: Sentence = stack.pop()
+            if not is_valid_node(sentence):
+                return False
+            stack.extend(sentence.operands)
+        return True
 
     def _is_valid_cnf_include_and(self,  previous_or: bool) -> bool:
         # This function will verify that the current sentence is really in CNF formatting
@@ -798,18 +1126,14 @@ class Sentence:
         def is_valid_node(sentence: Sentence, current_previous_or: bool) -> bool:
             if sentence.is_atomic:
                 return True
-            elif not sentence.is_atomic and sentence.second_sentence is None:
+            elif len(sentence.operands) < 2:
                 # CNF should always have a second sentence unless it is atomic
                 return False
-            elif not sentence.is_atomic and sentence.negation:
+            elif sentence.negation:
                 # CNF should never have negated sentences unless they are literals (i.e. atomic)
                 return False
             elif sentence.logic_operator == LogicOperatorTypes.OR:
-                # CNF never has OR clauses with And clauses under them
-                if sentence.first_sentence.logic_operator == LogicOperatorTypes.AND:
-                    return False
-                elif sentence.second_sentence.second_sentence == LogicOperatorTypes.AND:
-                    return False
+                # CNF never has OR clauses with And clauses under them (checked as each operand is visited)
                 return True
             elif sentence.logic_operator == LogicOperatorTypes.AND:
                 if current_previous_or:
@@ -818,15 +1142,16 @@ class Sentence:
                     return True
             else:
                 return False
-        # Recursively validate entire sentence is CNF format
-        if self.logic_operator == LogicOperatorTypes.OR:
-            previous_or = True
-        if self.is_atomic:
-            return is_valid_node(self, previous_or)
-        else:
-            return is_valid_node(self, previous_or) \
-                   and self.first_sentence._is_valid_cnf_include_and(previous_or=previous_or) \
-                   and self.second_sentence._is_valid_cnf_include_and(previous_or=previous_or)
+        # Validate the entire sentence is in CNF format, without recursion so long clauses can't overflow the stack
+        stack: List[Tuple[Sentence, bool]] = [(self, previous_or)]
+        while len(stack) > 0:
+            sentence, sentence_previous_or = stack.pop()
+            if sentence.logic_operator == LogicOperatorTypes.OR:
+                sentence_previous_or = True
+            if not is_valid_node(sentence, sentence_previous_or):
+                return False
+            stack.extend((operand, sentence_previous_or) for operand in sentence.operands)
+        return True
 
     def is_valid_cnf(self, or_clauses_only=False) -> bool:
         """
@@ -840,3 +1165,53 @@ class Sentence:
         else:
             self._is_cnf = self._is_valid_cnf_include_and(previous_or=False)
         return self._is_cnf
+
+
+class Clause:
+    """
+    Builds CNF clauses (ORs of literals) straight from literals, without building a string to parse.
+
+    Usage
+    _____
+    clause: Sentence = Clause.from_literals(['A', '~B', 'C'])
+
+    clause: Sentence = Clause.from_literals([1, -2, 3], ['A', 'B', 'C'])
+    """
+    @staticmethod
+    def _literal(literal: Union[int, str, LogicSymbol], symbol_names: Optional[List[str]]) -> Sentence:
+        if isinstance(literal, int):
+            name: str = symbol_table().name(abs(literal)) if symbol_names is None else symbol_names[abs(literal) - 1]
+            return Sentence._node(intern_symbol(name), LogicOperatorTypes.NO_OPERATOR, None, None, literal < 0)
+        elif isinstance(literal, str):
+            if literal.startswith("~"):
+                return Sentence.atom(literal[1:], negated=True)
+            return Sentence.atom(literal)
+        elif isinstance(literal, LogicSymbol):
+            if literal.value == LogicValue.UNDEFINED:
+                raise SentenceError("A clause literal can't have an UNDEFINED value.")
+            return Sentence._node(literal.name, LogicOperatorTypes.NO_OPERATOR, None, None,
+                                  literal.value == LogicValue.FALSE)
+        raise SentenceError("Clause literals must be integers, strings, or LogicSymbols.")
+
+    @staticmethod
+    def from_literals(literals: Iterable[Union[int, str, LogicSymbol]],
+                      symbol_names: Optional[List[str]] = None) -> Sentence:
+        """
+        Builds a clause Sentence out of literals, in the order given. Each literal can be:
+        an integer symbol id (negative for a negated literal), a symbol name with an optional '~' in front, or a
+        LogicSymbol whose value (TRUE or FALSE) says if the literal is negated.
+        :param literals: The literals of the clause
+        :param symbol_names: The symbol table integer literals index into (symbol_names[id - 1] is the name of symbol
+        id). If not given, integer literals are ids in the process wide symbol table (see proplogic.symbol).
+        :return: A Sentence marked as being in CNF format. No literals gives the empty clause (an empty Sentence).
+        """
+        literal_sentences: List[Sentence] = [Clause._literal(literal, symbol_names) for literal in literals]
+        result: Sentence
+        if len(literal_sentences) == 0:
+            result = Sentence()
+        elif len(literal_sentences) == 1:
+            result = literal_sentences[0]
+        else:
+            result = Sentence._nary(LogicOperatorTypes.OR, literal_sentences)
+        result._is_cnf = True
+        return result
@@ -0,0 +1,113 @@
+from __future__ import annotations
+from typing import List, Dict, Set, Iterable, Optional, Collection
+import proplogic.knowledge_base as kb
+from proplogic.sentence import Sentence
+
+# Cone-of-influence slicing
+#
+# A query can only be affected by the sentences it shares a symbol with, the sentences those share a symbol with,
+# and so on. Everything else in the knowledge base shares no symbols with the query and so can't change the answer
+# (as long as it is consistent). The SymbolIndex maps each symbol to the sentences it appears in so that the
+# sentences reachable from a query can be found without looking at the rest of the knowledge base.
+
+
+class SymbolIndex:
+    """
+    An index from symbol name to the sentences that contain that symbol. PLKnowledgeBase keeps one up to date as
+    sentences are added and retracted.
+
+    An index can be layered on top of a base index (as a KBOverlay does). Lookups then include the base index's
+    sentences, but add and remove only change this layer.
+    """
+    def __init__(self, sentences: Iterable[Sentence] = (), base: SymbolIndex = None) -> None:
+        self._sentences: Dict[str, List[Sentence]] = {}
+        self._base: Optional[SymbolIndex] = base
+        for sentence in sentences:
+            self.add(sentence)
+
+    def __len__(self) -> int:
+        return len(self._symbols())
+
+    @property
+    def base(self) -> Optional[SymbolIndex]:
+        return self._base
+
+    def _symbols(self) -> Collection[str]:
+        if self._base is None:
+            return self._sentences.keys()
+        return set(self._sentences) | set(self._base._symbols())
+
+    def _lookup(self, symbol: str) -> List[Sentence]:
+        if self._base is None:
+            return self._sentences.get(symbol, [])
+        return self._base._lookup(symbol) + self._sentences.get(symbol, [])
+
+    def add(self, sentence: Sentence) -> None:
+        """
+        Indexes a sentence under each of its symbols.
+        :param sentence: The Sentence to add
+        :return: None
+        """
+        for symbol in sentence.get_symbol_list().get_keys():
+            self._sentences.setdefault(symbol, []).append(sentence)
+
+    def remove(self, sentence: Sentence) -> None:
+        """
+        Removes a sentence from the index. Sentences are matched by identity, not by value. Sentences that are not in
+        this layer (including any only in the base index) are ignored.
+        :param sentence: The Sentence to remove
+        :return: None
+        """
+        for symbol in sentence.get_symbol_list().get_keys():
+            sentences: List[Sentence] = self._sentences.get(symbol, [])
+            for index in range(len(sentences)):
+                if sentences[index] is sentence:
+                    del sentences[index]
+                    break
+            if len(sentences) == 0:
+                self._sentences.pop(symbol, None)
+
+    def sentences_with(self, symbol: str) -> List[Sentence]:
+        """
+        :param symbol: A symbol name
+        :return: The sentences that contain the symbol
+        """
+        return self._lookup(symbol.upper())
+
+    def cone_of_influence(self, symbols: Iterable[str]) -> List[Sentence]:
+        """
+        Finds every sentence connected to the given symbols through a chain of shared symbols.
+        :param symbols: The symbol names to start from (i.e. the symbols of a query)
+        :return: The connected sentences in the order they were reached
+        """
+        reached: List[Sentence] = []
+        seen_sentences: Set[int] = set()
+        seen_symbols: Set[str] = set()
+        pending: List[str] = [symbol.upper() for symbol in symbols]
+        while len(pending) > 0:
+            symbol: str = pending.pop()
+            if symbol in seen_symbols:
+                continue
+            seen_symbols.add(symbol)
+            for sentence in self._lookup(symbol):
+                if id(sentence) in seen_sentences:
+                    continue
+                seen_sentences.add(id(sentence))
+                reached.append(sentence)
+                pending.extend(sentence.get_symbol_list().get_keys())
+        return reached
+
+
+def slice_knowledge_base(knowledge_base: kb.PLKnowledgeBase, index: SymbolIndex,
+                         query: Sentence) -> kb.PLKnowledgeBase:
+    """
+    Builds a knowledge base out of just the sentences in the cone of influence of a query.
+    :param knowledge_base: The PLKnowledgeBase to slice
+    :param index: A SymbolIndex that is up to date with knowledge_base
+    :param query: The query Sentence
+    :return: A new PLKnowledgeBase sharing the sentences that can affect the query
+    """
+    sliced_kb: kb.PLKnowledgeBase = kb.PLKnowledgeBase()
+    sliced_kb._sentences = index.cone_of_influence(query.get_symbol_list().get_keys())
+    sliced_kb._is_cnf = knowledge_base.is_cnf
+    return sliced_kb
@@ -0,0 +1,239 @@
+from __future__ import annotations
+from typing import List, Dict, Optional, Union
+from collections.abc import MutableSequence
+from array import array
+from copy import deepcopy
+import mmap
+import struct
+import sys
+import proplogic.knowledge_base as kb
+from proplogic.sentence import Sentence
+from proplogic.symbol import intern_symbol
+from proplogic.cnf import clause_to_literals, literals_to_sentence, kb_to_clauses
+
+# Binary snapshot file layout (all integers little endian)
+#
+# Header:          magic (4 bytes 'PLKB'), version, symbol count, clause count, literal count, name bytes (uint32 each)
+# Name offsets:    uint32[symbol count + 1] -- byte offsets of each symbol name into the name blob
+# Name blob:       utf-8 symbol names, padded with zeros to a multiple of 4 bytes
+# Clause offsets:  uint32[clause count + 1] -- offsets of each clause into the literal array
+# Literals:        int32[literal count] -- see proplogic.cnf for the integer clause format
+
+_MAGIC: bytes = b'PLKB'
+_VERSION: int = 1
+_HEADER: struct.Struct = struct.Struct('<4sIIIII')
+
+
+class SnapshotError(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+
+
+def _to_little_endian(values: array) -> bytes:
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _padding(size: int) -> bytes:
+    return b'\x00' * (-size % 4)
+
+
+def save_snapshot(knowledge_base: kb.PLKnowledgeBase, path: str) -> None:
+    """
+    Saves a knowledge base to a compact binary snapshot file that can be loaded back with load_snapshot.
+    The knowledge base is stored in CNF format, so if it isn't already in CNF format it is converted first (the
+    knowledge base passed in is left unchanged).
+    :param knowledge_base: The PLKnowledgeBase to save
+    :param path: The file to write the snapshot to
+    :return: None
+    """
+    symbol_names: List[str]
+    clauses: List[List[int]]
+    symbol_names, clauses = kb_to_clauses(knowledge_base)
+    clause_offsets: array = array('I', [0])
+    literals: array = array('i')
+    for clause in clauses:
+        literals.extend(clause)
+        clause_offsets.append(len(literals))
+    # Build the symbol table
+    name_offsets: array = array('I', [0])
+    name_blob: bytearray = bytearray()
+    for name in symbol_names:
+        name_blob.extend(name.encode('utf-8'))
+        name_offsets.append(len(name_blob))
+
+    with open(path, 'wb') as file:
+        file.write(_HEADER.pack(_MAGIC, _VERSION, len(symbol_names), len(clause_offsets) - 1, len(literals),
+                                len(name_blob)))
+        file.write(_to_little_endian(name_offsets))
+        file.write(bytes(name_blob) + _padding(len(name_blob)))
+        file.write(_to_little_endian(clause_offsets))
+        file.write(_to_little_endian(literals))
+
+
+def load_snapshot(path: str) -> kb.PLKnowledgeBase:
+    """
+    Loads a knowledge base saved with save_snapshot. The file is memory mapped and no Sentence is created until
+    it is actually asked for, so loading is fast no matter how large the knowledge base is.
+    :param path: The snapshot file to load
+    :return: A PLKnowledgeBase in CNF format
+    """
+    snapshot: KBSnapshot = KBSnapshot(path)
+    new_kb: kb.PLKnowledgeBase = kb.PLKnowledgeBase()
+    new_kb._sentences = _SnapshotSentences(snapshot)
+    new_kb._is_cnf = True
+    return new_kb
+
+
+class KBSnapshot:
+    """
+    A read only, memory mapped view of a snapshot file. Gives access to the symbol table and to each clause either
+    as integer literals or as a Sentence (built on request).
+
+    Usage
+    _____
+    snapshot = KBSnapshot('rules.plkb')
+
+    literals: List[int] = snapshot.literals(0)
+
+    clause: Sentence = snapshot.sentence(0)
+    """
+    def __init__(self, path: str) -> None:
+        with open(path, 'rb') as file:
+            self._mmap: mmap.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < _HEADER.size:
+            raise SnapshotError("File '" + path + "' is too small to be a knowledge base snapshot.")
+        magic, version, symbol_count, clause_count, literal_count, name_bytes = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC:
+            raise SnapshotError("File '" + path + "' is not a knowledge base snapshot.")
+        if version != _VERSION:
+            raise SnapshotError("Unsupported knowledge base snapshot version: " + str(version))
+        # Work out where each section starts
+        name_offsets_start: int = _HEADER.size
+        names_start: int = name_offsets_start + 4 * (symbol_count + 1)
+        clause_offsets_start: int = names_start + name_bytes + len(_padding(name_bytes))
+        literals_start: int = clause_offsets_start + 4 * (clause_count + 1)
+        if len(self._mmap) < literals_start + 4 * literal_count:
+            raise SnapshotError("File '" + path + "' is a truncated knowledge base snapshot.")
+        self._symbol_count: int = symbol_count
+        self._clause_count: int = clause_count
+        self._symbol_names: Optional[List[str]] = None
+        self._names: memoryview = memoryview(self._mmap)[names_start:names_start + name_bytes]
+        self._name_offsets: Union[memoryview, array] = \
+            self._section(name_offsets_start, symbol_count + 1, 'I')
+        self._clause_offsets: Union[memoryview, array] = \
+            self._section(clause_offsets_start, clause_count + 1, 'I')
+        self._literals: Union[memoryview, array] = self._section(literals_start, literal_count, 'i')
+
+    def _section(self, start: int, count: int, typecode: str) -> Union[memoryview, array]:
+        view: memoryview = memoryview(self._mmap)[start:start + 4 * count]
+        if sys.byteorder == 'little':
+            # Zero copy view straight into the file
+            return view.cast(typecode)
+        # On a big endian machine we have to make a byte swapped copy instead
+        values: array = array(typecode, view.tobytes())
+        values.byteswap()
+        view.release()
+        return values
+
+    @property
+    def clause_count(self) -> int:
+        return self._clause_count
+
+    @property
+    def symbol_names(self) -> List[str]:
+        """
+        The symbol table for this snapshot. Decoded the first time it is asked for.
+        :return: A list of symbol names where symbol_names[id - 1] is the name of symbol id
+        """
+        if self._symbol_names is None:
+            offsets = self._name_offsets
+            names: bytes = self._names.tobytes()
+            self._symbol_names = [intern_symbol(names[offsets[i]:offsets[i + 1]].decode('utf-8'))
+                                  for i in range(self._symbol_count)]
+        return self._symbol_names
+
+    def literals(self, index: int) -> List[int]:
+        """
+        Returns the clause at index as a list of integer literals. (See proplogic.cnf for the format.)
+        :param index: The index of the clause
+        :return: A list of integer literals
+        """
+        if index < 0 or index >= self._clause_count:
+            raise SnapshotError("Attempted to get a clause from a snapshot with index out of bounds.")
+        return self._literals[self._clause_offsets[index]:self._clause_offsets[index + 1]].tolist()
+
+    def sentence(self, index: int) -> Sentence:
+        """
+        Builds the Sentence for the clause at index.
+        :param index: The index of the clause
+        :return: A CNF Sentence
+        """
+        return literals_to_sentence(self.literals(index), self.symbol_names)
+
+    def close(self) -> None:
+        """
+        Releases the memory map. The snapshot can't be used after this.
+        :return: None
+        """
+        for view in (self._names, self._name_offsets, self._clause_offsets, self._literals):
+            if isinstance(view, memoryview):
+                view.release()
+        self._mmap.close()
+
+
+class _SnapshotSentences(MutableSequence):
+    # The sentence list of a knowledge base loaded from a snapshot. Each item is either a Sentence or (until it is
+    # asked for) the int index of the clause in the snapshot, so a Sentence is only built when it is needed.
+    def __init__(self, snapshot: KBSnapshot, items: List[Union[Sentence, int]] = None) -> None:
+        self._snapshot: KBSnapshot = snapshot
+        self._items: List[Union[Sentence, int]] = list(range(snapshot.clause_count)) if items is None else items
+
+    def clause_literals(self, index: int, symbol_ids: Dict[str, int], symbol_names: List[str]) -> List[int]:
+        # Same as proplogic.cnf.clause_to_literals but doesn't build the Sentence if it hasn't been built yet
+        item: Union[Sentence, int] = self._items[index]
+        if not isinstance(item, int):
+            return clause_to_literals(item, symbol_ids, symbol_names)
+        snapshot_names: List[str] = self._snapshot.symbol_names
+        literals: List[int] = []
+        for literal in self._snapshot.literals(item):
+            name: str = snapshot_names[abs(literal) - 1]
+            symbol_id: int = symbol_ids.get(name, 0)
+            if symbol_id == 0:
+                symbol_names.append(name)
+                symbol_id = len(symbol_names)
+                symbol_ids[name] = symbol_id
+            literals.append(symbol_id if literal > 0 else -symbol_id)
+        return literals
+
+    def _build(self, index: int) -> Sentence:
+        item: Union[Sentence, int] = self._items[index]
+        if isinstance(item, int):
+            item = self._snapshot.sentence(item)
+            self._items[index] = item
+        return item
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Sentence, List[Sentence]]:
+        if isinstance(index, slice):
+            return [self._build(i) for i in range(*index.indices(len(self._items)))]
+        return self._build(index)
+
+    def __setitem__(self, index: int, value: Sentence) -> None:
+        self._items[index] = value
+
+    def __delitem__(self, index: int) -> None:
+        del self._items[index]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def insert(self, index: int, value: Sentence) -> None:
+        self._items.insert(index, value)
+
+    def __deepcopy__(self, memo: dict) -> _SnapshotSentences:
+        # Share the (read only) snapshot and only copy the Sentences that have already been built
+        items: List[Union[Sentence, int]] = [item if isinstance(item, int) else deepcopy(item, memo)
+                                             for item in self._items]
+        return _SnapshotSentences(self._snapshot, items)
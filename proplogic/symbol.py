@@ -1,7 +1,10 @@
 from __future__ import annotations
-from typing import Optional, List, Union, Tuple
-from copy import deepcopy
+from typing import Optional, List, Union, Tuple, Dict
+from array import array
+from bisect import bisect_left, insort
 from enum import Enum
+from threading import Lock
+import sys
 
 
 def _slice_to_ints(a_slice: slice, max_index: int) -> list:
@@ -101,9 +104,11 @@ class LogicSymbol:
     A LogicSymbol is a class with a name (string) and value (LogicValue) for each Symbol.
     Also contains and_op and or_op functions to perform 'AND' and 'OR' operations on LogicSymbol(s)
     """
+    __slots__ = ('_name', '_value')
+
     def __init__(self, name: str, value: LogicValue = LogicValue.UNDEFINED) -> None:
         if name.isalnum() and name[0].isalpha():
-            self._name = name
+            self._name = intern_symbol(name)
         else:
             raise LogicSymbolError("Logic symbols must start with an alpha and then be alphanumeric.")
         self.value = value
@@ -118,7 +123,7 @@ class LogicSymbol:
             return False
 
     def __hash__(self) -> int:
-        return hash(repr(self))
+        return hash((self._name, self._value))
 
     def __lt__(self, other):
         return self.name < other.name
@@ -127,6 +132,13 @@ class LogicSymbol:
     def name(self) -> str:
         return self._name
 
+    @property
+    def id(self) -> int:
+        """
+        :return: The id of this symbol in the process wide symbol table (see symbol_table)
+        """
+        return _symbol_table.get_id(self._name)
+
     @property
     def value(self) -> LogicValue:
         return self._value
@@ -167,7 +179,176 @@ class SymbolListError(Exception):
         super().__init__(message)
 
 
+class SymbolTable:
+    """
+    A SymbolTable gives each symbol name a dense integer id, starting at 1, so that symbols can be stored in arrays
+    indexed by id rather than in dictionaries keyed by name. Ids are never reused or removed.
+    """
+    __slots__ = ('_ids', '_names', '_lock')
+
+    def __init__(self) -> None:
+        self._ids: Dict[str, int] = {}
+        # Index 0 is unused so that ids can also be used as positive literals
+        self._names: List[Optional[str]] = [None]
+        # Guards adding names so that two threads can't give out the same id
+        self._lock: Lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._names) - 1
+
+    def __getstate__(self) -> Tuple[Dict[str, int], List[Optional[str]]]:
+        # A Lock can't be pickled, so a SymbolTable gets a new one when it is unpickled
+        return self._ids, self._names
+
+    def __setstate__(self, state: Tuple[Dict[str, int], List[Optional[str]]]) -> None:
+        self._ids, self._names = state
+        self._lock = Lock()
+
+    def intern(self, name: str) -> int:
+        """
+        Gets the id for a symbol name, adding it to the table if it isn't there yet.
+        :param name: The symbol name
+        :return: The integer id of the symbol
+        """
+        symbol_id: Optional[int] = self._ids.get(name)
+        if symbol_id is None:
+            with self._lock:
+                # Another thread may have added it since the lookup above
+                symbol_id = self._ids.get(name)
+                if symbol_id is None:
+                    # Share one copy of each name string
+                    name = sys.intern(name)
+                    symbol_id = len(self._names)
+                    self._names.append(name)
+                    self._ids[name] = symbol_id
+        return symbol_id
+
+    def get_id(self, name: str) -> Optional[int]:
+        """
+        :param name: The symbol name
+        :return: The integer id of the symbol or None if it isn't in the table
+        """
+        return self._ids.get(name)
+
+    def name(self, symbol_id: int) -> str:
+        """
+        :param symbol_id: The integer id of a symbol
+        :return: The name of the symbol
+        """
+        return self._names[symbol_id]
+
+
+# The process wide symbol table. Every symbol name gets one id the first time it is seen (when parsed or when a
+# LogicSymbol or Sentence is created) and keeps it for the life of the process, so models built anywhere agree on ids.
+_symbol_table: SymbolTable = SymbolTable()
+
+
+def symbol_table() -> SymbolTable:
+    """
+    :return: The process wide SymbolTable shared by every Sentence, LogicSymbol, and SymbolList
+    """
+    return _symbol_table
+
+
+def intern_symbol(name: str) -> str:
+    """
+    Adds a symbol name to the process wide symbol table (if not already there) and returns the shared copy of the
+    name, so that every Sentence and LogicSymbol with that symbol refers to the same string.
+    :param name: The symbol name
+    :return: The interned name
+    """
+    return _symbol_table.name(_symbol_table.intern(name))
+
+
+# Marks a symbol id that has no entry in a CompactModel
+_ABSENT: int = -2
+# LogicValue for each value code. Index -1 (the last one) is UNDEFINED.
+_CODE_TO_VALUE: Tuple[LogicValue, ...] = (LogicValue.FALSE, LogicValue.TRUE, LogicValue.UNDEFINED)
+
+
+class CompactModel:
+    """
+    A model stored as an int8 array of LogicValue codes (1 = TRUE, 0 = FALSE, -1 = UNDEFINED) indexed by symbol id
+    (see SymbolTable). Getting, setting, and flipping a value are O(1) and copying the model is a single memory copy.
+    A symbol id can also be absent from the model altogether.
+    """
+    __slots__ = ('_values', '_count')
+
+    def __init__(self, size: int = 0) -> None:
+        """
+        :param size: The largest symbol id expected. The model grows as needed anyway.
+        """
+        self._values: array = array('b', [_ABSENT]) * (size + 1)
+        self._count: int = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def values(self) -> array:
+        """
+        The raw array of value codes indexed by symbol id. Absent symbols hold -2.
+        :return: An array of type 'b'
+        """
+        return self._values
+
+    def _grow(self, symbol_id: int) -> None:
+        if symbol_id >= len(self._values):
+            self._values.extend(array('b', [_ABSENT]) * (symbol_id + 1 - len(self._values)))
+
+    def contains(self, symbol_id: int) -> bool:
+        return symbol_id < len(self._values) and self._values[symbol_id] != _ABSENT
+
+    def get(self, symbol_id: int) -> int:
+        """
+        :param symbol_id: The symbol id
+        :return: The value code of the symbol. Absent symbols are UNDEFINED (-1).
+        """
+        if symbol_id < len(self._values):
+            code: int = self._values[symbol_id]
+            if code != _ABSENT:
+                return code
+        return LogicValue.UNDEFINED.value
+
+    def set(self, symbol_id: int, code: int) -> None:
+        """
+        Sets the value code of a symbol, adding the symbol if it is absent.
+        :param symbol_id: The symbol id
+        :param code: The LogicValue code (1, 0, or -1)
+        :return: None
+        """
+        self._grow(symbol_id)
+        if self._values[symbol_id] == _ABSENT:
+            self._count += 1
+        self._values[symbol_id] = code
+
+    def flip(self, symbol_id: int) -> None:
+        """
+        Flips TRUE to FALSE and FALSE to TRUE. UNDEFINED and absent symbols are left alone.
+        :param symbol_id: The symbol id
+        :return: None
+        """
+        if symbol_id < len(self._values) and self._values[symbol_id] >= 0:
+            self._values[symbol_id] = 1 - self._values[symbol_id]
+
+    def remove(self, symbol_id: int) -> None:
+        if self.contains(symbol_id):
+            self._values[symbol_id] = _ABSENT
+            self._count -= 1
+
+    def copy(self) -> CompactModel:
+        """
+        :return: A copy of this model
+        """
+        new_model: CompactModel = CompactModel.__new__(CompactModel)
+        new_model._values = self._values[:]
+        new_model._count = self._count
+        return new_model
+
+
 class _SymbolListIterator:
+    __slots__ = ('_symbol_list', '_index')
+
     def __init__(self, symbol_list: SymbolList):
         self._symbol_list: List[str] = symbol_list.get_keys()
         self._index: int = 0
@@ -186,23 +367,36 @@ class SymbolList:
     """
     A SymbolList is a list of LogicSymbol(s) with related methods. It can be iterated and sliced like a list with all
     symbols sorted in alphabetical order.
+
+    Values are stored in a CompactModel indexed by the symbol ids of a SymbolTable, by default the process wide one
+    (see symbol_table). Clones share the same SymbolTable so cloning is just a copy of the value array and the sorted
+    list of names.
     """
+    __slots__ = ('_table', '_model', '_keys')
 
     # See https://riptutorial.com/python/example/1571/indexing-custom-classes----getitem------setitem---and---delitem--
     # for now to implement getitem setitem related stuff
-    def __init__(self) -> None:
-        self._symbols: dict[str, LogicValue] = {}
+    def __init__(self, table: SymbolTable = None) -> None:
+        self._table: SymbolTable = _symbol_table if table is None else table
+        self._model: CompactModel = CompactModel()
+        # Symbol names kept in sorted order
+        self._keys: List[str] = []
 
     def __iter__(self) -> _SymbolListIterator:
         return _SymbolListIterator(self)
 
     def __repr__(self) -> str:
         repr_str: str = ""
-        keys: List[str] = self.get_keys()
-        for symbol_name in keys:
-            repr_str += symbol_name + ": " + repr(self._symbols[symbol_name]) + "; "
+        for symbol_name in self._keys:
+            repr_str += symbol_name + ": " + repr(self._value_of(symbol_name)) + "; "
         return repr_str
 
+    def __copy__(self) -> SymbolList:
+        return self.clone()
+
+    def __deepcopy__(self, memo: dict) -> SymbolList:
+        return self.clone()
+
     def __getitem__(self, indexes: Union[Tuple[int, int], str, int, list]) \
             -> Union[LogicSymbol, LogicValue, SymbolList]:
         if isinstance(indexes, str):
@@ -214,7 +408,7 @@ class SymbolList:
                 return self.get_symbol(index_list[0])
             # We have a list of indexes, now turn it into a new SymbolList
             output: List[LogicSymbol] = [self.get_symbol(i) for i in index_list]
-            new_symbol_list: SymbolList = SymbolList()
+            new_symbol_list: SymbolList = SymbolList(self._table)
             new_symbol_list.add(output)
             return new_symbol_list
 
@@ -227,31 +421,67 @@ class SymbolList:
 
     def __delitem__(self, index: Union[str, int]) -> None:
         if isinstance(index, str):
-            self._symbols.pop(index)
+            if self._table.get_id(index) is None or not self._model.contains(self._table.get_id(index)):
+                raise KeyError(index)
+            self._remove(index)
         else:
-            keys: List[str] = self.get_keys()
-            key = keys[index]
-            self._symbols.pop(key)
+            self._remove(self._keys[index])
+
+    @property
+    def auto_sort(self) -> bool:
+        """
+        A SymbolList is always kept in alphabetical order, so this is always True. Setting it is allowed (for code
+        written against older versions) but has no effect.
+        :return: True
+        """
+        return True
+
+    @auto_sort.setter
+    def auto_sort(self, value: bool) -> None:
+        pass
+
+    @property
+    def table(self) -> SymbolTable:
+        """
+        :return: The SymbolTable that gives the symbol ids used by this SymbolList
+        """
+        return self._table
+
+    @property
+    def model(self) -> CompactModel:
+        """
+        :return: The CompactModel holding the values, indexed by the symbol ids in table
+        """
+        return self._model
+
+    def _value_of(self, symbol_name: str) -> LogicValue:
+        return _CODE_TO_VALUE[self._model.get(self._table.get_id(symbol_name))]
+
+    def _has(self, symbol_name: str) -> bool:
+        symbol_id: Optional[int] = self._table.get_id(symbol_name)
+        return symbol_id is not None and self._model.contains(symbol_id)
+
+    def _remove(self, symbol_name: str) -> None:
+        self._model.remove(self._table.get_id(symbol_name))
+        del self._keys[bisect_left(self._keys, symbol_name)]
 
     def get_symbols(self) -> dict[str, LogicValue]:
         """
         Returns a dictionary of symbols indexed by symbol name (str)
         :return: A dictionary of type dict[str, LogicValue]
         """
-        return self._symbols
+        return {symbol_name: self._value_of(symbol_name) for symbol_name in self._keys}
 
     def get_keys(self) -> List[str]:
         """
         Returns a list of all symbol names, sorted alphabetically.
         :return: A list of type List[str]
         """
-        keys: list[str] = list(self._symbols.keys())
-        keys.sort()
-        return keys
+        return list(self._keys)
 
     @property
     def length(self) -> int:
-        return len(self._symbols)
+        return len(self._keys)
 
     def get_symbol(self, index: Union[str, int]) -> Optional[LogicSymbol]:
         """
@@ -264,17 +494,15 @@ class SymbolList:
         """
         if isinstance(index, str):
             index = index.upper()
-            if index in self._symbols:
-                return LogicSymbol(index, self._symbols[index])
+            if self._has(index):
+                return LogicSymbol(index, self._value_of(index))
             else:
                 return None
         elif isinstance(index, int):
             # index is an integer
-            if index > len(self._symbols) - 1 or index < 0:
+            if index > len(self._keys) - 1 or index < 0:
                 raise SymbolListError("Call to get_symbol was out of bounds.")
-            keys: List[str] = self.get_keys()
-            if keys[index] in keys:
-                return LogicSymbol(keys[index], self._symbols[keys[index]])
+            return LogicSymbol(self._keys[index], self._value_of(self._keys[index]))
         else:
             raise SymbolListError("Passed an index for a symbol that was not a string or integer.")
 
@@ -288,7 +516,7 @@ class SymbolList:
         :return: Returns the symbol as a type LogicSymbol
         """
         symbol = self.get_symbol(index)
-        self._symbols.pop(symbol.name)
+        self._remove(symbol.name)
         return symbol
 
     def get_next_symbol(self) -> Optional[LogicSymbol]:
@@ -297,11 +525,10 @@ class SymbolList:
 
         :return: Returns a LogicSymbol of the next symbol in the list ordered alphabetically.
         """
-        if len(self._symbols) == 0 or self._symbols is None:
+        if len(self._keys) == 0:
             return None
         else:
-            symbol_keys: List[str] = self.get_keys()
-            return self.pop(symbol_keys[0])
+            return self.pop(self._keys[0])
 
     def index(self, symbol_name: str) -> Optional[int]:
         """
@@ -311,13 +538,10 @@ class SymbolList:
         :return: Returns an integer of the index of this symbol_name. Returns None it does not exist.
         """
         symbol_name = symbol_name.upper()
-        keys: List[str] = self.get_keys()
-        index: Optional[int]
-        try:
-            index = keys.index(symbol_name)
-        except ValueError:
-            index = None
-        return index
+        index: int = bisect_left(self._keys, symbol_name)
+        if index < len(self._keys) and self._keys[index] == symbol_name:
+            return index
+        return None
 
     def add(self, symbol_or_list: Union[LogicSymbol, str, SymbolList, List[LogicSymbol], List[str, int]],
             value: Union[LogicValue, bool] = LogicValue.UNDEFINED) -> None:
@@ -333,12 +557,12 @@ class SymbolList:
         """
         if isinstance(symbol_or_list, LogicSymbol):
             symbol: LogicSymbol = symbol_or_list
-            self._symbols[symbol.name] = symbol.value
+            self._set(symbol.name, symbol.value)
         elif isinstance(symbol_or_list, str):
             symbol_name: str = symbol_or_list
             symbol_name = symbol_name.upper()
             if symbol_name.isalnum() and symbol_name[0].isalpha():
-                self._symbols[symbol_name] = _bool_to_logic_value(value)
+                self._set(symbol_name, _bool_to_logic_value(value))
             else:
                 raise SymbolListError("Symbols must start with a letter.")
         elif isinstance(symbol_or_list, list):
@@ -349,12 +573,19 @@ class SymbolList:
         elif isinstance(symbol_or_list, SymbolList):
             symbol_list: SymbolList = symbol_or_list
             # Concatenate the SymbolList into this SymbolList
-            keys: List[str] = symbol_list.get_keys()
-            for key in keys:
-                self.add(key, symbol_list[key])
+            for key in symbol_list._keys:
+                self._set(key, symbol_list._value_of(key))
         else:
             raise SymbolListError("The 'add' command requires a string symbol, LogicSymbol, or a SymbolList")
 
+    def _set(self, symbol_name: str, value: Optional[LogicValue]) -> None:
+        if value is None:
+            value = LogicValue.UNDEFINED
+        symbol_id: int = self._table.intern(symbol_name)
+        if not self._model.contains(symbol_id):
+            insort(self._keys, symbol_name)
+        self._model.set(symbol_id, value.value)
+
     def set_value(self, symbol_name: str, value: Optional[Union[LogicValue, bool]]) -> None:
         """
         Sets the value of a specific symbol in the SymbolList indexed by the name of the symbol. (i.e. symbol_name: str)
@@ -365,7 +596,7 @@ class SymbolList:
         """
         symbol_name = symbol_name.upper()
         logic_value: LogicValue = _bool_to_logic_value(value)
-        self._symbols[symbol_name] = logic_value
+        self._set(symbol_name, logic_value)
 
     def flip_value(self, symbol_name: str) -> None:
         # noinspection GrazieInspection
@@ -375,11 +606,10 @@ class SymbolList:
         :param symbol_name: A string with the name of the symbol to flip
         :return: None
         """
-        current_value: LogicValue = self.get_value(symbol_name)
-        if current_value == LogicValue.TRUE:
-            self.set_value(symbol_name, LogicValue.FALSE)
-        elif current_value == LogicValue.FALSE:
-            self.set_value(symbol_name,  LogicValue.TRUE)
+        symbol_id: Optional[int] = self._table.get_id(symbol_name)
+        if symbol_id is None or not self._model.contains(symbol_id):
+            raise KeyError(symbol_name)
+        self._model.flip(symbol_id)
 
     def get_value(self, symbol_name: str) -> LogicValue:
         """
@@ -391,7 +621,10 @@ class SymbolList:
         if symbol_name is None:
             return LogicValue.UNDEFINED
         else:
-            return self._symbols[symbol_name]
+            symbol_id: Optional[int] = self._table.get_id(symbol_name)
+            if symbol_id is None or not self._model.contains(symbol_id):
+                raise KeyError(symbol_name)
+            return _CODE_TO_VALUE[self._model.get(symbol_id)]
 
     def clone(self) -> SymbolList:
         """
@@ -399,7 +632,11 @@ class SymbolList:
 
         :return: A new SymbolList that clones the current (self) SymbolList.
         """
-        return deepcopy(self)
+        new_list: SymbolList = SymbolList.__new__(SymbolList)
+        new_list._table = self._table
+        new_list._model = self._model.copy()
+        new_list._keys = list(self._keys)
+        return new_list
 
     def extend_model(self, symbol_name: str, value: bool) -> SymbolList:
         """
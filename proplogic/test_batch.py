@@ -0,0 +1,49 @@
+from unittest import TestCase, skipIf
+from itertools import product
+try:
+    import numpy as np
+except ImportError:
+    np = None
+from proplogic.knowledge_base import PLKnowledgeBase
+from proplogic.sentence import Sentence
+from proplogic.symbol import LogicValue
+
+
+@skipIf(np is None, "numpy is not installed")
+class TestBatch(TestCase):
+    def test_sentence_evaluate_batch(self):
+        symbols = ['A', 'B', 'C']
+        models = np.array(list(product([-1, 0, 1], repeat=len(symbols))), dtype=np.int8)
+        for text in ['A AND B', 'A OR ~B', 'A => B', 'A <=> B', '~(A AND B) OR C', '~~A', '~(A => ~(B <=> C))',
+                     '(A OR B OR ~C) AND (~A OR C) AND B', 'A AND B AND C => ~(A OR B OR C)', 'A OR ~A']:
+            sentence = Sentence(text)
+            model = sentence.get_symbol_list()
+            expected = []
+            for row in models:
+                for symbol in model.get_keys():
+                    model.set_value(symbol, LogicValue(int(row[symbols.index(symbol)])))
+                expected.append(sentence.evaluate(model).value)
+            self.assertEqual(expected, sentence.evaluate_batch(models, symbols).tolist(), text)
+        # The columns default to the sentence's symbols in alphabetical order
+        self.assertEqual([0, 1, -1], Sentence("B => A").evaluate_batch([[0, 1], [1, 0], [-1, 1]]).tolist())
+        self.assertEqual([-1, -1], Sentence().evaluate_batch(np.zeros((2, 0), dtype=np.int8), []).tolist())
+        with self.assertRaises(KeyError):
+            Sentence("A AND D").evaluate_batch(models, symbols)
+        with self.assertRaises(ValueError):
+            Sentence("A AND B").evaluate_batch(models)
+
+    def test_knowledge_base_evaluate_batch(self):
+        kb = PLKnowledgeBase()
+        kb.add("A OR B\nB => C\n~(C AND D) <=> E")
+        symbols = kb.get_symbol_list().get_keys()
+        generator = np.random.default_rng(7)
+        models = generator.integers(-1, 2, size=(500, len(symbols)), dtype=np.int8)
+        model = kb.get_symbol_list()
+        expected = []
+        for row in models:
+            for symbol, value in zip(symbols, row):
+                model.set_value(symbol, LogicValue(int(value)))
+            expected.append(kb.evaluate(model).value)
+        self.assertEqual(expected, kb.evaluate_batch(models).tolist())
+        self.assertEqual({-1, 0, 1}, set(expected))
+        self.assertEqual([1, 1], PLKnowledgeBase().evaluate_batch(np.zeros((2, 0), dtype=np.int8)).tolist())
@@ -0,0 +1,47 @@
+from unittest import TestCase
+from array import array
+from proplogic.knowledge_base import PLKnowledgeBase
+from proplogic.parser import LogicParser
+from proplogic.bulk_parser import encode_postfix, decode_postfix, split_chunks, parse_rules
+
+_RULES = "A AND B => C\n~~(D OR ~E) <=> ~F\n(G1 AND\nH1)\n=> I1\n~(~(J)) OR K AND L OR M\n" \
+         "N =>\n(O OR\n(P))\nQ\n"
+
+
+def _strings(sentences) -> list:
+    return [sentence.to_string(True) for sentence in sentences]
+
+
+class TestBulkParser(TestCase):
+    def test_postfix_round_trip(self):
+        sentences = LogicParser(_RULES).parse_input()
+        symbol_ids, symbol_names, codes = {}, [], array('i')
+        for sentence in sentences:
+            encode_postfix(sentence, symbol_ids, symbol_names, codes)
+        self.assertEqual(len(sentences), list(codes).count(-6))
+        decoded = decode_postfix(symbol_names, codes)
+        self.assertEqual(_strings(sentences), _strings(decoded))
+        # Double negations are wrapped the same way the parser does it
+        self.assertEqual("~(~(D OR ~E))", decoded[1].first_sentence.to_string(True))
+        self.assertTrue(decoded[1].first_sentence.first_sentence.negation)
+
+    def test_split_chunks(self):
+        text = (_RULES * 20).upper()
+        expected = _strings(LogicParser(text).parse_input())
+        for chunk_count in [1, 2, 7, 50]:
+            chunks = split_chunks(text, chunk_count)
+            self.assertLessEqual(len(chunks), chunk_count)
+            parsed = []
+            for chunk in chunks:
+                parsed.extend(LogicParser(chunk).parse_input())
+            self.assertEqual(expected, _strings(parsed))
+
+    def test_parse_rules(self):
+        text = "\n".join("(A" + str(i) + " AND B" + str(i) + ") => ~C" + str(i % 7) for i in range(200))
+        self.assertEqual(_strings(parse_rules(text)), _strings(parse_rules(text, workers=2)))
+        kb = PLKnowledgeBase()
+        kb.add("C1")
+        self.assertEqual(2, kb.load_rules("a => b\nc1\nb => c\na => b", workers=2))
+        self.assertEqual(["C1", "(A => B)", "(B => C)"], _strings(kb.sentences))
+        kb.add("A")
+        self.assertTrue(kb.entails("C"))
@@ -0,0 +1,59 @@
+from unittest import TestCase
+from itertools import product
+from proplogic.knowledge_base import PLKnowledgeBase
+from proplogic.components import find_components, solve_components, count_models
+
+
+def _brute_force_count(clauses, symbol_count: int) -> int:
+    return sum(1 for values in product([False, True], repeat=symbol_count)
+               if all(any(values[abs(literal) - 1] == (literal > 0) for literal in clause) for clause in clauses))
+
+
+class TestComponents(TestCase):
+    def test_find_components(self):
+        clauses = [[1, -2], [3], [2, 4], [-5, 3], [], [6]]
+        components = find_components(clauses)
+        self.assertEqual(4, len(components))
+        self.assertEqual([1, 2, 4], components[0].symbols)
+        self.assertEqual([0, 2], components[0].clause_indexes)
+        self.assertEqual([3, 5], components[1].symbols)
+        self.assertEqual([[3], [-5, 3]], components[1].clauses)
+        self.assertEqual([], components[2].symbols)
+        self.assertEqual([6], components[3].symbols)
+        names = ['A', 'B', 'C', 'D', 'E', 'F']
+        self.assertEqual((['C', 'E'], [[1], [-2, 1]]), components[1].local_clauses(names))
+        self.assertIsNone(solve_components(components, names))
+        model = solve_components(components[:2] + components[3:], names)
+        self.assertTrue(all(any(model.get(abs(literal)) == (literal > 0) for literal in clause)
+                            for clause in clauses if len(clause) > 0))
+
+    def test_count_models(self):
+        clauses = [[1, 2], [-3, 4], [5], [-1, -2, 6], [7, -7]]
+        self.assertEqual(_brute_force_count(clauses, 8), count_models(clauses, 8))
+        clauses = [[1, 2, 3], [-1, -2], [-2, -3], [2, 4], [-4, 5, 1], [-5, -1, 3], [6, -3]]
+        self.assertEqual(_brute_force_count(clauses, 6), count_models(clauses, 6))
+        self.assertEqual(0, count_models([[1], [-1, 2], [-2]], 2))
+        self.assertEqual(0, count_models([[1], []], 1))
+        self.assertEqual(8, count_models([], 3))
+        # Many independent parts multiply together without enumerating 2 ** 60 assignments
+        clauses = [[3 * i + 1, 3 * i + 2, 3 * i + 3] for i in range(20)]
+        self.assertEqual(7 ** 20, count_models(clauses, 60))
+        self.assertEqual(7 ** 20, count_models(clauses, 60, workers=2))
+
+    def test_knowledge_base_components(self):
+        kb = PLKnowledgeBase()
+        kb.add("A or B\nC => D\nE\nD and E => F")
+        self.assertEqual(2, len(kb.decompose()))
+        self.assertEqual(3 * 4, kb.count_models())
+        self.assertTrue(kb.is_satisfiable())
+        for query in ['e', 'a or b', 'c => f', 'a', '~c', 'z', 'z or ~z']:
+            self.assertEqual(kb.dpll_entails(query), kb.dpll_entails(query, decompose=True))
+        self.assertTrue(kb.dpll_entails('c => f', decompose=True, workers=2))
+        kb.add("~A\n~B")
+        self.assertFalse(kb.is_satisfiable())
+        # An inconsistent knowledge base entails everything, even queries that don't share its symbols
+        self.assertTrue(kb.dpll_entails('z', decompose=True))
+        self.assertEqual(0, kb.count_models())
+        kb.retract("~B")
+        self.assertTrue(kb.is_satisfiable())
+        self.assertFalse(kb.dpll_entails('z', decompose=True))
@@ -0,0 +1,76 @@
+from unittest import TestCase
+from itertools import product
+import multiprocessing
+import random
+import time
+from proplogic.knowledge_base import PLKnowledgeBase
+from proplogic.cubes import split_cubes, cube_and_conquer
+
+
+def _models(clauses, symbol_count: int):
+    return [values for values in product([False, True], repeat=symbol_count)
+            if all(any(values[abs(literal) - 1] == (literal > 0) for literal in clause) for clause in clauses)]
+
+
+def _pigeonhole(pigeons: int, holes: int):
+    # Symbol pigeon * holes + hole + 1 is True when the pigeon is in the hole. Unsatisfiable when pigeons > holes.
+    clauses = [[pigeon * holes + hole + 1 for hole in range(holes)] for pigeon in range(pigeons)]
+    for hole in range(holes):
+        for first in range(pigeons):
+            for second in range(first + 1, pigeons):
+                clauses.append([-(first * holes + hole + 1), -(second * holes + hole + 1)])
+    return clauses
+
+
+class TestCubes(TestCase):
+    def test_split_cubes(self):
+        generator = random.Random(4)
+        names = ['S' + str(i) for i in range(1, 11)]
+        for _ in range(20):
+            clauses = [[generator.choice([-1, 1]) * generator.randint(1, 10) for _ in range(3)] for _ in range(40)]
+            cubes = split_cubes(clauses, names, 3)
+            self.assertLessEqual(len(cubes), 8)
+            # Every model of the clauses is in exactly one cube
+            for values in _models(clauses, 10):
+                matching = [cube for cube in cubes if all(values[abs(literal) - 1] == (literal > 0)
+                                                          for literal in cube)]
+                self.assertEqual(1, len(matching))
+        self.assertEqual([], split_cubes(_pigeonhole(4, 3), ['S' + str(i) for i in range(1, 13)], 4))
+
+    def test_cube_and_conquer(self):
+        generator = random.Random(9)
+        names = ['S' + str(i) for i in range(1, 13)]
+        for workers, depth in [(None, 3), (2, None), (2, 5)]:
+            for _ in range(5):
+                clauses = [[generator.choice([-1, 1]) * generator.randint(1, 12) for _ in range(3)]
+                           for _ in range(50)]
+                model = cube_and_conquer(clauses, names, workers=workers, depth=depth)
+                if len(_models(clauses, 12)) == 0:
+                    self.assertIsNone(model)
+                else:
+                    self.assertTrue(all(any(model.get(abs(literal)) == (literal > 0) for literal in clause)
+                                        for clause in clauses))
+        self.assertIsNone(cube_and_conquer(_pigeonhole(5, 4), ['S' + str(i) for i in range(1, 21)], workers=2))
+
+    def test_cube_and_conquer_stops_workers(self):
+        # Every clause of an unsatisfiable pigeonhole problem gets ~Z, so Z = False is a model but the cube Z = True
+        # takes minutes to refute. One worker gets each cube, and finding the model has to stop the other one.
+        clauses = _pigeonhole(10, 9)
+        z = 91
+        clauses = [clause + [-z] for clause in clauses]
+        names = ['S' + str(i) for i in range(1, z + 1)]
+        self.assertEqual([[z], [-z]], split_cubes(clauses, names, 1))
+        start = time.perf_counter()
+        model = cube_and_conquer(clauses, names, workers=2, depth=1)
+        self.assertLess(time.perf_counter() - start, 60)
+        self.assertFalse(model[z])
+        self.assertTrue(all(any(model.get(abs(literal)) == (literal > 0) for literal in clause) for clause in clauses))
+        self.assertEqual([], multiprocessing.active_children())
+
+    def test_dpll_entails_cubes(self):
+        kb = PLKnowledgeBase()
+        kb.add("A or B\nC => D\nE\nD and E => F\n~F or G or ~A")
+        for query in ['e', 'a or b', 'c => f', 'a', '~c', 'z', 'z or ~z', 'c => g or ~a']:
+            self.assertEqual(kb.dpll_entails(query), kb.dpll_entails(query, cubes=True))
+            self.assertEqual(kb.dpll_entails(query), kb.dpll_entails(query, cubes=True, workers=2))
+        self.assertTrue(kb.dpll_entails('c => f', cubes=True, workers=2, preprocess=True))
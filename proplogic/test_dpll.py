@@ -0,0 +1,63 @@
+from unittest import TestCase
+from itertools import combinations
+from proplogic.knowledge_base import PLKnowledgeBase, Sentence, LogicOperatorTypes
+from proplogic.dpll import DPLLSolver
+
+
+def _pigeonhole(holes: int):
+    # holes + 1 pigeons into holes holes is unsatisfiable
+    pigeons: int = holes + 1
+
+    def symbol(pigeon, hole):
+        return pigeon * holes + hole + 1
+
+    clauses = [[symbol(p, h) for h in range(holes)] for p in range(pigeons)]
+    for h in range(holes):
+        for p1, p2 in combinations(range(pigeons), 2):
+            clauses.append([-symbol(p1, h), -symbol(p2, h)])
+    return clauses, ['P' + str(i) for i in range(1, pigeons * holes + 1)]
+
+
+class TestDPLLSolver(TestCase):
+    def test_solve(self):
+        solver = DPLLSolver([[1, 2], [-1], [-2, 3]], ['A', 'B', 'C'])
+        self.assertTrue(solver.solve())
+        self.assertEqual({1: False, 2: True, 3: True}, solver.model())
+        self.assertFalse(DPLLSolver([[1, 2], [-1], [-2]], ['A', 'B']).solve())
+        self.assertFalse(DPLLSolver([[]], []).solve())
+        self.assertTrue(DPLLSolver([], []).solve())
+        clauses, names = _pigeonhole(4)
+        self.assertFalse(DPLLSolver(clauses, names).solve())
+        clauses, names = _pigeonhole(3)
+        self.assertTrue(DPLLSolver(clauses[3:], names).solve())
+
+    def test_assumptions(self):
+        solver = DPLLSolver([[1, 2], [-2, 3]], ['A', 'B', 'C'])
+        self.assertTrue(solver.solve([-1]))
+        self.assertEqual({1: False, 2: True, 3: True}, solver.model())
+        self.assertFalse(solver.solve([-1, -3]))
+        # Assumptions only last for one call
+        self.assertTrue(solver.solve([-3]))
+        self.assertTrue(solver.model()[1])
+        self.assertTrue(solver.solve())
+
+    def test_many_symbols(self):
+        # A long chain of implications A1 => A2 => ... more symbols than the recursion limit
+        count: int = 5000
+        names = ['A' + str(i) for i in range(1, count + 1)]
+        clauses = [[1]] + [[-i, i + 1] for i in range(1, count)]
+        solver = DPLLSolver(clauses + [[-count]], names)
+        self.assertFalse(solver.solve())
+        solver = DPLLSolver(clauses[1:] + [[-count]], names)
+        self.assertTrue(solver.solve())
+        self.assertFalse(solver.model()[1])
+
+    def test_dpll_entails_many_symbols(self):
+        count: int = 1500
+        kb = PLKnowledgeBase()
+        # Build directly rather than through 'add' to keep the test quick
+        kb._sentences = [Sentence('A1')] + [Sentence('A' + str(i), LogicOperatorTypes.IMPLIES, 'A' + str(i + 1))
+                                            for i in range(1, count)]
+        self.assertTrue(kb.dpll_entails('A' + str(count)))
+        self.assertFalse(kb.dpll_entails('~A' + str(count)))
+        self.assertTrue(kb.dpll_entails('A' + str(count), heuristic='vsids', preprocess=True))
@@ -0,0 +1,81 @@
+from unittest import TestCase
+from proplogic.knowledge_base import PLKnowledgeBase, LogicValue
+from proplogic.heuristics import get_heuristic, HeuristicError, AlphabeticalHeuristic, JeroslowWangHeuristic, \
+    VSIDSHeuristic, DLISHeuristic, MOMSHeuristic
+
+
+class TestBranchingHeuristics(TestCase):
+    def test_choose(self):
+        # Symbols: 1 = C, 2 = B, 3 = A
+        clauses = [[1, -2], [-2, 3], [-2, -3, 1], [2]]
+        names = ['C', 'B', 'A']
+        undefined = [-1, -1, -1, -1]
+        heuristic = AlphabeticalHeuristic()
+        heuristic.initialize(clauses, names)
+        self.assertEqual(3, heuristic.choose(undefined))
+        self.assertEqual(2, heuristic.choose(undefined))
+        # A is assigned so gets skipped until it is unassigned again
+        self.assertEqual(1, heuristic.choose([-1, -1, -1, 1]))
+        self.assertIsNone(heuristic.choose([-1, 1, 1, 1]))
+        heuristic.unassigned(3)
+        self.assertEqual(3, heuristic.choose(undefined))
+
+        heuristic = JeroslowWangHeuristic()
+        heuristic.initialize(clauses, names)
+        self.assertEqual(-2, heuristic.choose(undefined))
+
+        heuristic = DLISHeuristic()
+        heuristic.initialize(clauses, names)
+        self.assertEqual(-2, heuristic.choose(undefined))
+        # With B True, clause 1 and 2 are the open ones left, and B is unavailable
+        self.assertEqual(1, heuristic.choose([-1, -1, 1, -1]))
+
+        heuristic = MOMSHeuristic()
+        heuristic.initialize(clauses, names)
+        self.assertEqual(2, heuristic.choose(undefined))
+
+        heuristic = VSIDSHeuristic()
+        heuristic.initialize(clauses, names)
+        heuristic.conflict([-2, 3])
+        heuristic.conflict([3])
+        self.assertGreater(heuristic.activity(3), heuristic.activity(2))
+        self.assertEqual(3, heuristic.choose(undefined))
+        self.assertEqual(-2, heuristic.choose(undefined))
+
+    def test_symbol_list_adapter(self):
+        # The adapter keeps its own assignment, updated by symbol_assigned and symbol_unassigned
+        heuristic = AlphabeticalHeuristic()
+        heuristic.initialize([[1, -2], [-2, 3], [-2, -3, 1], [2]], ['C', 'B', 'A'])
+        heuristic.symbol_assigned('A', True)
+        heuristic.symbol_assigned('Z', False)
+        symbol = heuristic.next_symbol()
+        self.assertEqual(('B', LogicValue.TRUE), (symbol.name, symbol.value))
+        heuristic.symbol_assigned('B', LogicValue.FALSE)
+        self.assertEqual('C', heuristic.next_symbol().name)
+        heuristic.symbol_assigned('C', True)
+        self.assertIsNone(heuristic.next_symbol())
+        heuristic.symbol_unassigned('A')
+        self.assertEqual('A', heuristic.next_symbol().name)
+
+    def test_get_heuristic(self):
+        self.assertIsInstance(get_heuristic('VSIDS'), VSIDSHeuristic)
+        self.assertIsInstance(get_heuristic('jw'), JeroslowWangHeuristic)
+        heuristic = DLISHeuristic()
+        self.assertIs(heuristic, get_heuristic(heuristic))
+        self.assertRaises(HeuristicError, get_heuristic, 'random')
+
+    def test_entails_with_heuristics(self):
+        kb = PLKnowledgeBase()
+        kb.add("A\nB\nA AND B => L\nA AND P => L\nB AND L => M\nL AND M => P\nP => Q\n~A => Z\nA or Z => ~X")
+        cnf_kb = kb.convert_to_cnf()
+        for heuristic in ['alphabetical', 'jeroslow_wang', 'vsids', 'dlis', 'moms']:
+            self.assertTrue(cnf_kb.dpll_entails('q', heuristic=heuristic))
+            self.assertTrue(cnf_kb.dpll_entails('~x', heuristic=heuristic))
+            self.assertFalse(cnf_kb.dpll_entails('z', heuristic=heuristic))
+            self.assertFalse(cnf_kb.dpll_entails('~z', heuristic=heuristic))
+            self.assertTrue(cnf_kb.dpll_entails('q', heuristic=heuristic, recursive=True))
+            self.assertFalse(cnf_kb.dpll_entails('z', heuristic=heuristic, recursive=True))
+            self.assertEqual(LogicValue.TRUE, cnf_kb.truth_table_entails('q', use_speedup=True, heuristic=heuristic))
+            self.assertEqual(LogicValue.TRUE, kb.truth_table_entails('q', heuristic=heuristic))
+            self.assertEqual(LogicValue.UNDEFINED, kb.truth_table_entails('z', heuristic=heuristic))
+            self.assertEqual(LogicValue.FALSE, kb.truth_table_entails('x', heuristic=heuristic))
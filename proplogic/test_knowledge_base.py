@@ -1,7 +1,10 @@
 from unittest import TestCase
+import pickle
+import sys
+import threading
 from proplogic.knowledge_base import LogicSymbol, LogicValue, PLKnowledgeBase, Sentence, \
     KnowledgeBaseError, _set_symbol_in_model, _pl_resolve
-from proplogic.symbol import SymbolList, SymbolListError
+from proplogic.symbol import SymbolList, SymbolListError, CompactModel, SymbolTable, symbol_table
 
 # How to add regions
 # https://www.jetbrains.com/help/rider/Coding_Assistance__Surrounding_with_Region.html#managing-regions-in-the-editor
@@ -43,6 +46,45 @@ class TestLogicSymbol(TestCase):
         self.assertEqual(LogicValue.UNDEFINED, symbol3.or_op(LogicValue.FALSE))
         self.assertEqual(LogicValue.UNDEFINED, symbol3.or_op(LogicValue.UNDEFINED))
 
+    def test_symbol_table(self):
+        symbol1 = LogicSymbol("Q" + "17", LogicValue.TRUE)
+        symbol2 = LogicSymbol("".join(["Q", "17"]), LogicValue.FALSE)
+        # Every copy of a symbol name is the same interned string with the same id
+        self.assertIs(symbol1.name, symbol2.name)
+        self.assertEqual(symbol1.id, symbol2.id)
+        self.assertEqual("Q17", symbol_table().name(symbol1.id))
+        self.assertEqual(symbol1.id, Sentence("q17").symbol_id)
+        self.assertIsNone(Sentence("q17 and r").symbol_id)
+        self.assertIs(symbol_table(), Sentence("q17 or z").get_symbol_list().table)
+        self.assertNotEqual(hash(symbol1), hash(symbol2))
+        self.assertEqual(hash(symbol1), hash(LogicSymbol("Q17", LogicValue.TRUE)))
+
+    def test_symbol_table_threads(self):
+        # Threads interning the same new names all get the same ids, and no two names share an id. Switching
+        # threads very often makes a race between the lookup and the insert likely.
+        names = ["T" + str(i) for i in range(2000)]
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for _ in range(10):
+                table = SymbolTable()
+                results = []
+                threads = [threading.Thread(target=lambda: results.append([table.intern(name) for name in names]))
+                           for _ in range(4)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                self.assertEqual(len(names), len(table))
+                self.assertTrue(all(ids == results[0] for ids in results))
+        finally:
+            sys.setswitchinterval(interval)
+        self.assertEqual(list(range(1, len(names) + 1)), sorted(results[0]))
+        self.assertEqual(names, [table.name(symbol_id) for symbol_id in results[0]])
+        copy = pickle.loads(pickle.dumps(table))
+        self.assertEqual(results[0][5], copy.intern(names[5]))
+        self.assertEqual(len(names) + 1, copy.intern("New"))
+
 
 class TestSymbolList(TestCase):
     def test_add_symbol_list(self):
@@ -328,6 +370,43 @@ class TestSymbolList(TestCase):
         self.assertEqual(LogicValue.UNDEFINED, symbols[0].value)
         self.assertEqual(1, new_symbols.length)
 
+    def test_compact_model(self):
+        model = CompactModel()
+        model.set(3, LogicValue.TRUE.value)
+        model.set(1, LogicValue.UNDEFINED.value)
+        self.assertEqual(2, len(model))
+        self.assertFalse(model.contains(2))
+        self.assertEqual(LogicValue.UNDEFINED.value, model.get(2))
+        self.assertEqual(LogicValue.UNDEFINED.value, model.get(100))
+        copy_model = model.copy()
+        copy_model.flip(3)
+        copy_model.flip(1)
+        self.assertEqual(LogicValue.FALSE.value, copy_model.get(3))
+        self.assertEqual(LogicValue.UNDEFINED.value, copy_model.get(1))
+        self.assertEqual(LogicValue.TRUE.value, model.get(3))
+        model.remove(3)
+        self.assertEqual(1, len(model))
+        self.assertFalse(model.contains(3))
+
+    def test_symbol_list_clone(self):
+        symbols = SymbolList()
+        symbols.add(["B", "A"])
+        symbols.set_value("b", True)
+        symbols.set_value("c", None)
+        new_symbols = symbols.extend_model("A", False)
+        new_symbols.flip_value("B")
+        new_symbols.add("D")
+        # Clones share the symbol table but not the values
+        self.assertIs(symbols.table, new_symbols.table)
+        self.assertEqual(['A', 'B', 'C'], symbols.get_keys())
+        self.assertEqual(LogicValue.TRUE, symbols.get_value('B'))
+        self.assertEqual(LogicValue.UNDEFINED, symbols.get_value('A'))
+        self.assertEqual(LogicValue.UNDEFINED, symbols.get_value('C'))
+        self.assertEqual(['A', 'B', 'C', 'D'], new_symbols.get_keys())
+        self.assertEqual(LogicValue.FALSE, new_symbols.get_value('A'))
+        self.assertEqual(LogicValue.FALSE, new_symbols.get_value('B'))
+        self.assertRaises(KeyError, symbols.get_value, 'D')
+
 
 class TestPLKnowledgeBase(TestCase):
     def test_add_sentence_parentheses(self):
@@ -375,6 +454,55 @@ class TestPLKnowledgeBase(TestCase):
         kb2.clear()
         self.assertEqual(0, kb2.line_count)
 
+    def test_retract_checkpoint_rollback(self):
+        kb: PLKnowledgeBase = PLKnowledgeBase()
+        kb.add("A\nA => B")
+        self.assertTrue(kb.entails('B'))
+        version: int = kb.version
+        start: str = kb.checkpoint("start")
+        self.assertEqual("start", start)
+        # Hypothetical: retract a rule and assert something else
+        self.assertTrue(kb.retract("A => B"))
+        self.assertFalse(kb.retract("A => B"))
+        kb.add("~B")
+        self.assertNotEqual(version, kb.version)
+        self.assertEqual(["A", "~B"], [sentence.to_string() for sentence in kb.sentences])
+        self.assertTrue(kb.is_cnf)
+        middle: str = kb.checkpoint()
+        kb.clear()
+        self.assertEqual(0, kb.line_count)
+        kb.rollback(middle)
+        self.assertEqual(["A", "~B"], [sentence.to_string() for sentence in kb.sentences])
+        kb.rollback(start)
+        self.assertEqual(["A", "A => B"], [sentence.to_string() for sentence in kb.sentences])
+        self.assertFalse(kb.is_cnf)
+        self.assertTrue(kb.entails('B'))
+        # Later checkpoint was released by rolling back past it
+        self.assertRaises(KnowledgeBaseError, kb.rollback, middle)
+        # Can roll back to the same checkpoint more than once
+        kb.add("C")
+        kb.rollback(start)
+        self.assertEqual(2, kb.line_count)
+        kb.release(start)
+        self.assertEqual([], kb._trail)
+        self.assertRaises(KnowledgeBaseError, kb.rollback, start)
+        # Checkpoint names never overwrite each other
+        first: str = kb.checkpoint()
+        self.assertEqual("checkpoint2", first)
+        self.assertEqual("checkpoint3", kb.checkpoint("checkpoint3"))
+        self.assertEqual("checkpoint4", kb.checkpoint())
+        self.assertRaises(KnowledgeBaseError, kb.checkpoint, "checkpoint3")
+        self.assertRaises(KnowledgeBaseError, kb.checkpoint, first)
+        # is_cnf is recomputed from all the sentences left after a retract
+        kb = PLKnowledgeBase()
+        kb.add("C => D\nA OR B")
+        self.assertTrue(kb.retract("A OR B"))
+        self.assertFalse(kb.is_cnf)
+        self.assertEqual(kb.truth_table_entails("D"), kb.truth_table_entails("D", use_speedup=True))
+        kb.add("~C OR D")
+        self.assertTrue(kb.retract("C => D"))
+        self.assertTrue(kb.is_cnf)
+
     def test_kb_exists(self):
         kb: PLKnowledgeBase = PLKnowledgeBase()
         kb.add("a or b and c => d")
@@ -609,6 +737,28 @@ class TestPLKnowledgeBase(TestCase):
         self.assertTrue(kb.get_sentence(0).is_atomic)
         self.assertEqual("A", kb.get_sentence(0).to_string(True))
 
+    def test_cnf_cache(self):
+        kb = PLKnowledgeBase()
+        kb.add("A\nB\nA AND B => L\nA AND P => L\nB AND L => M\nL AND M => P\nP => Q")
+        rule = kb.get_sentence(2)
+        clauses = kb.sentence_cnf(rule)
+        self.assertEqual(["~A OR ~B OR L"], [clause.to_string() for clause in clauses])
+        # A structurally equal sentence gets the cached clauses without converting again
+        self.assertIs(clauses, kb.sentence_cnf(Sentence("A AND B => L")))
+        # Sentences added after the cache exists are converted as they are added
+        kb.add("Q => R")
+        self.assertIn(Sentence("Q => R").structural_hash(), kb._cnf_cache)
+        self.assertTrue(kb.dpll_entails('r', recursive=True))
+        self.assertTrue(kb.pl_resolution('q'))
+        kb.retract("Q => R")
+        self.assertNotIn(Sentence("Q => R").structural_hash(), kb._cnf_cache)
+        self.assertFalse(kb.dpll_entails('r', recursive=True))
+        cnf_kb = kb.convert_to_cnf()
+        self.assertEqual(7, cnf_kb.line_count)
+        self.assertTrue(cnf_kb.is_cnf)
+        # The converted knowledge base doesn't share clauses with the cache
+        self.assertIsNot(cnf_kb.get_sentence(2), clauses[0])
+
     def test_find_pure_symbol(self):
         kb = PLKnowledgeBase()
         input_str: str
@@ -778,6 +928,41 @@ class TestPLKnowledgeBase(TestCase):
         # Always True even though not in the model
         self.assertTrue(kb.is_query_true('y or ~y'))
 
+    def test_backbone(self):
+        kb = PLKnowledgeBase()
+        kb.add("A\nA => B\nC or D\n~E or F\nF => G")
+        self.assertEqual(frozenset({'A', 'B'}), kb.backbone())
+        cnf_kb = kb.convert_to_cnf()
+        self.assertEqual(frozenset({'A', 'B'}), cnf_kb.backbone())
+        for a_kb in [kb, cnf_kb]:
+            for symbol in ['a', 'b', 'c', 'e', 'g', 'z']:
+                for query in [symbol, '~' + symbol]:
+                    expected = (a_kb.dpll_entails(query) if a_kb.is_cnf else
+                                a_kb.truth_table_entails(query) == LogicValue.TRUE)
+                    self.assertEqual(expected, a_kb.is_query_true(query))
+                    self.assertEqual(expected, a_kb.entails(query))
+                self.assertEqual(symbol not in ['a', 'b'], a_kb.is_query_undefined(symbol))
+            self.assertTrue(a_kb.is_query_false('~a'))
+        # Cached until the knowledge base changes
+        kb.add("~C")
+        self.assertEqual(frozenset({'A', 'B', 'D', '~C'}), kb.backbone())
+        kb.retract("~C")
+        self.assertEqual(frozenset({'A', 'B'}), kb.backbone())
+        # An inconsistent knowledge base entails everything
+        cnf_kb.add(Sentence("~B"))
+        self.assertEqual(14, len(cnf_kb.backbone()))
+        self.assertTrue(cnf_kb.is_query_true('~g'))
+        self.assertFalse(cnf_kb.is_query_undefined('g'))
+        # Including literals the knowledge base doesn't contain, the same as before the backbone was cached
+        kb = PLKnowledgeBase()
+        kb.add("A\n~A OR B\n~B")
+        expected = [kb.is_query_true('Z'), kb.entails('Z'), kb.is_query_false('Z'), kb.dpll_entails('Z')]
+        self.assertEqual([True] * 4, expected)
+        kb.backbone()
+        self.assertEqual(expected, [kb.is_query_true('Z'), kb.entails('Z'), kb.is_query_false('Z'),
+                                    kb.dpll_entails('Z')])
+        self.assertFalse(kb.is_query_undefined('Z'))
+
     def test_split_and_lines(self):
         sentence1: Sentence = Sentence("A OR B OR C AND D")
         sentence2 = sentence1.convert_to_cnf(or_clauses_only=False)
@@ -0,0 +1,54 @@
+from unittest import TestCase
+from proplogic.knowledge_base import PLKnowledgeBase, Sentence, LogicValue
+from proplogic.overlay import KBOverlay
+
+
+class TestKBOverlay(TestCase):
+    def test_overlay(self):
+        kb = PLKnowledgeBase()
+        kb.add("A\nA => B\nC or D")
+        overlay = kb.overlay("~B")
+        self.assertIsInstance(overlay, KBOverlay)
+        self.assertIs(kb, overlay.base)
+        self.assertEqual(4, overlay.line_count)
+        self.assertEqual(3, kb.line_count)
+        self.assertEqual(["~B"], [sentence.to_string() for sentence in overlay.added])
+        # The base sentences are shared, not copied
+        self.assertIs(kb.get_sentence(1), overlay.get_sentence(1))
+        self.assertEqual(["A", "A => B", "C OR D", "~B"], [sentence.to_string() for sentence in overlay])
+        self.assertFalse(overlay.walk_sat(seed=10))
+        self.assertTrue(kb.walk_sat(seed=10))
+        self.assertTrue(overlay.exists("~B"))
+        self.assertFalse(kb.exists("~B"))
+        self.assertEqual(LogicValue.TRUE, kb.overlay("~C").truth_table_entails("d"))
+
+    def test_overlay_copy_on_write(self):
+        kb = PLKnowledgeBase()
+        kb.add("A\nA => B\nC or D")
+        overlay = kb.overlay()
+        overlay.add("D => E")
+        self.assertEqual(2, overlay.cone_of_influence("e").line_count)
+        # Retracting a base sentence copies the list of sentences but leaves the base alone
+        self.assertTrue(overlay.retract("A => B"))
+        self.assertEqual(3, overlay.line_count)
+        self.assertEqual(3, kb.line_count)
+        self.assertTrue(kb.exists("A => B"))
+        self.assertEqual(1, overlay.cone_of_influence("a").line_count)
+        self.assertEqual(2, kb.cone_of_influence("a").line_count)
+        checkpoint = overlay.checkpoint()
+        overlay.retract("A")
+        overlay.add(Sentence("~C"))
+        overlay.rollback(checkpoint)
+        self.assertEqual(["A", "C OR D", "D => E"], [sentence.to_string() for sentence in overlay])
+
+    def test_engines_use_overlays(self):
+        kb = PLKnowledgeBase()
+        kb.add("A\nB\nA AND B => L\nL => M")
+        cnf_kb = kb.convert_to_cnf()
+        self.assertTrue(cnf_kb.pl_resolution('m', use_cache=True))
+        self.assertTrue(cnf_kb.pl_resolution('l'))
+        self.assertTrue(kb.walk_sat_entails('m', seed=10))
+        self.assertTrue(cnf_kb.dpll_entails('m', recursive=True))
+        # None of the queries changed the knowledge bases
+        self.assertEqual(4, kb.line_count)
+        self.assertEqual(4, cnf_kb.line_count)
@@ -1,7 +1,12 @@
 from unittest import TestCase
-from proplogic.parser import LogicParser
-from proplogic.sentence import Sentence, SentenceError, LogicOperatorTypes
-from proplogic.knowledge_base import SymbolList, LogicValue
+import os
+import subprocess
+import sys
+import threading
+from copy import deepcopy
+from proplogic.parser import LogicParser, PyParsingLogicParser, ParseError, ParseCache
+from proplogic.sentence import Sentence, SentenceError, LogicOperatorTypes, structural_equality, Clause
+from proplogic.knowledge_base import PLKnowledgeBase, SymbolList, LogicValue, LogicSymbol
 
 
 class TestPropLogicParser(TestCase):
@@ -727,6 +732,80 @@ class TestPropLogicParser(TestCase):
         self.assertEqual("~(~P1)", sentence.to_string(True))
         self.assertEqual("~~P1", sentence.to_string())
 
+    def test_matches_pyparsing_parser(self):
+        input_str = "P1U87 AND P2 AND ~P3 OR A94P => P4 AND (P6 OR P8)\nP5 AND P7\n~~(A <=> ~B) OR C\n" \
+                    "A AND\nB C\n((A => B)) AND ~(C OR D AND E)"
+        parser = LogicParser(input_str)
+        reference = PyParsingLogicParser(input_str)
+        self.assertEqual(reference.get_original_token_list(), parser.get_original_token_list())
+        self.assertEqual(6, parser.line_count)
+        self.assertEqual([sentence.to_string(True) for sentence in reference.parse_input()],
+                         [sentence.to_string(True) for sentence in parser.parse_input()])
+        self.assertEqual(0, parser.line_count)
+        self.assertEqual('EOF', parser.current_token)
+
+    def test_parse_errors(self):
+        parser = LogicParser()
+        for input_str, message in [("(A", "Expected ')'"), ("A => B => C", "Expected end of text"),
+                                   ("(A => B <=> C)", "Expected ')'"), ("A )", "Expected end of text"),
+                                   ("", "Expected a symbol"), ("A AND", "Expected a symbol"),
+                                   ("A OR => B", "Expected a symbol"), ("1A", "Unexpected character '1'")]:
+            with self.assertRaises(ParseError) as context:
+                parser.set_input(input_str)
+            self.assertTrue(str(context.exception).startswith("Incorrect syntax. Details: " + message),
+                            str(context.exception))
+        # The pyparsing parser raises the same exception type with the same prefix, though the details can differ
+        for input_str in ["(A", "A => B => C", "A )", "", "A ( B", "A => (B", "A & B", "~)"]:
+            for parser_type in [LogicParser, PyParsingLogicParser]:
+                with self.assertRaises(ParseError) as context:
+                    parser_type(input_str)
+                self.assertTrue(str(context.exception).startswith("Incorrect syntax. Details: "))
+
+    def test_long_lines(self):
+        # Long chains are parsed with loops so they don't hit the recursion limit
+        count: int = 5000
+        parser = LogicParser(" OR ".join("A" + str(i) for i in range(count)))
+        sentence = parser.parse_line()
+        self.assertEqual(LogicOperatorTypes.OR, sentence.logic_operator)
+        self.assertEqual("A0", sentence.first_sentence.symbol)
+        self.assertEqual(LogicOperatorTypes.OR, sentence.second_sentence.logic_operator)
+        parser = LogicParser("(" * count + "A" + ")" * count)
+        self.assertEqual(1, parser.line_count)
+
+    def test_parse_cache(self):
+        cache = ParseCache(max_size=2)
+        sentence1 = cache.parse("a and b")[0]
+        self.assertEqual((0, 1), (cache.hits, cache.misses))
+        # Same text once normalized, so a hit
+        sentence2 = cache.parse("A  AND\nB")[0]
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+        self.assertEqual(0.5, cache.hit_rate)
+        self.assertEqual("(A AND B)", sentence2.to_string(True))
+        # Every lookup gets its own copy, so changing one doesn't change the cache
+        self.assertIsNot(sentence1, sentence2)
+        sentence2.negation = True
+        self.assertEqual("(A AND B)", cache.parse("A AND B")[0].to_string(True))
+        self.assertEqual(["A", "(B OR C)"], [sentence.to_string(True) for sentence in cache.parse("A\nB OR C")])
+        cache.parse("C")
+        # The least recently used entry is dropped
+        self.assertEqual(2, len(cache))
+        cache.parse("A\nB OR C")
+        self.assertEqual((3, 3), (cache.hits, cache.misses))
+        cache.parse("A AND B")
+        self.assertEqual((3, 4), (cache.hits, cache.misses))
+        self.assertRaises(ParseError, cache.parse, "A AND")
+        cache.clear()
+        self.assertEqual((0, 0, 0), (len(cache), cache.hits, cache.misses))
+
+    def test_lazy_imports(self):
+        # Each module imports on its own (no import cycle) and importing the knowledge base doesn't pull in
+        # pyparsing or build a parser
+        repository_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        for module in ['proplogic.parser', 'proplogic.sentence', 'proplogic.knowledge_base']:
+            code = "import sys, " + module + "; print('pyparsing' in sys.modules)"
+            result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, cwd=repository_root)
+            self.assertEqual("False", result.stdout.strip(), result.stderr)
+
 
 class TestSentence(TestCase):
     def test_create_sentence(self):
@@ -1777,6 +1856,57 @@ class TestSentence(TestCase):
         self.assertEqual(sentence1, clone)
         self.assertTrue(sentence1 is not clone)
 
+    def test_structural_hash(self):
+        sentence1 = Sentence("a or b and c or ~k and ~~x or ~(g=>~h) <=> h and j or k or ~(u or k and ~a)")
+        clone = sentence1.clone()
+        self.assertEqual(sentence1.structural_hash(), clone.structural_hash())
+        self.assertTrue(sentence1.is_structurally_equal(clone))
+        sentence2 = Sentence("a or b")
+        sentence3 = Sentence("b or a")
+        self.assertNotEqual(sentence2.structural_hash(), sentence3.structural_hash())
+        self.assertFalse(sentence2.is_structurally_equal(sentence3))
+        self.assertFalse(sentence2.is_structurally_equal(Sentence("a or ~b")))
+        self.assertFalse(Sentence("a").is_structurally_equal(Sentence("~a")))
+        self.assertTrue(Sentence("~a").is_structurally_equal(Sentence("~a")))
+
+    def test_sentence_slots(self):
+        sentence = Sentence("a or ~(b and c)")
+        self.assertFalse(hasattr(sentence, '__dict__'))
+        self.assertFalse(hasattr(sentence.get_symbol_list(), '__dict__'))
+        self.assertEqual(sentence.to_string(True), sentence.clone().to_string(True))
+
+    def test_is_equivalent_sat(self):
+        self.assertTrue(Sentence("a => b").is_equivalent("~a or b"))
+        self.assertTrue(Sentence("a <=> b").is_equivalent("(a and b) or (~a and ~b)"))
+        self.assertTrue(Sentence("~(a and b)").is_equivalent("~a or ~b"))
+        self.assertFalse(Sentence("a => b").is_equivalent("b => a"))
+        self.assertFalse(Sentence("a <=> b").is_equivalent("~(a <=> b)"))
+        # Too many symbols for a truth table to be quick
+        symbols = ["S" + str(i) for i in range(30)]
+        clause1 = Sentence(" or ".join(symbols))
+        clause2 = Sentence(" or ".join(reversed(symbols)))
+        clause3 = Sentence(" or ".join(symbols[:-1] + ["~" + symbols[-1]]))
+        self.assertEqual(clause1, clause2)
+        self.assertNotEqual(clause1, clause3)
+
+    def test_structural_equality(self):
+        sentences = [Sentence("a or b"), Sentence("c")]
+        self.assertIn(Sentence("b or a"), sentences)
+        with structural_equality():
+            self.assertNotIn(Sentence("b or a"), sentences)
+            self.assertIn(Sentence("a or b"), sentences)
+            sentences.remove(Sentence("c"))
+        self.assertEqual(1, len(sentences))
+        self.assertEqual(Sentence("b or a"), sentences[0])
+        # Other threads keep comparing by logical equivalence while the block is open
+        results = []
+        with structural_equality():
+            thread = threading.Thread(target=lambda: results.append(Sentence("b or a") == Sentence("a or b")))
+            thread.start()
+            thread.join()
+            self.assertNotEqual(Sentence("b or a"), Sentence("a or b"))
+        self.assertEqual([True], results)
+
     def test_transform_conditionals(self):
         # Test atomic
         sentence1 = Sentence("a")
@@ -2120,3 +2250,95 @@ class TestSentence(TestCase):
         sentence = Sentence("Y OR ~Y")
         model = sentence.get_symbol_list()
         self.assertEqual(LogicValue.UNDEFINED, sentence.evaluate(model))
+
+    def test_builders(self):
+        # The builders make the same trees the parser does
+        built = Sentence.or_(Sentence.and_('A', Sentence.not_('b'), 'C'), Sentence.not_(Sentence.not_('D')), 'E')
+        parsed = Sentence("A AND ~B AND C OR ~~D OR E")
+        self.assertEqual(parsed.to_string(True), built.to_string(True))
+        self.assertTrue(built.is_structurally_equal(parsed))
+        self.assertEqual("~(A => B)", Sentence.not_(Sentence("A => B")).to_string(True))
+        self.assertEqual("A", Sentence.and_("A").to_string())
+        self.assertRaises(SentenceError, Sentence.or_)
+        self.assertRaises(SentenceError, Sentence.atom, "1A")
+
+    def test_nary_nodes(self):
+        # Chains of the same operator are parsed into one flat node rather than a deep binary chain
+        sentence = Sentence(" OR ".join("A" + str(i) if i % 3 else "~A" + str(i) for i in range(5000)))
+        self.assertTrue(sentence.is_nary)
+        self.assertEqual(5000, len(sentence.operands))
+        self.assertTrue(sentence.is_valid_cnf(or_clauses_only=True))
+        self.assertEqual(5000, sentence.get_symbol_list().length)
+        self.assertEqual(5000, len(sentence.get_atomic_symbols()))
+        model = sentence.get_symbol_list()
+        for i in range(5000):
+            model.set_value("A" + str(i), LogicValue.TRUE if i % 3 == 0 else LogicValue.FALSE)
+        self.assertEqual(LogicValue.FALSE, sentence.evaluate(model))
+        model.set_value("A4999", LogicValue.TRUE)
+        self.assertEqual(LogicValue.TRUE, sentence.evaluate(model))
+        self.assertTrue(sentence.to_string(True).startswith("(~A0 OR (A1 OR (A2 OR (~A3 OR"))
+        self.assertEqual(sentence.structural_hash(), sentence.clone().structural_hash())
+        # An n-ary node means the same as the right nested binary chain, which it turns into when that is used
+        nary = Sentence("A AND ~B AND (C OR D OR E) AND F")
+        binary = Sentence("A AND (~B AND ((C OR (D OR E)) AND F))")
+        self.assertTrue(nary.is_nary)
+        self.assertFalse(binary.is_nary)
+        self.assertEqual("A AND ~B AND (C OR D OR E) AND F", nary.to_string())
+        self.assertEqual(binary.to_string(True), nary.to_string(True))
+        self.assertTrue(nary.is_structurally_equal(binary))
+        self.assertTrue(binary.is_structurally_equal(nary))
+        self.assertEqual(binary.structural_hash(), nary.structural_hash())
+        self.assertFalse(nary.is_structurally_equal(Sentence("(A AND ~B) AND (C OR D OR E) AND F")))
+        self.assertEqual("~B", nary.second_sentence.first_sentence.to_string())
+        self.assertFalse(nary.is_nary)
+        self.assertTrue(nary.is_structurally_equal(binary))
+        # convert_to_cnf flattens the clauses it makes too
+        cnf = Sentence("(A AND B AND C) OR D").convert_to_cnf()
+        self.assertEqual("((A OR D) AND ((B OR D) AND (C OR D)))", cnf.to_string(True))
+        self.assertTrue(cnf.is_nary)
+        self.assertTrue(cnf.is_valid_cnf())
+
+    def test_deep_sentences(self):
+        # Sentences much deeper than the recursion limit
+        depth = 3000
+        symbols = ["D" + str(i) for i in range(depth)]
+        sentence = Sentence(" => (".join(symbols) + ")" * (depth - 1))
+        self.assertEqual("(D0 => (D1 => (D2 =>", sentence.to_string(True)[:20])
+        self.assertTrue(Sentence(sentence.to_string()).is_structurally_equal(sentence))
+        self.assertEqual(sentence.structural_hash(), sentence.clone().structural_hash())
+        model = sentence.get_symbol_list()
+        self.assertEqual(depth, model.length)
+        for symbol in symbols:
+            model.set_value(symbol, LogicValue.TRUE)
+        self.assertEqual(LogicValue.TRUE, sentence.evaluate(model))
+        model.set_value(symbols[-1], LogicValue.FALSE)
+        self.assertEqual(LogicValue.FALSE, sentence.evaluate(model))
+        cnf = sentence.convert_to_cnf()
+        self.assertTrue(cnf.is_valid_cnf(or_clauses_only=True))
+        self.assertEqual("~D0 OR ~D1", cnf.to_string()[:10])
+        self.assertEqual(LogicValue.FALSE, cnf.evaluate(model))
+        sentence = Sentence("~(" * depth + "A" + ")" * depth)
+        self.assertEqual("~" * depth + "A", sentence.to_string())
+        self.assertEqual("~A" if depth % 2 else "A", sentence.convert_to_cnf().to_string())
+        sentence = Sentence(" AND (".join("(" + symbol + " OR ~" + symbol + "X)" for symbol in symbols) +
+                            ")" * (depth - 1))
+        self.assertTrue(sentence.is_valid_cnf())
+        self.assertEqual(depth, len(sentence.convert_to_cnf(or_clauses_only=True)))
+        self.assertTrue(deepcopy(sentence).is_structurally_equal(sentence))
+        kb = PLKnowledgeBase()
+        kb.add(sentence)
+        self.assertTrue(kb.clone().get_sentence(0).is_structurally_equal(sentence))
+
+    def test_clause_from_literals(self):
+        expected = Sentence("A OR ~B OR C").to_string(True)
+        clause = Clause.from_literals(['a', '~B', 'C'])
+        self.assertEqual(expected, clause.to_string(True))
+        self.assertTrue(clause.is_cnf)
+        self.assertEqual(expected, Clause.from_literals([1, -2, 3], ['A', 'B', 'C']).to_string(True))
+        # Without a symbol table, integers are ids in the process wide symbol table
+        ids = [Sentence('A').symbol_id, -Sentence('B').symbol_id, Sentence('C').symbol_id]
+        self.assertEqual(expected, Clause.from_literals(ids).to_string(True))
+        symbols = [LogicSymbol('A', True), LogicSymbol('B', False), LogicSymbol('C', True)]
+        self.assertEqual(expected, Clause.from_literals(symbols).to_string(True))
+        self.assertRaises(SentenceError, Clause.from_literals, [LogicSymbol('A')])
+        self.assertIsNone(Clause.from_literals([]).symbol)
@@ -0,0 +1,74 @@
+from unittest import TestCase
+from proplogic.knowledge_base import PLKnowledgeBase, KnowledgeBaseError
+from proplogic.preprocess import CNFPreprocessor, preprocess_knowledge_base
+
+
+def _satisfies(model, clauses) -> bool:
+    return all(any(model[abs(literal)] == (literal > 0) for literal in clause) for clause in clauses)
+
+
+class TestCNFPreprocessor(TestCase):
+    def test_unit_propagation(self):
+        preprocessor = CNFPreprocessor([[1], [-1, 2], [-2, 3, 4], [5, 6]])
+        self.assertEqual([[3, 4], [5, 6]], preprocessor.run(['unit_propagation']))
+        self.assertEqual(2, preprocessor.statistics['unit_propagation'].symbols_fixed)
+        self.assertEqual(2, preprocessor.statistics['unit_propagation'].clauses_removed)
+        preprocessor = CNFPreprocessor([[1], [-1, 2], [-2]])
+        preprocessor.run()
+        self.assertTrue(preprocessor.is_unsatisfiable)
+        self.assertEqual([[]], preprocessor.clauses)
+
+    def test_pure_literals(self):
+        preprocessor = CNFPreprocessor([[1, 2], [1, -2], [-3, 2]])
+        self.assertEqual([], preprocessor.run(['pure_literals']))
+        self.assertEqual({1: True, 2: True, 3: False}, preprocessor.extend_model({}))
+
+    def test_subsumption(self):
+        preprocessor = CNFPreprocessor([[1, 2, 3], [1, 2], [2, 1], [-1, 4]])
+        self.assertEqual([[1, 2], [-1, 4]], preprocessor.run(['subsumption']))
+        self.assertEqual(2, preprocessor.statistics['subsumption'].clauses_removed)
+
+    def test_self_subsumption(self):
+        # (A OR B) and (~A OR B OR C) resolve to (B OR C) which subsumes the second clause
+        preprocessor = CNFPreprocessor([[1, 2], [-1, 2, 3]])
+        self.assertEqual([[1, 2], [2, 3]], preprocessor.run(['self_subsumption']))
+        self.assertEqual(1, preprocessor.statistics['self_subsumption'].literals_removed)
+
+    def test_variable_elimination(self):
+        clauses = [[1, 2], [-1, 3], [-2, -3, 4], [-4, 2]]
+        preprocessor = CNFPreprocessor(clauses)
+        simplified = preprocessor.run(['variable_elimination'])
+        self.assertLess(len(simplified), len(clauses))
+        self.assertGreater(preprocessor.statistics['variable_elimination'].symbols_eliminated, 0)
+        # Any model of the simplified clauses extends to a model of the original ones
+        self.assertTrue(_satisfies(preprocessor.extend_model({}), clauses))
+
+    def test_model_reconstruction(self):
+        clauses = [[1, 2, 3], [-1, -2], [-2, -3], [2, 4], [-4, 5, 1], [-5, -1, 3], [6, -3]]
+        preprocessor = CNFPreprocessor(clauses)
+        preprocessor.run()
+        self.assertFalse(preprocessor.is_unsatisfiable)
+        # Brute force a model of what is left then extend it
+        remaining = preprocessor.clauses
+        symbols = sorted({abs(literal) for clause in remaining for literal in clause})
+        for bits in range(2 ** len(symbols)):
+            model = {symbol: bool(bits >> i & 1) for i, symbol in enumerate(symbols)}
+            if _satisfies(model, remaining):
+                self.assertTrue(_satisfies(preprocessor.extend_model(model), clauses))
+                break
+        else:
+            self.fail("Simplified clauses should be satisfiable.")
+        self.assertRaises(KnowledgeBaseError, CNFPreprocessor(clauses).run, ['no_such_pass'])
+
+    def test_preprocess_knowledge_base(self):
+        kb = PLKnowledgeBase()
+        kb.add("A\nB\nA AND B => L\nA AND P => L\nB AND L => M\nL AND M => P\nP => Q")
+        simplified_kb, preprocessor = preprocess_knowledge_base(kb)
+        self.assertTrue(simplified_kb.is_cnf)
+        self.assertEqual(0, simplified_kb.line_count)
+        self.assertEqual(7, kb.line_count)
+        for query in ['q', '~q', 'a and m', 'z', 'z or ~z', 'a and ~a']:
+            self.assertEqual(kb.dpll_entails(query), kb.dpll_entails(query, preprocess=True))
+        self.assertTrue(kb.walk_sat(seed=10, preprocess=True))
+        kb.add("~Q")
+        self.assertFalse(kb.walk_sat(seed=10, preprocess=True))
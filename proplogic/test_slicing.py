@@ -0,0 +1,45 @@
+from unittest import TestCase
+from proplogic.knowledge_base import PLKnowledgeBase, Sentence
+from proplogic.slicing import SymbolIndex
+
+
+class TestSlicing(TestCase):
+    def test_symbol_index(self):
+        sentences = [Sentence("A and B"), Sentence("B => C"), Sentence("D or E"), Sentence("E")]
+        index = SymbolIndex(sentences)
+        self.assertEqual(5, len(index))
+        self.assertEqual(sentences[:2], index.sentences_with('b'))
+        self.assertEqual(sentences[:2], sorted(index.cone_of_influence(['c']), key=sentences.index))
+        self.assertEqual([], index.cone_of_influence(['z']))
+        index.remove(sentences[1])
+        self.assertEqual([sentences[0]], index.cone_of_influence(['b']))
+        self.assertEqual([], index.sentences_with('c'))
+
+    def test_cone_of_influence(self):
+        kb = PLKnowledgeBase()
+        kb.add("A\nA => B\nC or D\nD => E\nF")
+        self.assertEqual(2, kb.cone_of_influence('b').line_count)
+        self.assertEqual(2, kb.cone_of_influence('e and ~c').line_count)
+        # The index keeps up with changes to the knowledge base
+        kb.add("B => E")
+        self.assertEqual(5, kb.cone_of_influence('a').line_count)
+        checkpoint = kb.checkpoint()
+        kb.retract("B => E")
+        self.assertEqual(2, kb.cone_of_influence('a').line_count)
+        kb.rollback(checkpoint)
+        self.assertEqual(5, kb.cone_of_influence('a').line_count)
+        clone = kb.clone()
+        clone.retract("B => E")
+        self.assertEqual(2, clone.cone_of_influence('a').line_count)
+        self.assertEqual(5, kb.cone_of_influence('a').line_count)
+
+    def test_sliced_entails(self):
+        kb = PLKnowledgeBase()
+        kb.add("A\nA => B\nC or D\nD => E\nF")
+        cnf_kb = kb.convert_to_cnf()
+        for a_kb in [kb, cnf_kb]:
+            for query in ['b', '~b', 'f', 'e', 'c or e', 'z', 'a and f']:
+                self.assertEqual(a_kb.entails(query, slice_query=False), a_kb.entails(query), query)
+            a_kb.add("~F")
+            for query in ['b', 'z']:
+                self.assertEqual(a_kb.entails(query, slice_query=False), a_kb.entails(query), query)
@@ -0,0 +1,52 @@
+from unittest import TestCase
+import os
+import tempfile
+from proplogic.knowledge_base import PLKnowledgeBase, LogicValue
+from proplogic.snapshot import save_snapshot, load_snapshot, KBSnapshot, SnapshotError, _SnapshotSentences
+from proplogic.cnf import kb_to_clauses
+
+
+class TestSnapshot(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'kb.plkb')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_save_and_load_snapshot(self):
+        kb = PLKnowledgeBase()
+        kb.add("A\nB\nA AND B => L\nA AND P => L\nB AND L => M\nL AND M => P\nP => Q")
+        save_snapshot(kb, self.path)
+        loaded_kb = load_snapshot(self.path)
+        self.assertTrue(loaded_kb.is_cnf)
+        self.assertEqual(kb.convert_to_cnf().line_count, loaded_kb.line_count)
+        # Nothing is built until asked for
+        self.assertIsInstance(loaded_kb.sentences, _SnapshotSentences)
+        self.assertEqual(0, sum(1 for item in loaded_kb.sentences._items if not isinstance(item, int)))
+        self.assertEqual(kb_to_clauses(kb), kb_to_clauses(loaded_kb))
+        self.assertEqual(0, sum(1 for item in loaded_kb.sentences._items if not isinstance(item, int)))
+        self.assertEqual("~A OR ~B OR L", loaded_kb.get_sentence(2).to_string())
+        self.assertTrue(loaded_kb.entails('Q'))
+        self.assertFalse(loaded_kb.entails('~Q'))
+        # Clones and additions still work
+        clone_kb = loaded_kb.clone("~Q")
+        self.assertEqual(loaded_kb.line_count + 1, clone_kb.line_count)
+        self.assertEqual(LogicValue.UNDEFINED, clone_kb.truth_table_entails('Z'))
+
+    def test_snapshot_symbol_table(self):
+        kb = PLKnowledgeBase()
+        kb.add("A OR ~B\nC")
+        save_snapshot(kb, self.path)
+        snapshot = KBSnapshot(self.path)
+        self.assertEqual(['A', 'B', 'C'], snapshot.symbol_names)
+        self.assertEqual(2, snapshot.clause_count)
+        self.assertEqual([1, -2], snapshot.literals(0))
+        self.assertEqual([3], snapshot.literals(1))
+        self.assertRaises(SnapshotError, snapshot.literals, 2)
+        snapshot.close()
+
+    def test_bad_snapshot(self):
+        with open(self.path, 'wb') as file:
+            file.write(b'NOT A SNAPSHOT FILE AT ALL')
+        self.assertRaises(SnapshotError, load_snapshot, self.path)
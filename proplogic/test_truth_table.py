@@ -0,0 +1,77 @@
+from unittest import TestCase
+from itertools import product
+import multiprocessing
+import time
+from proplogic.knowledge_base import PLKnowledgeBase
+from proplogic.sentence import Sentence
+from proplogic.symbol import LogicValue
+from proplogic.truth_table import gray_code_counts, parallel_gray_code_counts
+
+
+class TestTruthTable(TestCase):
+    def test_gray_code_counts(self):
+        sentences = [Sentence("A OR B"), Sentence("B => C"), Sentence("~(C AND D) <=> E")]
+        query = Sentence("C OR E")
+        symbols = ['A', 'B', 'C', 'D', 'E']
+        true_count, false_count = 0, 0
+        model = sentences[0].get_symbol_list()
+        for sentence in sentences[1:]:
+            model.add(sentence.get_symbol_list())
+        for values in product([False, True], repeat=len(symbols)):
+            for symbol, value in zip(symbols, values):
+                model.set_value(symbol, value)
+            if all(sentence.evaluate(model) == LogicValue.TRUE for sentence in sentences):
+                if query.evaluate(model) == LogicValue.TRUE:
+                    true_count += 1
+                else:
+                    false_count += 1
+        # Every model has C or E True, so the count doesn't stop early
+        self.assertEqual(0, false_count)
+        self.assertEqual((true_count, 0), gray_code_counts(sentences, query, symbols, model))
+        # Counting stops as soon as the query has been found True in one model and False in another
+        counts = gray_code_counts(sentences, Sentence("D"), symbols, model)
+        self.assertEqual(1, min(counts))
+        self.assertLess(sum(counts), true_count)
+        # Symbols that aren't enumerated keep their value
+        model.set_value('A', True)
+        model.set_value('B', True)
+        self.assertEqual((2, 0), gray_code_counts(sentences, query, ['C', 'D', 'E'], model))
+
+    def test_gray_code_entails(self):
+        kb = PLKnowledgeBase()
+        kb.add("A\nB\nA AND B => L\nA AND P => L\nB AND L => M\nL AND M => P\nP => Q\n~A => Z\nA and Z => W\n"
+               "A or Z => ~X")
+        for query in ['q', '~x', 'z', 'w', '~w or w', 'y', 'x', 'a and b and l and m and p and q and ~a', 'y and ~y',
+                      'a and b and l and m and p and q and z']:
+            self.assertEqual(kb.truth_table_entails(query), kb.truth_table_entails(query, gray_code=True))
+        kb.add("~Q")
+        self.assertEqual(LogicValue.UNDEFINED, kb.truth_table_entails('q', gray_code=True))
+
+    def test_parallel_gray_code_counts(self):
+        kb = PLKnowledgeBase()
+        kb.add("A OR B OR ~C\nB => (D <=> E)\n~(E AND F) OR A\nG => ~~H")
+        query = Sentence("A OR B OR ~C OR D")
+        symbols = kb.get_symbol_list()
+        symbols.add(query.get_symbol_list())
+        expected = gray_code_counts(kb.sentences, query, symbols.get_keys(), symbols.clone())
+        self.assertEqual(0, expected[1])
+        for prefix_length in [1, 3, 8]:
+            self.assertEqual(expected, parallel_gray_code_counts(kb.sentences, query, symbols.get_keys(),
+                                                                 symbols.clone(), workers=2,
+                                                                 prefix_length=prefix_length))
+        for query in ['a', 'a or b or ~c', 'g => h', 'z', 'z or ~z', 'h and ~h']:
+            self.assertEqual(kb.truth_table_entails(query), kb.truth_table_entails(query, workers=2))
+
+    def test_parallel_gray_code_counts_stops_workers(self):
+        # With P False the query is found True and False straight away, but with P True it is always True, so that
+        # prefix would count all 2 ** 20 assignments of the rest unless it is stopped
+        kb = PLKnowledgeBase()
+        rest = ['Q', 'Z'] + ['X' + str(i) for i in range(1, 19)]
+        kb.add("P => Q\n" + " OR ".join(rest[1:]))
+        query = Sentence("Q")
+        start = time.perf_counter()
+        counts = parallel_gray_code_counts(kb.sentences, query, ['P'] + rest, kb.get_symbol_list(), workers=2,
+                                           prefix_length=1)
+        self.assertLess(time.perf_counter() - start, 20)
+        self.assertGreater(min(counts), 0)
+        self.assertEqual([], multiprocessing.active_children())
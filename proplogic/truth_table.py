@@ -0,0 +1,170 @@
+from __future__ import annotations
+from typing import List, Dict, Tuple, Sequence, Optional, Callable
+from array import array
+from concurrent.futures import ProcessPoolExecutor, Future, as_completed
+import multiprocessing
+from proplogic.sentence import Sentence
+from proplogic.symbol import SymbolList, LogicValue
+from proplogic.bulk_parser import encode_postfix, decode_postfix
+
+# Gray code truth tables
+#
+# Going through the assignments to n symbols in Gray code order (000, 001, 011, 010, 110, ...) changes exactly one
+# symbol from one assignment to the next: at step i it is the symbol for the lowest set bit of i. Only the sentences
+# that contain that symbol can change value, so each step re-evaluates just those (found with an index from symbol
+# to sentences) and keeps the cached values of the rest. The model is a single SymbolList that is flipped in place
+# rather than copied for every branch.
+#
+# A truth table can also be split across processes: the first few symbols are fixed to each combination of values
+# (a prefix) and the rest of the table under each prefix is counted in a worker process. The sentences are sent to
+# the workers as postfix codes (see proplogic.bulk_parser) rather than as pickled Sentence trees.
+
+
+def _symbol_index(sentences: Sequence[Sentence], positions: Dict[str, int]) -> List[List[int]]:
+    # For each symbol position, the indexes of the sentences that contain that symbol
+    index: List[List[int]] = [[] for _ in positions]
+    for sentence_index, sentence in enumerate(sentences):
+        for symbol in sentence.get_symbol_list().get_keys():
+            position: int = positions.get(symbol, -1)
+            if position >= 0:
+                index[position].append(sentence_index)
+    return index
+
+
+def gray_code_counts(sentences: Sequence[Sentence], query: Sentence, symbols: List[str],
+                     model: SymbolList, stop: Optional[Callable[[], bool]] = None) -> Tuple[int, int]:
+    """
+    Goes through every assignment of TRUE and FALSE to symbols in Gray code order and counts the models of sentences
+    (the assignments that make them all TRUE) in which the query is TRUE and in which it is FALSE. Stops as soon as
+    both counts are non-zero since the query can then be neither entailed nor refuted.
+    :param sentences: The sentences of a knowledge base
+    :param query: The query Sentence
+    :param symbols: The names of the symbols to enumerate. They are all set to FALSE in model to start with.
+    :param model: A SymbolList holding every symbol in sentences and query. Symbols that are not in symbols keep the
+    value they have. The model is changed in place.
+    :param stop: Optional function called every 4096 assignments. When it returns True the counting stops and the
+    counts so far are returned.
+    :return: A tuple of (true_count, false_count)
+    """
+    for symbol in symbols:
+        model.set_value(symbol, False)
+    positions: Dict[str, int] = {symbol: position for position, symbol in enumerate(symbols)}
+    index: List[List[int]] = _symbol_index(sentences, positions)
+    in_query: List[bool] = [False] * len(symbols)
+    for symbol in query.get_symbol_list().get_keys():
+        if symbol in positions:
+            in_query[positions[symbol]] = True
+    # Cached value of each sentence, and how many of them are not TRUE
+    values: List[LogicValue] = [sentence.evaluate(model) for sentence in sentences]
+    not_true: int = sum(1 for value in values if value != LogicValue.TRUE)
+    query_value: LogicValue = query.evaluate(model)
+    true_count: int = 0
+    false_count: int = 0
+    assignments: int = 1 << len(symbols)
+    step: int = 0
+    while True:
+        if not_true == 0:
+            if query_value == LogicValue.TRUE:
+                true_count += 1
+            elif query_value == LogicValue.FALSE:
+                false_count += 1
+            if true_count > 0 and false_count > 0:
+                break
+        step += 1
+        if step == assignments:
+            break
+        if step & 4095 == 0 and stop is not None and stop():
+            break
+        # Flip the symbol for the lowest set bit of step and re-evaluate only the sentences that contain it
+        position: int = (step & -step).bit_length() - 1
+        model.flip_value(symbols[position])
+        for sentence_index in index[position]:
+            value: LogicValue = sentences[sentence_index].evaluate(model)
+            if value != values[sentence_index]:
+                if values[sentence_index] == LogicValue.TRUE:
+                    not_true += 1
+                elif value == LogicValue.TRUE:
+                    not_true -= 1
+                values[sentence_index] = value
+        if in_query[position]:
+            query_value = query.evaluate(model)
+    return true_count, false_count
+
+
+# Set in each worker process when both counts are non-zero, so the prefixes being counted can stop
+_stop_event = None
+
+
+def _set_stop_event(event) -> None:
+    global _stop_event
+    _stop_event = event
+
+
+def _count_prefix(symbol_names: List[str], codes: array, values: Dict[str, LogicValue],
+                  symbols: List[str]) -> Tuple[int, int]:
+    # Count the part of a truth table under one prefix in a worker process. codes holds the sentences followed by
+    # the query, and values the model with the prefix symbols set.
+    sentences: List[Sentence] = decode_postfix(symbol_names, codes)
+    query: Sentence = sentences.pop()
+    model: SymbolList = SymbolList()
+    for symbol, value in values.items():
+        model.set_value(symbol, value)
+    return gray_code_counts(sentences, query, symbols, model,
+                            stop=None if _stop_event is None else _stop_event.is_set)
+
+
+def parallel_gray_code_counts(sentences: Sequence[Sentence], query: Sentence, symbols: List[str], model: SymbolList,
+                              workers: Optional[int] = None, prefix_length: Optional[int] = None) -> Tuple[int, int]:
+    """
+    The same as gray_code_counts, but with the truth table split across processes. The first prefix_length symbols
+    are set to each of their 2 ** prefix_length combinations of values and the rest of the table for each one is
+    counted in a worker process. Prefixes that already make a sentence FALSE are skipped. The counts are added up as
+    they come back. Once both counts are non-zero the prefixes that haven't started yet are cancelled and the ones
+    still being counted stop within a few thousand assignments (see gray_code_counts' stop).
+    :param sentences: The sentences of a knowledge base
+    :param query: The query Sentence
+    :param symbols: The names of the symbols to enumerate
+    :param model: A SymbolList holding every symbol in sentences and query. Changed in place.
+    :param workers: Number of processes. None or 1 counts the whole table in this process.
+    :param prefix_length: The number of symbols to fix. Defaults to enough for about four prefixes per process.
+    :return: A tuple of (true_count, false_count)
+    """
+    if workers is None or workers <= 1 or len(symbols) == 0:
+        return gray_code_counts(sentences, query, symbols, model)
+    if prefix_length is None:
+        prefix_length = (workers * 4 - 1).bit_length()
+    prefix_length = min(prefix_length, len(symbols))
+    prefix: List[str] = symbols[:prefix_length]
+    rest: List[str] = symbols[prefix_length:]
+    for symbol in rest:
+        model.set_value(symbol, LogicValue.UNDEFINED)
+    symbol_ids: Dict[str, int] = {}
+    symbol_names: List[str] = []
+    codes: array = array('i')
+    for sentence in list(sentences) + [query]:
+        encode_postfix(sentence, symbol_ids, symbol_names, codes)
+    true_count: int = 0
+    false_count: int = 0
+    stop_event = multiprocessing.Event()
+    executor: ProcessPoolExecutor = ProcessPoolExecutor(max_workers=workers, initializer=_set_stop_event,
+                                                       initargs=(stop_event,))
+    try:
+        futures: List[Future] = []
+        for bits in range(1 << prefix_length):
+            for position, symbol in enumerate(prefix):
+                model.set_value(symbol, bits >> position & 1 == 1)
+            if any(sentence.evaluate(model) == LogicValue.FALSE for sentence in sentences):
+                # Every model under this prefix makes a sentence False
+                continue
+            futures.append(executor.submit(_count_prefix, symbol_names, codes, model.get_symbols(), rest))
+        for future in as_completed(futures):
+            prefix_true_count, prefix_false_count = future.result()
+            true_count += prefix_true_count
+            false_count += prefix_false_count
+            if true_count > 0 and false_count > 0:
+                break
+    finally:
+        # When stopping early (or on an error) cancel the prefixes that haven't started and stop the ones being counted
+        stop_event.set()
+        executor.shutdown(cancel_futures=True)
+    return true_count, false_count